@@ -7,8 +7,27 @@ from python_ag_grid_backend.routers import tables, upload, login, assistant, tea
 
 # import gradio as gr
 # from python_ag_grid_backend.chatbot_backend import assistant
-from python_ag_grid_backend.database import init_db
+from python_ag_grid_backend.database import (
+    init_db,
+    get_pool,
+    get_connection,
+    close_pool,
+    get_pool_stats,
+    open_async_pool,
+    close_async_pool,
+    get_async_pool_stats,
+    get_user_cache_stats,
+    RequestConnectionMiddleware,
+)
+from python_ag_grid_backend.db_access.tables_operations import get_table_metadata_cache_stats
+from python_ag_grid_backend.db_access.teams_operations import get_team_schema_cache_stats
+from python_ag_grid_backend.importers.jobs import shutdown_jobs
+from python_ag_grid_backend.importers.parallel_parse import shutdown_parse_pool
+from python_ag_grid_backend.passwords import get_password_pool_stats, shutdown_password_pool
 from python_ag_grid_backend.chatbot_backend.langchain_assistant import init_agent
+from python_ag_grid_backend.chatbot_backend.sql_tool import close_sql_engine
+from python_ag_grid_backend.chatbot_backend.query_governor import get_query_limits_cache_stats
+from python_ag_grid_backend.routers.assistant import get_schema_description_cache_stats
 from metabase_embed import router as metabase_router
 from contextlib import asynccontextmanager
 
@@ -32,8 +51,10 @@ async def lifespan(app: FastAPI):
 
     print("🚀 Starting app...")
 
-    # Initialize database
+    # Open the connection pool and initialize database
+    get_pool()
     init_db()
+    await open_async_pool()
 
     try:
         async with init_agent() as (agent, memory):
@@ -61,6 +82,14 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print("🔥 Error during startup:", repr(e))
         raise
+    finally:
+        # Running imports roll back; they can be resubmitted after the restart
+        shutdown_jobs()
+        shutdown_parse_pool()
+        shutdown_password_pool()
+        await close_sql_engine()
+        await close_async_pool()
+        close_pool()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -71,6 +100,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# One pooled DB connection per request, shared by every helper the request calls
+app.add_middleware(RequestConnectionMiddleware)
 
 
 @app.get("/healthz")
@@ -78,6 +109,30 @@ def healthz():
     return {"ok": True}
 
 
+@app.get("/healthz/db")
+def healthz_db():
+    """Ping the database through the pool and report pool and cache statistics."""
+    try:
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+        ok = True
+    except Exception as e:
+        print("Database health check failed:", repr(e))
+        ok = False
+    return {
+        "ok": ok,
+        "pool": get_pool_stats(),
+        "async_pool": get_async_pool_stats(),
+        "table_metadata_cache": get_table_metadata_cache_stats(),
+        "team_schema_cache": get_team_schema_cache_stats(),
+        "user_cache": get_user_cache_stats(),
+        "password_hashing": get_password_pool_stats(),
+        "schema_description_cache": get_schema_description_cache_stats(),
+        "query_limits_cache": get_query_limits_cache_stats(),
+    }
+
+
 app.include_router(metabase_router)
 app.include_router(tables.router, prefix="/api/table", tags=["tables"])
 app.include_router(upload.router, prefix="/api/upload", tags=["upload"])
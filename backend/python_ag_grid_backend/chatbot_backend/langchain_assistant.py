@@ -12,6 +12,7 @@ from langchain_core.messages.utils import (
 import gradio as gr
 from gradio import ChatMessage
 from python_ag_grid_backend.chatbot_backend.sql_tool import lc_sql_engine
+from python_ag_grid_backend.chatbot_backend.table_ranker import SchemaCatalog, relevance_query
 # from .sql_tool import lc_sql_engine
 from dotenv import load_dotenv
 from langsmith import traceable
@@ -28,6 +29,8 @@ load_dotenv()
 
 class teamContext(TypedDict):
     tablesDescription: str
+    schemaCatalog: SchemaCatalog
+    teamId: str
 
 model = ChatOpenAI(
     model="gpt-4o",
@@ -57,7 +60,12 @@ def schema_scoped_prompt(request: ModelRequest) -> str:
     
     base_prompt = """You are an intelligent Sports Analytics Assistant with access to a SQL database containing basketball data. Your goal is to help analysts explore, summarize, and interpret the data through natural conversation. You can answer questions about player performance, team results, match statistics, and more. Be concise but informative in final answers"""
     
-    tables_description = request.runtime.context.get("tablesDescription")
+    catalog = request.runtime.context.get("schemaCatalog")
+    if catalog is not None:
+        # Top-k tables for the conversation so far in full, the rest by name only
+        tables_description = catalog.describe(relevance_query(request.messages))
+    else:
+        tables_description = request.runtime.context.get("tablesDescription")
     
     schema_aware_prompt = f"""
         IMPORTANT SECURITY RESTRICTION:
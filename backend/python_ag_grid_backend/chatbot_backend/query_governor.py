@@ -0,0 +1,165 @@
+"""
+Limits on the SQL the assistant runs through lc_sql_engine.
+
+Only one statement is accepted per call, and it gets a statement_timeout.
+Before running it, the statement is EXPLAINed (plan only, nothing executes).
+A plain query whose estimated cost or row count is over the team's limit is
+rewritten with a LIMIT when that brings the cost down, and rejected
+otherwise. A write over the cost limit is rejected. Rejections are returned
+to the model as a short JSON object it can act on (narrow the query,
+aggregate, add filters) instead of an opaque error.
+
+Limits come from the assistant_query_limits table (one optional row per
+team, NULL columns fall back to the defaults) and the SQL_TOOL_* env vars.
+"""
+import json
+import os
+import re
+from dataclasses import dataclass, replace
+from sqlalchemy import text
+from python_ag_grid_backend.cache import LRUCache
+
+SQL_TOOL_MAX_COST = float(os.getenv("SQL_TOOL_MAX_COST", "1000000"))
+SQL_TOOL_MAX_ESTIMATED_ROWS = int(os.getenv("SQL_TOOL_MAX_ESTIMATED_ROWS", "1000000"))
+SQL_TOOL_STATEMENT_TIMEOUT_MS = int(os.getenv("SQL_TOOL_STATEMENT_TIMEOUT_MS", "15000"))
+
+# Postgres "query_canceled", raised when statement_timeout expires
+_QUERY_CANCELED = "57014"
+
+
+@dataclass(frozen=True)
+class QueryLimits:
+    max_cost: float = SQL_TOOL_MAX_COST
+    max_rows: int = SQL_TOOL_MAX_ESTIMATED_ROWS
+    statement_timeout_ms: int = SQL_TOOL_STATEMENT_TIMEOUT_MS
+
+
+DEFAULT_LIMITS = QueryLimits()
+
+# team_id -> QueryLimits. Limits are edited by hand in the database, so a
+# short TTL is all the invalidation there is.
+_team_limits = LRUCache(
+    maxsize=4096,
+    ttl=float(os.getenv("SQL_TOOL_LIMITS_CACHE_TTL", "60")),
+)
+
+
+# String literals (standard, E'' and dollar-quoted), quoted identifiers and
+# comments. Block comments nest in Postgres; matching to the first "*/" only
+# ever leaves more text behind, never hides any.
+_LITERALS_RE = re.compile(
+    r"""--[^\n]*
+    | /\*.*?(?:\*/|\Z)
+    | (?<![\w$])[eE]'(?:[^'\\]|\\.|'')*(?:'|\Z)
+    | '(?:[^']|'')*(?:'|\Z)
+    | "(?:[^"]|"")*(?:"|\Z)
+    | (?<![\w$])\$([A-Za-z_]\w*|)\$.*?(?:\$\1\$|\Z)""",
+    re.S | re.X,
+)
+
+
+def strip_literals(query: str) -> str:
+    """The query with literals, quoted identifiers and comments blanked out, for keyword checks."""
+    return _LITERALS_RE.sub(" ", query)
+
+
+def is_single_statement(query: str) -> bool:
+    """False when the text holds more than one statement (a ';' before the end, outside literals)."""
+    return ";" not in strip_literals(query).rstrip().rstrip(";")
+
+
+def multiple_statements() -> str:
+    """Structured rejection for text with several statements; none of them is run."""
+    details = {
+        "reason": "multiple_statements",
+        "hint": "Send one statement per call; independent queries can be parallel tool calls.",
+    }
+    return "[Query rejected] " + json.dumps(details)
+
+
+def get_query_limits_cache_stats() -> dict:
+    return _team_limits.stats()
+
+
+async def get_query_limits(con, team_id) -> QueryLimits:
+    """The team's limits (cached); defaults for anything not set."""
+    if team_id is None:
+        return DEFAULT_LIMITS
+    limits = _team_limits.get(str(team_id))
+    if limits is not None:
+        return limits
+    result = await con.execute(
+        text(
+            "SELECT max_cost, max_rows, statement_timeout_ms FROM assistant_query_limits "
+            "WHERE team_id = CAST(:team_id AS uuid)"
+        ),
+        {"team_id": str(team_id)},
+    )
+    row = result.mappings().first()
+    limits = DEFAULT_LIMITS
+    if row is not None:
+        limits = replace(limits, **{key: value for key, value in row.items() if value is not None})
+    _team_limits.set(str(team_id), limits)
+    return limits
+
+
+async def apply_statement_timeout(con, limits: QueryLimits):
+    # is_local=true: like SET LOCAL, it ends with the transaction
+    await con.execute(
+        text("SELECT set_config('statement_timeout', :timeout, true)"),
+        {"timeout": str(limits.statement_timeout_ms)},
+    )
+
+
+async def explain(con, query: str):
+    """(estimated total cost, estimated rows) of a statement, or None if it can't be EXPLAINed (e.g. DDL)."""
+    # "EXPLAIN SELECT 1; DROP TABLE t" would run the DROP
+    if not is_single_statement(query):
+        raise ValueError("Only one statement can be EXPLAINed at a time.")
+    try:
+        async with con.begin_nested():
+            result = await con.execute(text(f"EXPLAIN (FORMAT JSON) {query}"))
+            plan = result.scalar()
+    except Exception:
+        return None
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    top = plan[0]["Plan"]
+    return top["Total Cost"], top["Plan Rows"]
+
+
+def limited_query(query: str, limit: int) -> str:
+    return f"SELECT * FROM ({query.rstrip().rstrip(';')}) AS q LIMIT {int(limit)}"
+
+
+def over_limits(estimate, limits: QueryLimits) -> str | None:
+    """Which limit an EXPLAIN estimate breaks ("estimated_cost", "estimated_rows"), if any."""
+    cost, rows = estimate
+    if cost > limits.max_cost:
+        return "estimated_cost"
+    if rows > limits.max_rows:
+        return "estimated_rows"
+    return None
+
+
+def too_expensive(reason: str, limits: QueryLimits, estimate=None) -> str:
+    """Structured rejection the model can read and react to."""
+    details = {"reason": reason}
+    if estimate is not None:
+        details["estimated_cost"] = round(estimate[0])
+        details["estimated_rows"] = estimate[1]
+    if reason == "timeout":
+        details["statement_timeout_ms"] = limits.statement_timeout_ms
+    else:
+        details["max_cost"] = round(limits.max_cost)
+        details["max_rows"] = limits.max_rows
+    details["hint"] = (
+        "Do not retry the same statement. Filter on indexed columns, aggregate "
+        "(COUNT/SUM/AVG ... GROUP BY), avoid cross joins, or add a LIMIT."
+    )
+    return "[Query too expensive] " + json.dumps(details)
+
+
+def is_statement_timeout(error: Exception) -> bool:
+    orig = getattr(error, "orig", error)
+    return getattr(orig, "sqlstate", None) == _QUERY_CANCELED or getattr(orig, "pgcode", None) == _QUERY_CANCELED
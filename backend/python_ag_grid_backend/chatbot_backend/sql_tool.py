@@ -1,5 +1,4 @@
 from sqlalchemy import (
-    create_engine,
     MetaData,
     Table,
     Column,
@@ -10,68 +9,232 @@ from sqlalchemy import (
     inspect,
     text,
 )
+from sqlalchemy.ext.asyncio import create_async_engine
 from dotenv import load_dotenv
+import asyncio
+import csv
+import io
+import re
+import time
+from contextlib import asynccontextmanager
 # from smolagents import tool as smolagent_tool
 # from langchain_core.tools import tool as langchain_tool
 import os
 from dataclasses import dataclass
 from langchain.tools import tool, ToolRuntime
+from python_ag_grid_backend.db_access.tables_operations import bump_schema_version
+from python_ag_grid_backend.chatbot_backend.query_governor import (
+    DEFAULT_LIMITS,
+    apply_statement_timeout,
+    explain,
+    get_query_limits,
+    is_single_statement,
+    is_statement_timeout,
+    limited_query,
+    multiple_statements,
+    over_limits,
+    strip_literals,
+    too_expensive,
+)
 
 load_dotenv()
 
 DB_URL = os.getenv("DB_URL")
-engine = create_engine(DB_URL)
-
-# def desc_table(table_name, engine): 
-#     inspector = inspect(engine) 
-#     columns = inspector.get_columns(table_name)
-    
-#     desc = f"The table is named '{table_name}'. Its description is as follows:\n"
-#     desc += "    Columns:\n"
-#     for col in columns: 
-#         desc += f"    - {col['name']}: {col['type']}\n"
-#     return desc
-    
-    
-# table_list = "player", "match", "match_player_stat"
-# table_description = "\n".join([desc_table(table, engine) for table in table_list])
+# Async engine: a slow query awaits Postgres instead of holding the event loop
+# or an executor thread. The pool size caps concurrent tool queries overall.
+SQL_TOOL_POOL_SIZE = int(os.getenv("SQL_TOOL_POOL_SIZE", "10"))
+# Tool queries one team can have running at once; further calls wait their turn
+SQL_TOOL_TEAM_CONCURRENCY = int(os.getenv("SQL_TOOL_TEAM_CONCURRENCY", "2"))
+engine = create_async_engine(DB_URL, pool_size=SQL_TOOL_POOL_SIZE, max_overflow=0, pool_pre_ping=True)
+
+# (event loop, team) -> [semaphore, calls holding or waiting on it]. An entry
+# only exists while a call of that team is in flight, so the dict never holds
+# more than the running calls, and a semaphore is never shared across loops.
+_team_slots: dict[tuple, list] = {}
+
+# Per tool call caps: rows fetched from Postgres, characters per cell and in total
+SQL_TOOL_MAX_ROWS = int(os.getenv("SQL_TOOL_MAX_ROWS", "100"))
+SQL_TOOL_MAX_CELL_CHARS = int(os.getenv("SQL_TOOL_MAX_CELL_CHARS", "200"))
+SQL_TOOL_MAX_OUTPUT_CHARS = int(os.getenv("SQL_TOOL_MAX_OUTPUT_CHARS", "8000"))
+
+# Also catches SELECT ... INTO and FOR UPDATE; those just run without streaming
+_WRITE_KEYWORD_RE = re.compile(r"\b(insert|update|delete|merge|into)\b", re.I)
+
+
+def is_read_only_select(query: str) -> bool:
+    """
+    True for a plain query (SELECT / WITH / VALUES / TABLE without writes).
+    These can be streamed through a server-side cursor and wrapped in a subquery.
+    """
+    # Keywords inside literals, quoted identifiers or comments ("ILIKE '%into%'") don't count
+    body = strip_literals(query).lstrip(" \t\r\n(")
+    keyword = body.split(None, 1)[0].lower() if body.strip() else ""
+    # Writes (including a data-modifying WITH) can't run in a cursor or a subquery
+    return keyword in ("select", "with", "values", "table") and not _WRITE_KEYWORD_RE.search(body)
+
+
+def _cell(value) -> str:
+    if value is None:
+        return ""
+    text = str(value)
+    if len(text) > SQL_TOOL_MAX_CELL_CHARS:
+        return text[: SQL_TOOL_MAX_CELL_CHARS - 1] + "…"
+    return text
+
+
+def format_result(columns, rows, total_rows, seconds, estimated_rows=None) -> str:
+    """
+    Header plus CSV rows, capped at SQL_TOOL_MAX_OUTPUT_CHARS, followed by a
+    one-line summary with the row count. total_rows=None means more rows
+    than fetched exist; estimated_rows is then the planner's guess, if any.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(columns)
+    shown = 0
+    for row in rows:
+        mark = buffer.tell()
+        writer.writerow([_cell(value) for value in row])
+        if buffer.tell() > SQL_TOOL_MAX_OUTPUT_CHARS and shown:
+            buffer.seek(mark)
+            buffer.truncate()
+            break
+        shown += 1
+
+    if total_rows is None and estimated_rows is not None:
+        summary = f"[Showing the first {shown} of about {estimated_rows} rows (planner estimate)"
+    elif total_rows is None:
+        summary = f"[Showing the first {shown} rows of more than {len(rows)}"
+    elif shown < total_rows:
+        summary = f"[Showing the first {shown} of {total_rows} rows"
+    else:
+        summary = f"[{total_rows} row{'s' if total_rows != 1 else ''}"
+    if total_rows is None or shown < total_rows:
+        summary += "; aggregate, filter or add a LIMIT to see the rest"
+    return buffer.getvalue() + summary + f"; {seconds:.2f}s]"
+
+
+async def run_sql(query: str, team_id=None) -> str:
+    """
+    Execute one statement under the team's query limits (see query_governor)
+    and render its result for the model.
+    """
+    if not is_single_statement(query):
+        return multiple_statements()
+    started = time.monotonic()
+    read_only = is_read_only_select(query)
+    limits, estimate, estimated_rows = DEFAULT_LIMITS, None, None
+    try:
+        async with engine.begin() as con:
+            limits = await get_query_limits(con, team_id)
+            await apply_statement_timeout(con, limits)
+            estimate = await explain(con, query)
+            breach = over_limits(estimate, limits) if estimate else None
+            if breach and read_only:
+                # Only SQL_TOOL_MAX_ROWS + 1 rows are shown anyway: with a LIMIT the
+                # planner can often stop early (no sort of the whole cross join)
+                limited = limited_query(query, SQL_TOOL_MAX_ROWS + 1)
+                limited_estimate = await explain(con, limited)
+                if limited_estimate is None or limited_estimate[0] > limits.max_cost:
+                    return too_expensive(breach, limits, estimate)
+                query = limited
+            elif breach == "estimated_cost":
+                return too_expensive(breach, limits, estimate)
+
+            if read_only:
+                # Server-side cursor: at most SQL_TOOL_MAX_ROWS + 1 rows ever leave Postgres
+                result = await con.stream(
+                    text(query), execution_options={"max_row_buffer": SQL_TOOL_MAX_ROWS + 1}
+                )
+                columns = list(result.keys())
+                rows = await result.fetchmany(SQL_TOOL_MAX_ROWS + 1)
+                await result.close()
+                total_rows = len(rows)
+                if total_rows > SQL_TOOL_MAX_ROWS:
+                    # The extra row says there are more; counting them exactly would run
+                    # the query a second time. The EXPLAIN estimate is free.
+                    rows, total_rows = rows[:SQL_TOOL_MAX_ROWS], None
+                    if estimate and estimate[1] > SQL_TOOL_MAX_ROWS:
+                        estimated_rows = estimate[1]
+            else:
+                result = await con.execute(text(query))
+                columns, rows, total_rows = None, None, None
+                if result.returns_rows:
+                    # e.g. INSERT ... RETURNING: only the rows shown are turned into Python rows
+                    columns = list(result.keys())
+                    rows = result.fetchmany(SQL_TOOL_MAX_ROWS + 1)
+                    total_rows = len(rows)
+                    if total_rows > SQL_TOOL_MAX_ROWS:
+                        # rowcount is exact for DML ... RETURNING; -1 when the driver doesn't know
+                        rows = rows[:SQL_TOOL_MAX_ROWS]
+                        total_rows = result.rowcount if result.rowcount > SQL_TOOL_MAX_ROWS else None
+                    result.close()
+                # INSERT, UPDATE, DELETE
+                elif result.rowcount > 0:
+                    output = f"[Query executed successfully. Rows affected {result.rowcount}]"
+                # ALTER/DROP/CREATE - result.rowcount = 0 or -1
+                else: 
+                    output = f"[Query executed successfully]"
+    except Exception as e:
+        if is_statement_timeout(e):
+            return too_expensive("timeout", limits, estimate)
+        raise
+    if not read_only:
+        # Writes and DDL, now committed: cached schema descriptions must be rebuilt
+        bump_schema_version()
+    if columns is None:
+        return output
+    if not rows:
+        return "[No results found]"
+    return format_result(columns, rows, total_rows, time.monotonic() - started, estimated_rows)
+
+
+async def close_sql_engine():
+    await engine.dispose()
+
+
+@asynccontextmanager
+async def _team_slot(team_id):
+    """Wait for one of the team's SQL_TOOL_TEAM_CONCURRENCY slots on the running loop."""
+    key = (asyncio.get_running_loop(), str(team_id))
+    entry = _team_slots.get(key)
+    if entry is None:
+        entry = _team_slots[key] = [asyncio.Semaphore(SQL_TOOL_TEAM_CONCURRENCY), 0]
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            yield
+    finally:
+        entry[1] -= 1
+        if entry[1] == 0:
+            del _team_slots[key]
+
 
 @tool
-def lc_sql_engine(
-    query: str        
+async def lc_sql_engine(
+    query: str,
+    runtime: ToolRuntime,
 ) -> str:
     """
         Allows you to perform SQL queries on the given tables.
-        Returns a string representation of the result.
+        Returns the result as CSV (a header row, then at most 100 rows by
+        default, long values cut short) and a summary line with the number of
+        rows (an estimate when not all were fetched). Use aggregates or filters
+        rather than fetching many rows.
+        Send one statement per call; independent queries can be issued as
+        parallel tool calls. Queries that
+        are too expensive are rejected with a JSON reason; narrow them rather
+        than retrying.
         
         Args:
             query: The query to perform. This should be correct SQL.
     """
+    team_id = (runtime.context or {}).get("teamId") if runtime is not None else None
     try:
-        output = ""
-        with engine.begin() as con:
-            result = con.execute(text(query))
-            
-            # SELECT queries 
-            if result.returns_rows:
-                for row in result:
-                    output += "\n" + str(row)
-                return output if output.strip() else "[No results found]"
-            # INSERT, UPDATE, DELETE
-            elif result.rowcount > 0:
-                return f"[Query executed successfully. Rows affected {result.rowcount}]"
-            # ALTER/DROP/CREATE - result.rowcount = 0 or -1
-            else: 
-                return f"[Query executed successfully]"
-        # Return explicit message if no results to prevent message reconstruction issues
-        return output if output.strip() else "[No results found]"
+        async with _team_slot(team_id):
+            return await run_sql(query, team_id)
     except Exception as e:
         # Return error message instead of raising to prevent checkpoint pollution
         error_msg = f"[SQL Error: {str(e)}]"
         print(f"SQL execution error: {e}")
         return error_msg
-
-
-
-
-
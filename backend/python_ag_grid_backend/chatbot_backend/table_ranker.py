@@ -0,0 +1,162 @@
+"""
+Relevance-pruned table descriptions for the assistant's system prompt.
+
+A team with dozens of imported tables would otherwise put every column of
+every table into every model call. SchemaCatalog keeps one description block
+per table and a BM25 index over table and column names. describe() sends
+the top-k tables for the current conversation in full and only the names of
+the rest. The query is built from the latest user messages and the SQL of
+recent tool calls. Everything is local and offline; nothing is embedded or
+sent anywhere.
+"""
+import math
+import os
+import re
+from collections import Counter
+
+SCHEMA_CONTEXT_TOP_K = int(os.getenv("SCHEMA_CONTEXT_TOP_K", "8"))
+# Tables listed by name after the top-k; beyond this only the count is given
+SCHEMA_CONTEXT_MAX_INDEX = int(os.getenv("SCHEMA_CONTEXT_MAX_INDEX", "200"))
+SCHEMA_CONTEXT_RECENT_MESSAGES = int(os.getenv("SCHEMA_CONTEXT_RECENT_MESSAGES", "6"))
+
+# A table's own name says more about it than any one of its columns
+_TABLE_NAME_WEIGHT = 3
+_BM25_K1 = 1.2
+_BM25_B = 0.75
+
+_CAMEL_RE = re.compile(r"([a-z0-9])([A-Z])")
+_WORD_RE = re.compile(r"[a-z]+|[0-9]+")
+_IDENTIFIER_RE = re.compile(r"[a-z0-9_]+")
+
+
+def _stem(token: str) -> str:
+    # Enough to match "players" with "player" and "stories" with "story"
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase word tokens; identifiers are split on '_', '.' and camelCase."""
+    return [_stem(t) for t in _WORD_RE.findall(_CAMEL_RE.sub(r"\1 \2", text).lower())]
+
+
+def _message_text(message) -> str:
+    content = getattr(message, "content", "")
+    if isinstance(content, list):
+        content = " ".join(
+            part.get("text", "") if isinstance(part, dict) else str(part) for part in content
+        )
+    return content if isinstance(content, str) else ""
+
+
+def relevance_query(messages, recent: int = SCHEMA_CONTEXT_RECENT_MESSAGES) -> str:
+    """
+    Text describing what the conversation is about right now: the last
+    `recent` user messages and the SQL of the assistant's tool calls among them.
+    """
+    parts = []
+    for message in list(messages)[-recent:]:
+        kind = getattr(message, "type", None)
+        if kind == "human":
+            parts.append(_message_text(message))
+        elif kind == "ai":
+            for call in getattr(message, "tool_calls", None) or []:
+                query = (call.get("args") or {}).get("query")
+                if isinstance(query, str):
+                    parts.append(query)
+    return "\n".join(parts)
+
+
+class SchemaCatalog:
+    """Description blocks of one schema's tables plus a BM25 index over their names."""
+
+    def __init__(self, schema_name: str, tables_metadata: list):
+        self.schema_name = schema_name
+        # Sorted so the rendered text is byte-identical for the same tables
+        self.tables = sorted(tables_metadata, key=lambda t: t["key"])
+        self._blocks = {t["key"]: self._render_table(t) for t in self.tables}
+        self.description = self._render(self._blocks.values())
+
+        self._term_freqs = {}
+        for t in self.tables:
+            tokens = tokenize(t["key"]) * _TABLE_NAME_WEIGHT
+            for col in t["columnsDef"]:
+                tokens += tokenize(col["field"])
+            self._term_freqs[t["key"]] = (Counter(tokens), len(tokens))
+        doc_freqs = Counter(term for freqs, _ in self._term_freqs.values() for term in freqs)
+        n = len(self.tables)
+        self._idf = {
+            term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in doc_freqs.items()
+        }
+        self._avg_len = sum(length for _, length in self._term_freqs.values()) / n if n else 0
+
+    @staticmethod
+    def _render_table(table) -> str:
+        block = f"- {table['key']} ({table['columns']} columns, {table['rows']} rows)\n"
+        for col in sorted(table["columnsDef"], key=lambda c: c["field"]):
+            block += f"  • {col['field']}: {col['type']}\n"
+        return block
+
+    def _render(self, blocks) -> str:
+        return f"Available tables in schema '{self.schema_name}':\n\n" + "".join(blocks)
+
+    def scores(self, query: str) -> dict:
+        """BM25 score of every table with at least one query term."""
+        terms = Counter(tokenize(query))
+        result = {}
+        for name, (freqs, length) in self._term_freqs.items():
+            score = 0.0
+            for term, query_count in terms.items():
+                tf = freqs.get(term)
+                if not tf:
+                    continue
+                norm = _BM25_K1 * (1 - _BM25_B + _BM25_B * length / self._avg_len)
+                score += query_count * self._idf[term] * tf * (_BM25_K1 + 1) / (tf + norm)
+            if score > 0:
+                result[name] = score
+        return result
+
+    def top_tables(self, query: str, k: int = SCHEMA_CONTEXT_TOP_K) -> list[str]:
+        """
+        The k tables most relevant to `query`. Tables named verbatim (e.g. in
+        recent SQL) come first, then by score; when fewer than k match, the
+        largest remaining tables fill the slots.
+        """
+        scores = self.scores(query)
+        identifiers = set(_IDENTIFIER_RE.findall(query.lower()))
+        ranked = sorted(
+            scores,
+            key=lambda name: (name.lower() not in identifiers, -scores[name], name),
+        )[:k]
+        if len(ranked) < k:
+            chosen = set(ranked)
+            by_size = sorted(
+                (t for t in self.tables if t["key"] not in chosen),
+                key=lambda t: (-(t["rows"] or 0), t["key"]),
+            )
+            ranked += [t["key"] for t in by_size[: k - len(ranked)]]
+        return ranked
+
+    def describe(self, query: str, k: int = SCHEMA_CONTEXT_TOP_K) -> str:
+        """
+        The full description when the schema has at most k tables; otherwise
+        the top-k tables in full followed by a name-only index of the others.
+        """
+        if len(self.tables) <= k:
+            return self.description
+        chosen = set(self.top_tables(query, k))
+        text = self._render(block for name, block in self._blocks.items() if name in chosen)
+
+        others = [t["key"] for t in self.tables if t["key"] not in chosen]
+        listed = others[:SCHEMA_CONTEXT_MAX_INDEX]
+        text += (
+            f"\nOther tables in this schema ({len(others)}, names only; to see the columns "
+            f"of one, run SELECT * FROM {self.schema_name}.<table> LIMIT 1):\n"
+            + ", ".join(listed)
+        )
+        if len(others) > len(listed):
+            text += f", ... and {len(others) - len(listed)} more"
+        return text + "\n"
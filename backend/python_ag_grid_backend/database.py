@@ -1,9 +1,22 @@
 # database.py
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
 from typing import Optional
 from dotenv import load_dotenv
 import psycopg2
+from psycopg2 import extensions
 from psycopg2.extras import RealDictCursor
+from psycopg2.pool import PoolError
+from psycopg import pq
+from psycopg.conninfo import make_conninfo
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool, PoolTimeout
 from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+from python_ag_grid_backend.cache import LRUCache
 import os
 
 load_dotenv()
@@ -13,87 +26,481 @@ db_user = os.getenv("DB_USER")
 db_password = os.getenv("DB_PASSWORD")
 db_port = os.getenv("DB_PORT")
 
+# Pool sizing / health-check configuration
+db_pool_min = int(os.getenv("DB_POOL_MIN", "1"))
+db_pool_max = int(os.getenv("DB_POOL_MAX", "10"))
+db_pool_timeout = float(os.getenv("DB_POOL_TIMEOUT", "10"))  # seconds to wait for a free connection
+db_pool_check_idle = float(os.getenv("DB_POOL_CHECK_IDLE", "30"))  # ping connections idle longer than this
+# Async (psycopg 3) pool used by the async handlers; sized separately from the sync pool
+db_async_pool_min = int(os.getenv("DB_ASYNC_POOL_MIN", str(db_pool_min)))
+db_async_pool_max = int(os.getenv("DB_ASYNC_POOL_MAX", str(db_pool_max)))
+
+
+class ConnectionPool:
+    """
+    Thread-safe psycopg2 connection pool.
+
+    Keeps up to `maxconn` connections open, makes callers wait up to `timeout`
+    seconds when all of them are busy, and pings connections that sat idle for
+    longer than `check_idle` seconds before handing them out again.
+    """
+
+    def __init__(self, minconn: int, maxconn: int, timeout: float, check_idle: float, **conn_kwargs):
+        if minconn < 0 or maxconn < 1 or minconn > maxconn:
+            raise ValueError("Invalid pool size (need 0 <= DB_POOL_MIN <= DB_POOL_MAX, DB_POOL_MAX >= 1)")
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.check_idle = check_idle
+        self._conn_kwargs = conn_kwargs
+        self._idle = deque()  # (conn, last_used) pairs, most recently used on the right
+        self._size = 0
+        self._in_use = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._stats = {
+            "checkouts": 0,
+            "connects": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "health_check_failures": 0,
+            "max_in_use": 0,
+            "wait_time_total": 0.0,
+        }
+        for _ in range(minconn):
+            self._idle.append((self._connect(), time.monotonic()))
+            self._size += 1
+
+    def _connect(self):
+        conn = psycopg2.connect(**self._conn_kwargs)
+        with self._cond:
+            self._stats["connects"] += 1
+        return conn
+
+    def _is_healthy(self, conn, last_used: float) -> bool:
+        if conn.closed:
+            return False
+        if time.monotonic() - last_used < self.check_idle:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def getconn(self):
+        started = time.monotonic()
+        deadline = started + self.timeout
+        waited = False
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolError("connection pool is closed")
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    break
+                if self._size < self.maxconn:
+                    # Reserve a slot; the actual connect happens outside the lock
+                    self._size += 1
+                    conn, last_used = None, None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolError(
+                        f"connection pool exhausted ({self.maxconn} connections in use)"
+                    )
+                if not waited:
+                    self._stats["waits"] += 1
+                    waited = True
+                self._cond.wait(remaining)
+
+        try:
+            if conn is None:
+                conn = self._connect()
+            elif not self._is_healthy(conn, last_used):
+                with self._cond:
+                    self._stats["health_check_failures"] += 1
+                if not conn.closed:
+                    conn.close()
+                conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self._in_use += 1
+            self._stats["checkouts"] += 1
+            self._stats["wait_time_total"] += time.monotonic() - started
+            self._stats["max_in_use"] = max(self._stats["max_in_use"], self._in_use)
+        return conn
+
+    def putconn(self, conn):
+        # Never hand out a connection with an open (or broken) transaction
+        if not conn.closed:
+            status = conn.info.transaction_status
+            if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                conn.close()
+            elif status != extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    conn.close()
+        with self._cond:
+            self._in_use -= 1
+            if conn.closed or self._closed:
+                if not conn.closed:
+                    conn.close()
+                self._size -= 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.pop()
+                conn.close()
+                self._size -= 1
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        with self._cond:
+            checkouts = self._stats["checkouts"]
+            return {
+                "min_size": self.minconn,
+                "max_size": self.maxconn,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "max_in_use": self._stats["max_in_use"],
+                "checkouts": checkouts,
+                "connects": self._stats["connects"],
+                "waits": self._stats["waits"],
+                "timeouts": self._stats["timeouts"],
+                "health_check_failures": self._stats["health_check_failures"],
+                "avg_wait_ms": round(self._stats["wait_time_total"] / checkouts * 1000, 3) if checkouts else 0.0,
+            }
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """Return the process-wide pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    db_pool_min,
+                    db_pool_max,
+                    db_pool_timeout,
+                    db_pool_check_idle,
+                    host=db_host,
+                    user=db_user,
+                    password=db_password,
+                    port=db_port,
+                    cursor_factory=RealDictCursor,
+                )
+    return _pool
+
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+def get_pool_stats() -> dict:
+    return get_pool().stats()
+
+
+class _RequestConnection:
+    """A pooled connection borrowed lazily and shared by every helper in one request."""
+
+    __slots__ = ("conn", "released")
+
+    def __init__(self):
+        self.conn = None
+        self.released = False
+
+    def release(self):
+        self.released = True
+        if self.conn is not None:
+            conn, self.conn = self.conn, None
+            get_pool().putconn(conn)
+
+
+_request_connection: ContextVar[Optional[_RequestConnection]] = ContextVar(
+    "request_connection", default=None
+)
+
+
+@contextmanager
+def connection_scope():
+    """Make every get_connection() inside the block share one pooled connection."""
+    scope = _RequestConnection()
+    token = _request_connection.set(scope)
+    try:
+        yield scope
+    finally:
+        _request_connection.reset(token)
+        scope.release()
+
+
+@contextmanager
 def get_connection():
-    return psycopg2.connect(
-        host=db_host,
-        user=db_user,
-        password=db_password,
-        port=db_port,
-        cursor_factory=RealDictCursor
-    )
-     
-def init_db():
-    """Initialize the users, teams, and users_teams tables if they do not exist."""
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    # Create users table
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            username TEXT PRIMARY KEY,
-            hashed_password TEXT NOT NULL,
-            full_name TEXT
-        )
-    """)
-    
-    # Create teams table
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS teams (
-            team_id UUID PRIMARY KEY,
-            team_name TEXT NOT NULL,
-            sport_type TEXT NOT NULL,
-            schema_name TEXT NOT NULL UNIQUE,
-            creation_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            description TEXT
+    """
+    Borrow a pooled connection.
+
+    Inside a connection_scope() (i.e. during an HTTP request) all callers share
+    the scope's connection; otherwise the connection goes back to the pool when
+    the block exits. Uncommitted work is rolled back if the block raises.
+    """
+    scope = _request_connection.get()
+    if scope is not None and not scope.released:
+        if scope.conn is None:
+            scope.conn = get_pool().getconn()
+        try:
+            yield scope.conn
+        except Exception:
+            if not scope.conn.closed:
+                scope.conn.rollback()
+            raise
+        return
+
+    pool = get_pool()
+    conn = pool.getconn()
+    try:
+        yield conn
+    except Exception:
+        if not conn.closed:
+            conn.rollback()
+        raise
+    finally:
+        pool.putconn(conn)
+
+
+_async_pool: Optional[AsyncConnectionPool] = None
+
+
+async def open_async_pool() -> AsyncConnectionPool:
+    """Open the process-wide async pool (called from the app's lifespan)."""
+    global _async_pool
+    if _async_pool is None:
+        conninfo = make_conninfo(
+            **{
+                key: value
+                for key, value in (
+                    ("host", db_host),
+                    ("user", db_user),
+                    ("password", db_password),
+                    ("port", db_port),
+                )
+                if value
+            }
         )
-    """)
-    
-    # Create users_teams junction table
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS users_teams (
-            user_id TEXT NOT NULL,
-            team_id UUID NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            PRIMARY KEY (user_id, team_id),
-            FOREIGN KEY (user_id) REFERENCES users(username) ON DELETE CASCADE,
-            FOREIGN KEY (team_id) REFERENCES teams(team_id) ON DELETE CASCADE
+        pool = AsyncConnectionPool(
+            conninfo,
+            min_size=db_async_pool_min,
+            max_size=db_async_pool_max,
+            timeout=db_pool_timeout,
+            kwargs={"row_factory": dict_row},
+            check=AsyncConnectionPool.check_connection,
+            open=False,
         )
-    """)
-    
-    conn.commit()
-    cur.close()
-    conn.close()
+        await pool.open()
+        _async_pool = pool
+    return _async_pool
+
+
+async def close_async_pool():
+    global _async_pool
+    if _async_pool is not None:
+        pool, _async_pool = _async_pool, None
+        await pool.close()
+
+
+def get_async_pool_stats() -> dict:
+    return _async_pool.get_stats() if _async_pool is not None else {}
+
+
+@asynccontextmanager
+async def get_async_connection():
+    """
+    Borrow a connection from the async pool (rows come back as dicts).
+
+    Each call gets its own connection, so independent queries of one request
+    can run concurrently with asyncio.gather. Like the sync version, the
+    caller commits; anything left uncommitted is rolled back when the
+    connection goes back to the pool.
+    """
+    pool = _async_pool or await open_async_pool()
+    try:
+        async with pool.connection() as conn:
+            yield conn
+            # The pool would commit an open transaction on exit; match the sync pool and roll back
+            if conn.info.transaction_status != pq.TransactionStatus.IDLE:
+                await conn.rollback()
+    except PoolTimeout as e:
+        raise PoolError(str(e))
+
+
+class RequestConnectionMiddleware:
+    """
+    ASGI middleware giving each HTTP request at most one pooled connection.
+
+    The connection is returned as soon as the response starts, so streaming
+    bodies never pin it; anything that reads the database while streaming
+    borrows its own connection.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with connection_scope() as conn_scope:
+            async def send_with_release(message):
+                if message["type"] == "http.response.start" and not conn_scope.released:
+                    await _release_off_loop(conn_scope)
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_release)
+            finally:
+                # Failed before the response started: connection_scope would
+                # otherwise roll back and return the connection on the event loop
+                if not conn_scope.released:
+                    await _release_off_loop(conn_scope)
+
+
+async def _release_off_loop(conn_scope: _RequestConnection):
+    if conn_scope.conn is None:
+        # Nothing borrowed (e.g. an async endpoint): no need to wait for a worker thread
+        conn_scope.released = True
+    else:
+        await run_in_threadpool(conn_scope.release)
+
+
+def init_db():
+    """Initialize the users, teams, and users_teams tables if they do not exist."""
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            # Create users table
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS users (
+                    username TEXT PRIMARY KEY,
+                    hashed_password TEXT NOT NULL,
+                    full_name TEXT
+                )
+            """)
+
+            # Create teams table
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS teams (
+                    team_id UUID PRIMARY KEY,
+                    team_name TEXT NOT NULL,
+                    sport_type TEXT NOT NULL,
+                    schema_name TEXT NOT NULL UNIQUE,
+                    creation_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    description TEXT
+                )
+            """)
+
+            # Create users_teams junction table
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS users_teams (
+                    user_id TEXT NOT NULL,
+                    team_id UUID NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (user_id, team_id),
+                    FOREIGN KEY (user_id) REFERENCES users(username) ON DELETE CASCADE,
+                    FOREIGN KEY (team_id) REFERENCES teams(team_id) ON DELETE CASCADE
+                )
+            """)
+
+            # Per-team limits on assistant-generated SQL; NULL means the SQL_TOOL_* default
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS assistant_query_limits (
+                    team_id UUID PRIMARY KEY REFERENCES teams(team_id) ON DELETE CASCADE,
+                    max_cost DOUBLE PRECISION,
+                    max_rows BIGINT,
+                    statement_timeout_ms INTEGER
+                )
+            """)
+
+        conn.commit()
 
 
 def get_user(username: str) -> Optional[dict]:
     """Fetch a user by username."""
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(
-        "SELECT username, hashed_password, full_name FROM users WHERE username = %s",
-        (username,)
-    )
-    row = cur.fetchone()   # With RealDictCursor → already a dict
-    cur.close()
-    conn.close()
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT username, hashed_password, full_name FROM users WHERE username = %s",
+                (username,)
+            )
+            row = cur.fetchone()   # With RealDictCursor → already a dict
     return row   # row is None or a dict like {"username": ..., "hashed_password": ..., "full_name": ...}
 
 
+# username -> {"username", "full_name"} for authenticated requests. Password
+# hashes are never cached; login always reads the row through get_user().
+_user_profiles = LRUCache(
+    maxsize=int(os.getenv("USER_CACHE_SIZE", "4096")),
+    ttl=float(os.getenv("USER_CACHE_TTL", "60")),
+)
+
+
+async def get_user_profile(username: str) -> Optional[dict]:
+    """Username and full name of a user (cached; None if there is no such user)."""
+    profile = _user_profiles.get(username)
+    if profile is not None:
+        return profile
+    async with get_async_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute("SELECT username, full_name FROM users WHERE username = %s", (username,))
+            profile = await cur.fetchone()
+    # Don't cache misses: the user may register a moment later
+    if profile is not None:
+        _user_profiles.set(username, profile)
+    return profile
+
+
+def invalidate_user(username: str):
+    _user_profiles.pop(username)
+
+
+def get_user_cache_stats() -> dict:
+    return _user_profiles.stats()
+
+
 def create_user(username: str, hashed_password: str, full_name: str = ""):
     """Insert a new user into the users table."""
-    conn = get_connection()
-    cur = conn.cursor()
-    try:
-        cur.execute(
-            "INSERT INTO users (username, hashed_password, full_name) VALUES (%s, %s, %s)",
-            (username, hashed_password, full_name)
-        )
-        conn.commit()
-    except Exception as e:
-        conn.rollback()
-        if getattr(e, 'pgcode', None) == '23505':  # unique_violation in Postgres
-            raise HTTPException(status_code=409, detail="Username already taken")
-        raise
-    finally:
-        cur.close()
-        conn.close()
\ No newline at end of file
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            try:
+                cur.execute(
+                    "INSERT INTO users (username, hashed_password, full_name) VALUES (%s, %s, %s)",
+                    (username, hashed_password, full_name)
+                )
+                conn.commit()
+                invalidate_user(username)
+            except Exception as e:
+                conn.rollback()
+                if getattr(e, 'pgcode', None) == '23505':  # unique_violation in Postgres
+                    raise HTTPException(status_code=409, detail="Username already taken")
+                raise
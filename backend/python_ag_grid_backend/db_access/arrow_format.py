@@ -0,0 +1,194 @@
+"""
+Apache Arrow IPC and Parquet encoding for table data.
+
+Rows come straight from a psycopg2 cursor (tuples or dicts) and are turned
+into column arrays per batch. Low-cardinality text columns (team names,
+positions, ...) are dictionary-encoded. NUMERIC stays exact: decimal128/256
+with the column's precision and scale, or a string tagged as numeric when the
+column has no (representable) precision.
+"""
+import io
+import json
+from decimal import Decimal
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+
+# A text column is dictionary-encoded when at most this share of its values are distinct
+DICTIONARY_MAX_DISTINCT_RATIO = 0.5
+
+# Postgres type OID -> Arrow type (anything else is sent as a string)
+_PG_ARROW_TYPES = {
+    16: pa.bool_(),  # boolean
+    20: pa.int64(),  # bigint
+    21: pa.int16(),  # smallint
+    23: pa.int32(),  # integer
+    26: pa.int64(),  # oid
+    700: pa.float32(),  # real
+    701: pa.float64(),  # double precision
+    1082: pa.date32(),  # date
+    1083: pa.time64("us"),  # time
+    1114: pa.timestamp("us"),  # timestamp
+    1184: pa.timestamp("us", tz="UTC"),  # timestamptz
+    1186: pa.duration("us"),  # interval
+    17: pa.binary(),  # bytea
+}
+_JSON_OIDS = {114, 3802}  # json, jsonb
+_NUMERIC_OID = 1700
+# Field metadata of NUMERIC columns sent as strings, so an import can restore the type
+NUMERIC_FIELD_METADATA = {b"pg_type": b"numeric"}
+
+
+def wants_arrow(accept_header: str | None) -> bool:
+    return ARROW_STREAM_MEDIA_TYPE in (accept_header or "")
+
+
+def numeric_arrow_type(precision, scale) -> pa.DataType:
+    """
+    decimal128/256 for NUMERIC(precision, scale); pa.string() when the column
+    is unconstrained (psycopg2 reports 65535, psycopg None) or out of Arrow's
+    range (precision > 76, negative scale).
+    """
+    if precision is None or scale is None or not 0 < precision <= 76 or not 0 <= scale <= precision:
+        return pa.string()
+    if precision > 38:
+        return pa.decimal256(precision, scale)
+    return pa.decimal128(precision, scale)
+
+
+def _arrow_type(col) -> pa.DataType:
+    if col.type_code == _NUMERIC_OID:
+        return numeric_arrow_type(col.precision, col.scale)
+    return _PG_ARROW_TYPES.get(col.type_code, pa.string())
+
+
+def _convert_values(values, type_code, arrow_type):
+    if type_code in _JSON_OIDS:
+        return [json.dumps(v) if v is not None else None for v in values]
+    if pa.types.is_decimal(arrow_type):
+        # NaN and ±Infinity have no decimal representation
+        return [v if isinstance(v, Decimal) and v.is_finite() else None for v in values]
+    if arrow_type == pa.string():
+        return [str(v) if v is not None and not isinstance(v, str) else v for v in values]
+    return values
+
+
+def _columns(description, rows):
+    if not rows:
+        return [[] for _ in description]
+    if isinstance(rows[0], dict):
+        return [[row[col.name] for row in rows] for col in description]
+    return [list(col) for col in zip(*rows)]
+
+
+def _use_dictionary(values) -> bool:
+    non_null = [v for v in values if v is not None]
+    return bool(non_null) and len(set(non_null)) <= len(non_null) * DICTIONARY_MAX_DISTINCT_RATIO
+
+
+def build_schema(description, first_rows) -> pa.Schema:
+    """Arrow schema for a result, deciding dictionary encoding from the first batch."""
+    fields = []
+    for col, values in zip(description, _columns(description, first_rows)):
+        arrow_type = _arrow_type(col)
+        if col.type_code == _NUMERIC_OID and arrow_type == pa.string():
+            fields.append(pa.field(col.name, arrow_type, metadata=NUMERIC_FIELD_METADATA))
+            continue
+        if arrow_type == pa.string() and _use_dictionary(_convert_values(values, col.type_code, arrow_type)):
+            arrow_type = pa.dictionary(pa.int32(), pa.string())
+        fields.append(pa.field(col.name, arrow_type))
+    return pa.schema(fields)
+
+
+def record_batch(schema: pa.Schema, description, rows) -> pa.RecordBatch:
+    arrays = []
+    for field, col, values in zip(schema, description, _columns(description, rows)):
+        value_type = field.type.value_type if pa.types.is_dictionary(field.type) else field.type
+        values = _convert_values(values, col.type_code, value_type)
+        if pa.types.is_dictionary(field.type):
+            arrays.append(pa.array(values, type=pa.string()).dictionary_encode())
+        else:
+            arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def arrow_stream(description, batches):
+    """
+    Encode an iterable of row batches as an Arrow IPC stream, yielding the
+    bytes produced for each batch so they can be sent as they are written.
+    """
+    sink = io.BytesIO()
+    writer = None
+    for rows in batches:
+        if writer is None:
+            schema = build_schema(description, rows)
+            writer = pa.ipc.new_stream(sink, schema)
+        if rows:
+            writer.write_batch(record_batch(schema, description, rows))
+        yield _drain(sink)
+    if writer is None:
+        writer = pa.ipc.new_stream(sink, build_schema(description, []))
+    writer.close()
+    yield _drain(sink)
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Write-only sink that hands out what has been written so far. Unlike a
+    truncated BytesIO it keeps counting positions, which the Parquet footer's
+    offsets depend on.
+    """
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+def parquet_stream(description, batches, compression="snappy"):
+    """
+    Encode an iterable of row batches as a Parquet file, one row group per
+    batch, yielding the bytes of each row group as soon as it is written.
+    """
+    sink = _ChunkSink()
+    writer = None
+    schema = None
+    for rows in batches:
+        if writer is None:
+            schema = build_schema(description, rows)
+            writer = pq.ParquetWriter(sink, schema, compression=compression)
+        if rows:
+            writer.write_batch(record_batch(schema, description, rows))
+        yield sink.drain()
+    if writer is None:
+        writer = pq.ParquetWriter(sink, build_schema(description, []), compression=compression)
+    writer.close()
+    yield sink.drain()
+
+
+def arrow_bytes(description, rows) -> bytes:
+    return b"".join(arrow_stream(description, [rows]))
+
+
+def _drain(sink: io.BytesIO) -> bytes:
+    data = sink.getvalue()
+    sink.seek(0)
+    sink.truncate()
+    return data
@@ -0,0 +1,129 @@
+"""
+Async versions of the table reads and single-row writes in tables_operations.
+
+They run on the psycopg 3 async pool, so a handler awaiting the database
+holds no worker thread. The SQL and result shaping are shared with the sync
+module (and so is the primary-key cache); only the I/O differs.
+"""
+import asyncio
+from psycopg.rows import tuple_row
+from python_ag_grid_backend.database import get_async_connection
+from python_ag_grid_backend.db_access.tables_operations import (
+    ALL_TABLES_SQL,
+    PRIMARY_KEY_SQL,
+    SCHEMA_TABLES_SQL,
+    TABLE_COLUMNS_SQL,
+    build_rows_query,
+    bump_schema_version,
+    cache_primary_key_columns,
+    cached_primary_key_columns,
+    delete_row_query,
+    exact_counts_query,
+    insert_row_query,
+    rows_block,
+    select_all_sql,
+    tables_metadata,
+    update_row_query,
+)
+
+
+async def _fetchall(sql, params=None, row_factory=None):
+    async with get_async_connection() as conn:
+        async with conn.cursor(row_factory=row_factory) as cur:
+            await cur.execute(sql, params)
+            return await cur.fetchall(), cur.description
+
+
+async def get_table_columns(table_name, schema_name="public"):
+    """Return {column_name: data_type} for a table, in column order."""
+    rows, _ = await _fetchall(TABLE_COLUMNS_SQL, (schema_name, table_name))
+    return {row["column_name"]: row["data_type"] for row in rows}
+
+
+async def get_primary_key_columns(table_name, schema_name="public") -> tuple:
+    """Primary-key columns of a table in key order (cached; empty if there is none)."""
+    cached = cached_primary_key_columns(table_name, schema_name)
+    if cached is not None:
+        return cached
+    rows, _ = await _fetchall(PRIMARY_KEY_SQL, (table_name, schema_name))
+    key_fields = tuple(row["attname"] for row in rows)
+    cache_primary_key_columns(table_name, schema_name, key_fields)
+    return key_fields
+
+
+async def get_table_data(table_name, schema_name="public"):
+    rows, description = await _fetchall(select_all_sql(table_name, schema_name))
+    return {"columns": [desc.name for desc in description], "rows": rows}
+
+
+async def get_table_rows(
+    table_name,
+    start_row=0,
+    end_row=100,
+    sort_model=None,
+    filter_model=None,
+    cursor=None,
+    schema_name="public",
+    tuples=False,
+):
+    """Same as tables_operations.get_table_rows; the column and key lookups run concurrently."""
+    columns, key_fields = await asyncio.gather(
+        get_table_columns(table_name, schema_name),
+        get_primary_key_columns(table_name, schema_name),
+    )
+    query = build_rows_query(
+        table_name, columns, key_fields, start_row, end_row, sort_model, filter_model, cursor, schema_name
+    )
+    rows, description = await _fetchall(
+        query["sql"], query["params"], row_factory=tuple_row if tuples else None
+    )
+    return rows_block(query, rows, description, tuples)
+
+
+async def get_all_tables_metadata(schema_name="public", exact_counts=False):
+    """Tables, columns and row counts of a schema (see tables_operations.get_all_tables_metadata)."""
+    tables, _ = await _fetchall(SCHEMA_TABLES_SQL, (schema_name,))
+    counts = {}
+    if exact_counts and tables:
+        rows, _ = await _fetchall(*exact_counts_query([(schema_name, t["table_name"]) for t in tables]))
+        counts = {row["table"]: row["count"] for row in rows}
+    return tables_metadata(tables, counts, exact_counts)
+
+
+async def list_all_tables(exact_counts=False):
+    """Every user table across all non-system schemas with (estimated) row counts."""
+    result, _ = await _fetchall(ALL_TABLES_SQL)
+    if exact_counts and result:
+        rows, _ = await _fetchall(*exact_counts_query([(t["schema"], t["table"]) for t in result]))
+        counts = {(row["schema"], row["table"]): row["count"] for row in rows}
+        for t in result:
+            t["rows"] = counts[(t["schema"], t["table"])]
+    return result
+
+
+async def _execute_and_commit(sql, params, returning=True):
+    async with get_async_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(sql, params)
+            row = await cur.fetchone() if returning else None
+        await conn.commit()
+        return row
+
+
+async def add_table_row(table_name, row, schema_name="public"):
+    new_row = await _execute_and_commit(*insert_row_query(table_name, row, schema_name))
+    bump_schema_version(schema_name)
+    return new_row
+
+
+async def update_table_row(table_name, row, schema_name="public"):
+    key_fields = await get_primary_key_columns(table_name, schema_name)
+    updated = await _execute_and_commit(*update_row_query(table_name, row, key_fields, schema_name))
+    bump_schema_version(schema_name)
+    return updated
+
+
+async def delete_table_row(table_name, row, schema_name="public"):
+    await _execute_and_commit(*delete_row_query(table_name, row, schema_name), returning=False)
+    bump_schema_version(schema_name)
+    return {"success": True}
@@ -0,0 +1,185 @@
+"""
+Translate AG Grid server-side / infinite row model requests into SQL.
+
+Column names coming from the grid are only ever used after being checked
+against the table's real columns; all values are passed as query parameters.
+"""
+
+
+def quote_ident(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _check_column(col_id, columns):
+    if col_id not in columns:
+        raise ValueError(f"Unknown column '{col_id}'.")
+    return quote_ident(col_id)
+
+
+def _escape_like(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _text_condition(col, f):
+    kind = f.get("type", "contains")
+    value = f.get("filter")
+    text_col = f"{col}::text"
+    if kind == "blank":
+        return f"({col} IS NULL OR {text_col} = '')", []
+    if kind == "notBlank":
+        return f"({col} IS NOT NULL AND {text_col} <> '')", []
+    if value is None:
+        raise ValueError(f"Text filter '{kind}' needs a value.")
+    if kind == "equals":
+        return f"lower({text_col}) = lower(%s)", [value]
+    if kind == "notEqual":
+        return f"({col} IS NULL OR lower({text_col}) <> lower(%s))", [value]
+    if kind == "contains":
+        return f"{text_col} ILIKE %s", [f"%{_escape_like(value)}%"]
+    if kind == "notContains":
+        return f"({col} IS NULL OR {text_col} NOT ILIKE %s)", [f"%{_escape_like(value)}%"]
+    if kind == "startsWith":
+        return f"{text_col} ILIKE %s", [f"{_escape_like(value)}%"]
+    if kind == "endsWith":
+        return f"{text_col} ILIKE %s", [f"%{_escape_like(value)}"]
+    raise ValueError(f"Unsupported text filter '{kind}'.")
+
+
+_COMPARISONS = {
+    "equals": "=",
+    "lessThan": "<",
+    "lessThanOrEqual": "<=",
+    "greaterThan": ">",
+    "greaterThanOrEqual": ">=",
+}
+
+
+def _range_condition(col, f, low_key, high_key, cast=""):
+    kind = f.get("type", "equals")
+    if kind == "blank":
+        return f"{col} IS NULL", []
+    if kind == "notBlank":
+        return f"{col} IS NOT NULL", []
+    target = f"{col}{cast}"
+    param = f"%s{cast}"
+    value = f.get(low_key)
+    if value is None:
+        raise ValueError(f"Filter '{kind}' needs a value.")
+    if kind in _COMPARISONS:
+        return f"{target} {_COMPARISONS[kind]} {param}", [value]
+    if kind == "notEqual":
+        return f"({col} IS NULL OR {target} <> {param})", [value]
+    if kind == "inRange":
+        high = f.get(high_key)
+        if high is None:
+            raise ValueError("Filter 'inRange' needs an upper bound.")
+        return f"({target} > {param} AND {target} < {param})", [value, high]
+    raise ValueError(f"Unsupported filter '{kind}'.")
+
+
+def _set_condition(col, f):
+    values = f.get("values") or []
+    non_null = [str(v) for v in values if v is not None]
+    parts, params = [], []
+    if non_null:
+        parts.append(f"{col}::text = ANY(%s)")
+        params.append(non_null)
+    if len(non_null) != len(values):
+        parts.append(f"{col} IS NULL")
+    if not parts:
+        return "FALSE", []
+    return "(" + " OR ".join(parts) + ")", params
+
+
+def _condition(col, f):
+    filter_type = f.get("filterType", "text")
+    if filter_type == "text":
+        return _text_condition(col, f)
+    if filter_type == "number":
+        return _range_condition(col, f, "filter", "filterTo")
+    if filter_type == "date":
+        return _range_condition(col, f, "dateFrom", "dateTo", cast="::date")
+    if filter_type == "set":
+        return _set_condition(col, f)
+    raise ValueError(f"Unsupported filter type '{filter_type}'.")
+
+
+def _column_filter(col, f):
+    # Combined conditions: {"operator": "AND", "conditions": [...]} or the older condition1/condition2 shape
+    if "conditions" in f or "condition1" in f:
+        conditions = f.get("conditions") or [c for c in (f.get("condition1"), f.get("condition2")) if c]
+        operator = str(f.get("operator", "AND")).upper()
+        if operator not in ("AND", "OR"):
+            raise ValueError(f"Unsupported filter operator '{operator}'.")
+        parts, params = [], []
+        for sub in conditions:
+            sub = {"filterType": f.get("filterType"), **sub}
+            sql, sub_params = _condition(col, sub)
+            parts.append(sql)
+            params.extend(sub_params)
+        if not parts:
+            return "TRUE", []
+        return "(" + f" {operator} ".join(parts) + ")", params
+    return _condition(col, f)
+
+
+def build_filter_clause(filter_model, columns):
+    """
+    filter_model: AG Grid filterModel, e.g. {"team": {"filterType": "text", "type": "contains", "filter": "lak"}}
+    columns: {column_name: data_type} of the target table
+    Returns (sql, params) where sql is "" or a list of AND-ed conditions (without WHERE).
+    """
+    parts, params = [], []
+    for col_id, f in (filter_model or {}).items():
+        col = _check_column(col_id, columns)
+        sql, col_params = _column_filter(col, f)
+        parts.append(sql)
+        params.extend(col_params)
+    return " AND ".join(parts), params
+
+
+def normalize_sort_model(sort_model, columns, key_fields=()):
+    """
+    Validate the grid's sortModel and append the primary key as a tie-breaker so
+    paging is deterministic. Returns a list of (column, "ASC" | "DESC").
+    """
+    order = []
+    for item in sort_model or []:
+        col_id = item.get("colId")
+        _check_column(col_id, columns)
+        direction = str(item.get("sort", "asc")).upper()
+        if direction not in ("ASC", "DESC"):
+            raise ValueError(f"Unsupported sort direction '{item.get('sort')}'.")
+        order.append((col_id, direction))
+    sorted_cols = {col for col, _ in order}
+    default_direction = order[0][1] if order and order[0][0] in key_fields else "ASC"
+    for key in key_fields:
+        if key not in sorted_cols:
+            order.append((key, default_direction))
+    return order
+
+
+def build_order_clause(order):
+    if not order:
+        return ""
+    return ", ".join(f"{quote_ident(col)} {direction}" for col, direction in order)
+
+
+def keyset_direction(order, key_fields):
+    """
+    Return "ASC"/"DESC" when the ordering is exactly the primary key in a single
+    direction (so a row comparison on the key can replace OFFSET), else None.
+    """
+    if not key_fields or [col for col, _ in order] != list(key_fields):
+        return None
+    directions = {direction for _, direction in order}
+    return directions.pop() if len(directions) == 1 else None
+
+
+def build_keyset_condition(key_fields, direction, cursor):
+    if len(cursor) != len(key_fields):
+        raise ValueError("Cursor does not match the table's primary key.")
+    cols = ", ".join(quote_ident(k) for k in key_fields)
+    placeholders = ", ".join(["%s"] * len(key_fields))
+    op = ">" if direction == "ASC" else "<"
+    return f"({cols}) {op} ({placeholders})", list(cursor)
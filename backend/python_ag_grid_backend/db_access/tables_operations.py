@@ -1,10 +1,41 @@
+import itertools
+import os
+import queue
+import threading
+import time
+import uuid
+from psycopg2 import extensions
+from psycopg2.extras import RealDictCursor, execute_values
+from python_ag_grid_backend.cache import LRUCache
 from python_ag_grid_backend.database import get_connection
+from python_ag_grid_backend.db_access.row_model import (
+    build_filter_clause,
+    normalize_sort_model,
+    build_order_clause,
+    keyset_direction,
+    build_keyset_condition,
+    quote_ident,
+)
+
+# Primary-key columns per (schema, table). Keys only change on DDL, so entries
+# are dropped explicitly by create_table / delete_table / delete_schema; the TTL
+# only bounds staleness after DDL issued elsewhere (e.g. by the assistant).
+_primary_keys = LRUCache(
+    maxsize=int(os.getenv("TABLE_METADATA_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("TABLE_METADATA_CACHE_TTL", "300")),
+)
+
+# schema_name -> number of its latest change (DDL, import or row write), from
+# one process-wide counter. The None entry records changes in an unknown
+# schema (e.g. SQL run by the assistant) and counts for every schema.
+_schema_change_counter = itertools.count(1)
+_schema_versions = {}
 
 
 def get_table_data(table_name, schema_name="public"):
     with get_connection() as conn:
         with conn.cursor() as cur:
-            cur.execute(f'SELECT * FROM "{schema_name}"."{table_name}"')
+            cur.execute(select_all_sql(table_name, schema_name))
             rows = cur.fetchall()
             colnames = [desc[0] for desc in cur.description]
             return {
@@ -13,51 +44,402 @@ def get_table_data(table_name, schema_name="public"):
             }
 
 
+def select_all_sql(table_name, schema_name="public") -> str:
+    return f"SELECT * FROM {quote_ident(schema_name)}.{quote_ident(table_name)}"
+
+
+def iter_table_data(table_name, schema_name="public", batch_size=5000, tuples=False, query=None):
+    """
+    Stream a table in fixed-size batches through a named (server-side) cursor.
+
+    Yields the cursor description first, then lists of rows (dicts, or tuples
+    when `tuples` is set). Only one batch is held in memory at a time. The
+    connection is borrowed for as long as the generator is being consumed.
+    query: optional (sql, params) from build_select_query to stream instead
+    of the plain table.
+    """
+    sql, params = query or (select_all_sql(table_name, schema_name), [])
+    cursor_factory = extensions.cursor if tuples else RealDictCursor
+    with get_connection() as conn:
+        with conn.cursor(name=f"stream_{uuid.uuid4().hex}", cursor_factory=cursor_factory) as cur:
+            cur.itersize = batch_size
+            cur.execute(sql, params)
+            rows = cur.fetchmany(batch_size)
+            # description is only available once the first batch has been fetched
+            yield cur.description
+            while rows:
+                yield rows
+                rows = cur.fetchmany(batch_size)
+
+
+def build_select_query(table_name, sort_model=None, filter_model=None, schema_name="public"):
+    """
+    SELECT over a whole table with the grid's filterModel / sortModel applied
+    (the same translation as get_table_rows, without paging).
+    Returns (sql, params); raises ValueError for unknown tables or columns.
+    """
+    columns = get_table_columns(table_name, schema_name)
+    if not columns:
+        raise ValueError(f"Table '{table_name}' not found.")
+    where_sql, params = build_filter_clause(filter_model, columns)
+    order = normalize_sort_model(sort_model, columns)
+    sql = select_all_sql(table_name, schema_name)
+    if where_sql:
+        sql += " WHERE " + where_sql
+    if order:
+        sql += " ORDER BY " + build_order_clause(order)
+    return sql, params
+
+
+class _QueueWriter:
+    """
+    File-like sink for COPY TO: collects the small per-row writes into chunks
+    of about `chunk_bytes` and hands them to a bounded queue, so a slow client
+    pauses the COPY instead of letting output pile up in memory.
+    """
+
+    def __init__(self, chunks, stop, chunk_bytes):
+        self._chunks = chunks
+        self._stop = stop
+        self._chunk_bytes = chunk_bytes
+        self._parts = []
+        self._size = 0
+
+    def write(self, data):
+        self._parts.append(data)
+        self._size += len(data)
+        if self._size >= self._chunk_bytes:
+            self.flush()
+
+    def flush(self):
+        if self._parts:
+            self.put(b"".join(self._parts))
+            self._parts, self._size = [], 0
+
+    def put(self, item):
+        while True:
+            # Raising here aborts the COPY (the consumer went away)
+            if self._stop.is_set():
+                raise RuntimeError("Export cancelled")
+            try:
+                self._chunks.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+
+_COPY_DONE = object()
+
+
+def iter_copy_csv(query, chunk_bytes=64 * 1024, max_chunks=16):
+    """
+    Run COPY (query) TO STDOUT as CSV with a header row and yield the output
+    in chunks of about `chunk_bytes`. query: (sql, params) from build_select_query.
+
+    The COPY runs in its own thread on its own pooled connection; at most
+    `max_chunks` chunks wait in memory for the consumer.
+    """
+    sql, params = query
+    chunks = queue.Queue(maxsize=max_chunks)
+    stop = threading.Event()
+    writer = _QueueWriter(chunks, stop, chunk_bytes)
+
+    def produce():
+        try:
+            with get_connection() as conn:
+                with conn.cursor() as cur:
+                    # COPY takes no bind parameters: inline them with the driver's quoting
+                    select_sql = cur.mogrify(sql, params).decode()
+                    cur.copy_expert(f"COPY ({select_sql}) TO STDOUT WITH (FORMAT csv, HEADER)", writer)
+            writer.flush()
+            writer.put(_COPY_DONE)
+        except Exception as e:
+            if not stop.is_set():
+                writer.put(e)
+
+    producer = threading.Thread(target=produce, name="copy-export", daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = chunks.get()
+            if item is _COPY_DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        producer.join()
+
+
+def get_table_rows(
+    table_name,
+    start_row=0,
+    end_row=100,
+    sort_model=None,
+    filter_model=None,
+    cursor=None,
+    schema_name="public",
+    tuples=False,
+):
+    """
+    One block of rows for AG Grid's server-side / infinite row model.
+
+    Sorting and filtering run in SQL. When the ordering is the primary key and
+    the client sends the `nextCursor` of the previous block, the block is
+    fetched with a key comparison instead of OFFSET so deep scrolling stays cheap.
+    With `tuples` set, rows are tuples and the cursor description is included
+    (used for Arrow encoding).
+    """
+    columns = get_table_columns(table_name, schema_name)
+    key_fields = get_primary_key_columns(table_name, schema_name)
+    query = build_rows_query(
+        table_name, columns, key_fields, start_row, end_row, sort_model, filter_model, cursor, schema_name
+    )
+
+    with get_connection() as conn:
+        with conn.cursor(cursor_factory=extensions.cursor if tuples else RealDictCursor) as cur:
+            cur.execute(query["sql"], query["params"])
+            rows = cur.fetchall()
+            description = cur.description
+
+    return rows_block(query, rows, description, tuples)
+
+
+def build_rows_query(
+    table_name,
+    columns,
+    key_fields,
+    start_row=0,
+    end_row=100,
+    sort_model=None,
+    filter_model=None,
+    cursor=None,
+    schema_name="public",
+):
+    """
+    SQL for one get_table_rows block, given the table's columns and key.
+    Returns {"sql", "params", ...} with what rows_block() needs afterwards.
+    """
+    if start_row < 0 or end_row <= start_row:
+        raise ValueError("endRow must be greater than startRow.")
+    if not columns:
+        raise ValueError(f"Table '{table_name}' not found.")
+    key_fields = list(key_fields)
+
+    where_sql, params = build_filter_clause(filter_model, columns)
+    order = normalize_sort_model(sort_model, columns, key_fields)
+    direction = keyset_direction(order, key_fields)
+
+    conditions = [where_sql] if where_sql else []
+    offset = start_row
+    if direction and cursor is not None:
+        keyset_sql, keyset_params = build_keyset_condition(key_fields, direction, cursor)
+        conditions.append(keyset_sql)
+        params.extend(keyset_params)
+        offset = 0
+
+    sql = select_all_sql(table_name, schema_name)
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    if order:
+        sql += " ORDER BY " + build_order_clause(order)
+    limit = end_row - start_row
+    sql += " LIMIT %s OFFSET %s"
+    params.extend([limit, offset])
+    return {
+        "sql": sql,
+        "params": params,
+        "start_row": start_row,
+        "limit": limit,
+        "key_fields": key_fields if direction else None,
+    }
+
+
+def rows_block(query, rows, description, tuples=False):
+    """The get_table_rows response for the rows fetched with build_rows_query()."""
+    colnames = [desc[0] for desc in description]
+    # Infinite row model convention: lastRow is -1 until the final block is reached
+    last_row = query["start_row"] + len(rows) if len(rows) < query["limit"] else -1
+    next_cursor = None
+    key_fields = query["key_fields"]
+    if key_fields and rows:
+        last = rows[-1] if not tuples else dict(zip(colnames, rows[-1]))
+        next_cursor = [last[k] for k in key_fields]
+    result = {
+        "columns": colnames,
+        "rows": rows,
+        "lastRow": last_row,
+        "nextCursor": next_cursor,
+    }
+    if tuples:
+        result["description"] = description
+    return result
+
+
+TABLE_COLUMNS_SQL = """
+    SELECT a.attname AS column_name, format_type(a.atttypid, NULL) AS data_type
+    FROM pg_attribute a
+    JOIN pg_class c ON c.oid = a.attrelid
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE n.nspname = %s AND c.relname = %s
+    AND a.attnum > 0 AND NOT a.attisdropped
+    ORDER BY a.attnum
+"""
+
+
+def get_table_columns(table_name, schema_name="public"):
+    """Return {column_name: data_type} for a table, in column order."""
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(TABLE_COLUMNS_SQL, (schema_name, table_name))
+            return {row["column_name"]: row["data_type"] for row in cur.fetchall()}
+
+
+def insert_row_query(table_name, row, schema_name="public"):
+    columns = ", ".join(row.keys())
+    values = ", ".join(["%s"] * len(row))
+    sql = f'INSERT INTO "{schema_name}"."{table_name}" ({columns}) VALUES ({values}) RETURNING *'
+    return sql, list(row.values())
+
+
+def update_row_query(table_name, row, key_fields, schema_name="public"):
+    if not key_fields:
+        raise ValueError(f"No primary key found for table '{table_name}'.")
+    missing = [k for k in key_fields if k not in row]
+    if missing:
+        raise ValueError(f"Missing primary key value(s): {', '.join(missing)}.")
+    set_fields = [k for k in row.keys() if k not in key_fields]
+    if not set_fields:
+        raise ValueError("No fields to update.")
+    set_clause = ", ".join([f'"{k}" = %s' for k in set_fields])
+    where = " AND ".join([f'"{k}" = %s' for k in key_fields])
+    sql = f'UPDATE "{schema_name}"."{table_name}" SET {set_clause} WHERE {where} RETURNING *'
+    return sql, [row[k] for k in set_fields] + [row[k] for k in key_fields]
+
+
+def delete_row_query(table_name, row, schema_name="public"):
+    if not row:
+        raise ValueError("No data provided for deletion.")
+    where = " AND ".join([f'"{k}" = %s' for k in row.keys()])
+    return f'DELETE FROM "{schema_name}"."{table_name}" WHERE {where}', list(row.values())
+
+
 def add_table_row(table_name, row, schema_name="public"):
+    sql, params = insert_row_query(table_name, row, schema_name)
     with get_connection() as conn:
         with conn.cursor() as cur:
-            columns = ", ".join(row.keys())
-            values = ", ".join(["%s"] * len(row))
-            sql = (
-                f'INSERT INTO "{schema_name}"."{table_name}" ({columns}) VALUES ({values}) RETURNING *'
-            )
-            cur.execute(sql, list(row.values()))
+            cur.execute(sql, params)
             conn.commit()
+            bump_schema_version(schema_name)
             return cur.fetchone()
 
 
 def update_table_row(table_name, row, schema_name="public"):
-    key_field = get_primary_key_column(table_name, schema_name)
-    if not key_field:
-        raise ValueError(f"No primary key found for table '{table_name}'.")
-
+    key_fields = get_primary_key_columns(table_name, schema_name)
+    sql, params = update_row_query(table_name, row, key_fields, schema_name)
     with get_connection() as conn:
         with conn.cursor() as cur:
-            set_fields = [k for k in row.keys() if k != key_field]
-            if not set_fields:
-                raise ValueError("No fields to update.")
-            set_clause = ", ".join([f'"{k}" = %s' for k in set_fields])
-            sql = f'UPDATE "{schema_name}"."{table_name}" SET {set_clause} WHERE "{key_field}" = %s RETURNING *'
-            values = [row[k] for k in set_fields] + [row[key_field]]
-            cur.execute(sql, values)
+            cur.execute(sql, params)
+            updated = cur.fetchone()
             conn.commit()
+            bump_schema_version(schema_name)
+            return updated
+
 
 def delete_table_row(table_name, row, schema_name="public"):
-    if not row:
-        raise ValueError("No data provided for deletion.")
-    where = " AND ".join([f'"{k}" = %s' for k in row.keys()])
-    sql = f'DELETE FROM "{schema_name}"."{table_name}" WHERE {where}'
+    sql, params = delete_row_query(table_name, row, schema_name)
     with get_connection() as conn:
         with conn.cursor() as cur:
-            cur.execute(sql, list(row.values()))
+            cur.execute(sql, params)
             conn.commit()
+    bump_schema_version(schema_name)
     return {"success": True}
 
 
+def _group_by_columns(rows):
+    """Group row dicts by their column set so each group becomes one multi-row statement."""
+    groups = {}
+    for row in rows:
+        groups.setdefault(tuple(row.keys()), []).append(row)
+    return groups.items()
+
+
+def apply_table_transaction(table_name, add=(), update=(), remove=(), schema_name="public", page_size=1000):
+    """
+    Apply an AG Grid transaction ({add, update, remove} lists of row dicts) in a
+    single database transaction, using multi-row INSERT / UPDATE ... FROM (VALUES)
+    / DELETE ... USING (VALUES) statements. Returns the affected rows per list.
+    """
+    columns = get_table_columns(table_name, schema_name)
+    if not columns:
+        raise ValueError(f"Table '{table_name}' not found.")
+    for row in [*add, *update, *remove]:
+        unknown = [k for k in row if k not in columns]
+        if unknown:
+            raise ValueError(f"Unknown column(s): {', '.join(unknown)}.")
+
+    key_fields = get_primary_key_columns(table_name, schema_name)
+    if (update or remove) and not key_fields:
+        raise ValueError(f"No primary key found for table '{table_name}'.")
+    for row in [*update, *remove]:
+        missing = [k for k in key_fields if k not in row]
+        if missing:
+            raise ValueError(f"Missing primary key value(s): {', '.join(missing)}.")
+
+    target = f'{quote_ident(schema_name)}.{quote_ident(table_name)}'
+    keys_match = " AND ".join(f"t.{quote_ident(k)} = v.{quote_ident(k)}" for k in key_fields)
+
+    def values_template(cols):
+        # VALUES lists need explicit casts; INSERT infers types from the target
+        return "(" + ", ".join(f"%s::{columns[c]}" for c in cols) + ")"
+
+    result = {"add": [], "update": [], "remove": []}
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            if remove:
+                sql = (
+                    f"DELETE FROM {target} AS t USING (VALUES %s) AS v({', '.join(map(quote_ident, key_fields))}) "
+                    f"WHERE {keys_match} RETURNING t.*"
+                )
+                result["remove"] = execute_values(
+                    cur, sql, [[row[k] for k in key_fields] for row in remove],
+                    template=values_template(key_fields), page_size=page_size, fetch=True,
+                )
+
+            for cols, rows in _group_by_columns(update):
+                set_cols = [c for c in cols if c not in key_fields]
+                if not set_cols:
+                    raise ValueError("No fields to update.")
+                value_cols = list(key_fields) + set_cols
+                set_clause = ", ".join(f"{quote_ident(c)} = v.{quote_ident(c)}" for c in set_cols)
+                sql = (
+                    f"UPDATE {target} AS t SET {set_clause} "
+                    f"FROM (VALUES %s) AS v({', '.join(map(quote_ident, value_cols))}) "
+                    f"WHERE {keys_match} RETURNING t.*"
+                )
+                result["update"] += execute_values(
+                    cur, sql, [[row[c] for c in value_cols] for row in rows],
+                    template=values_template(value_cols), page_size=page_size, fetch=True,
+                )
+
+            for cols, rows in _group_by_columns(add):
+                sql = f"INSERT INTO {target} ({', '.join(map(quote_ident, cols))}) VALUES %s RETURNING *"
+                result["add"] += execute_values(
+                    cur, sql, [[row[c] for c in cols] for row in rows],
+                    page_size=page_size, fetch=True,
+                )
+        conn.commit()
+    bump_schema_version(schema_name)
+    return result
+
+
 # need to check for the case when there are more than 1 primary keys input by users
-def create_table(table_name, columns, schema_name="public"):
+def create_table(table_name, columns, schema_name="public", commit=True):
     """
     columns: List of dicts, e.g. [{"name": "id", "type": "SERIAL", "isPrimary": True}, ...]
+    commit: set to False to keep the CREATE in the caller's transaction (e.g. an
+            import); the caller then calls invalidate_table_metadata() after its commit
     """
     for col in columns:
         if "isPrimary" in col:
@@ -95,7 +477,10 @@ def create_table(table_name, columns, schema_name="public"):
     with get_connection() as conn:
         with conn.cursor() as cur:
             cur.execute(sql)
+        if commit:
             conn.commit()
+    if commit:
+        invalidate_table_metadata(schema_name, table_name)
     return True
 
 
@@ -105,87 +490,439 @@ def delete_table(table_name, schema_name="public"):
             sql = f'DROP TABLE IF EXISTS "{schema_name}"."{table_name}" CASCADE;'
             cur.execute(sql)
             conn.commit()
+    invalidate_table_metadata(schema_name, table_name)
     return True
 
 
-def get_all_tables_metadata(schema_name="public"):
+# Row estimate from the planner statistics: live tuples from the stats collector,
+# falling back to pg_class.reltuples (-1 when the table was never analyzed)
+ESTIMATED_ROWS_SQL = """
+    CASE WHEN COALESCE(s.n_live_tup, 0) > 0 THEN s.n_live_tup
+         ELSE GREATEST(c.reltuples, 0)::bigint END
+"""
+
+
+SCHEMA_TABLES_SQL = f"""
+    SELECT
+        c.relname AS table_name,
+        {ESTIMATED_ROWS_SQL} AS estimated_rows,
+        COALESCE(
+            json_agg(
+                json_build_object('field', a.attname, 'type', format_type(a.atttypid, NULL))
+                ORDER BY a.attnum
+            ) FILTER (WHERE a.attname IS NOT NULL),
+            '[]'
+        ) AS columns
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    LEFT JOIN pg_attribute a
+        ON a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped
+    LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+    WHERE n.nspname = %s AND c.relkind IN ('r', 'p')
+    GROUP BY c.oid, c.relname, c.reltuples, s.n_live_tup
+    ORDER BY c.relname
+"""
+
+ALL_TABLES_SQL = f"""
+    SELECT n.nspname AS schema, c.relname AS table, {ESTIMATED_ROWS_SQL} AS rows
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+    WHERE c.relkind IN ('r', 'p')
+    AND n.nspname NOT IN ('pg_catalog', 'information_schema')
+    AND n.nspname NOT LIKE 'pg_temp%'
+    ORDER BY n.nspname, c.relname
+"""
+
+
+def exact_counts_query(tables):
+    """
+    One UNION ALL statement counting the rows of every (schema, table) pair.
+    Result rows are (schema, table, count).
+    """
+    sql = " UNION ALL ".join(
+        f"SELECT %s AS schema, %s AS table, COUNT(*) AS count FROM {quote_ident(schema)}.{quote_ident(table)}"
+        for schema, table in tables
+    )
+    return sql, [value for pair in tables for value in pair]
+
+
+def tables_metadata(tables, counts, exact_counts):
+    """get_all_tables_metadata entries from SCHEMA_TABLES_SQL rows and exact counts."""
+    return [
+        {
+            "key": t["table_name"],
+            "columns": len(t["columns"]),
+            "rows": counts.get(t["table_name"], t["estimated_rows"]),
+            "rowsEstimated": not exact_counts,
+            "columnsDef": t["columns"],
+        }
+        for t in tables
+    ]
+
+
+def get_all_tables_metadata(schema_name="public", exact_counts=False):
+    """
+    Tables, columns and row counts of a schema in a single catalog query.
+
+    Row counts are planner estimates unless `exact_counts` is set, which adds
+    one COUNT(*) per table (all sent in a single UNION ALL statement).
+    """
     with get_connection() as conn:
         with conn.cursor() as cur:
-            # Get all user tables in the specified schema
-            cur.execute(
-                """
-                SELECT table_name
-                FROM information_schema.tables
-                WHERE table_schema = %s
-                AND table_type = 'BASE TABLE'
-            """,
-                (schema_name,)
-            )
-            tables = [row["table_name"] for row in cur.fetchall()]
-
-            result = []
-            for table_name in tables:
-                # Get columns for each table
-                cur.execute(
-                    """
-                    SELECT column_name, data_type
-                    FROM information_schema.columns
-                    WHERE table_name = %s
-                    AND table_schema = %s
-                """,
-                    (table_name, schema_name),
-                )
-                columns = [
-                    {"field": col["column_name"], "type": col["data_type"]}
-                    for col in cur.fetchall()
-                ]
-
-                # Get row count
-                cur.execute(f'SELECT COUNT(*) FROM "{schema_name}"."{table_name}"')
-                rows = cur.fetchone()["count"]
-
-                result.append(
-                    {
-                        "key": table_name,
-                        "columns": len(columns),
-                        "rows": rows,
-                        "columnsDef": columns,
-                    }
-                )
-            return result
+            cur.execute(SCHEMA_TABLES_SQL, (schema_name,))
+            tables = cur.fetchall()
+
+            counts = {}
+            if exact_counts and tables:
+                cur.execute(*exact_counts_query([(schema_name, t["table_name"]) for t in tables]))
+                counts = {row["table"]: row["count"] for row in cur.fetchall()}
+
+    return tables_metadata(tables, counts, exact_counts)
+
+
+def list_all_tables(exact_counts=False):
+    """Every user table across all non-system schemas with (estimated) row counts."""
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(ALL_TABLES_SQL)
+            result = [dict(row) for row in cur.fetchall()]
+            if exact_counts and result:
+                # Note: COUNT(*) can be expensive for very large tables
+                cur.execute(*exact_counts_query([(t["schema"], t["table"]) for t in result]))
+                counts = {(row["schema"], row["table"]): row["count"] for row in cur.fetchall()}
+                for t in result:
+                    t["rows"] = counts[(t["schema"], t["table"])]
+    return result
+
+
+def _copy_text_value(value) -> str:
+    """Encode one value for COPY's text format (None -> \\N)."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    text = value if isinstance(value, str) else str(value)
+    if "\\" in text or "\t" in text or "\n" in text or "\r" in text:
+        text = text.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+    return text
+
+
+def encode_copy_row(row) -> str:
+    """One row as a line of COPY text format (without the trailing newline)."""
+    return "\t".join(map(_copy_text_value, row))
+
+
+class CopyRowsReader:
+    """
+    File-like object feeding an iterable of rows to COPY ... FROM STDIN in text
+    format. Rows are encoded lazily, `chunk_rows` at a time, so memory stays
+    bounded by one chunk no matter how many rows the iterable produces.
+    """
+
+    def __init__(self, rows, chunk_rows=5000, on_progress=None):
+        self._rows = iter(rows)
+        self._chunk_rows = chunk_rows
+        self._on_progress = on_progress
+        self._buffer = ""
+        self._pos = 0
+        self.rows_read = 0
+
+    def _next_chunk(self):
+        lines = [encode_copy_row(row) for row in itertools.islice(self._rows, self._chunk_rows)]
+        if not lines:
+            return False
+        self.rows_read += len(lines)
+        self._buffer = "\n".join(lines) + "\n"
+        self._pos = 0
+        if self._on_progress:
+            self._on_progress(self.rows_read)
+        return True
+
+    def read(self, size=-1):
+        if size < 0:
+            parts = [self._buffer[self._pos:]]
+            while self._next_chunk():
+                parts.append(self._buffer)
+            self._buffer, self._pos = "", 0
+            return "".join(parts)
+        # Hand out slices of the current chunk, like CopyChunksReader; short reads are fine for COPY
+        if self._pos >= len(self._buffer) and not self._next_chunk():
+            return ""
+        end = min(self._pos + size, len(self._buffer))
+        data = self._buffer[self._pos:end]
+        self._pos = end
+        return data
+
+
+class CopyChunksReader:
+    """
+    File-like object feeding pre-encoded COPY text to COPY ... FROM STDIN.
+    `chunks` yields (data, row_count) pairs, data being bytes of complete lines.
+    """
+
+    def __init__(self, chunks, on_progress=None):
+        self._chunks = iter(chunks)
+        self._on_progress = on_progress
+        self._buffer = b""
+        self._pos = 0
+        self.rows_read = 0
+
+    def read(self, size=-1):
+        # Hand out slices of the current chunk instead of re-buffering: chunks are megabytes
+        while self._pos >= len(self._buffer):
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return b""
+            self._buffer, count = chunk
+            self._pos = 0
+            self.rows_read += count
+            if self._on_progress:
+                self._on_progress(self.rows_read)
+        end = len(self._buffer) if size < 0 else min(self._pos + size, len(self._buffer))
+        data = self._buffer[self._pos:end]
+        self._pos = end
+        return data
+
+
+COPY_FORMATS = ("text", "csv")
 
 
-def insert_rows_bulk(table_name: str, columns: list[str], rows: list[list], schema_name: str = "public"):
+def _copy_options(copy_format):
+    if copy_format not in COPY_FORMATS:
+        raise ValueError(f"Unsupported COPY format '{copy_format}'.")
+    # CSV: unquoted empty field = NULL, "" = empty string
+    return " WITH (FORMAT csv)" if copy_format == "csv" else ""
+
+
+def _copy_reader(rows, copy_chunks, on_progress):
+    if copy_chunks is not None:
+        return CopyChunksReader(copy_chunks, on_progress=on_progress)
+    return CopyRowsReader(rows, on_progress=on_progress)
+
+
+def insert_rows_bulk(
+    table_name: str,
+    columns: list[str],
+    rows,
+    schema_name: str = "public",
+    on_progress=None,
+    commit: bool = True,
+    copy_chunks=None,
+    copy_format: str = "text",
+):
     """
     columns: list of column names (already sanitized)
-    rows: list of row-value lists aligned with columns
+    rows: iterable of row-value lists aligned with columns (may be a generator)
+    copy_chunks: alternatively, (bytes, row_count) chunks already encoded for
+                 COPY (e.g. by parallel parse workers); rows is ignored
+    copy_format: format of copy_chunks, "text" or "csv"
+    commit: set to False to leave the load in the caller's transaction; the
+            caller then calls bump_schema_version() after its commit
+
+    Loads everything with a single COPY ... FROM STDIN in one transaction.
+    Targets COPY can't load into (views) fall back to multi-row INSERTs via
+    execute_values. `on_progress(rows_done)` is called after every chunk.
+    Returns {"rows", "seconds", "rows_per_sec", "method"}.
     """
     cols_quoted = ", ".join([f'"{c}"' for c in columns])
-    placeholders = ", ".join(["%s"] * len(columns))
-    sql = f'INSERT INTO "{schema_name}"."{table_name}" ({cols_quoted}) VALUES ({placeholders})'
+    target = f'"{schema_name}"."{table_name}"'
+    started = time.monotonic()
     with get_connection() as conn:
         with conn.cursor() as cur:
-            cur.executemany(sql, rows)
+            cur.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", (target,))
+            relation = cur.fetchone()
+            # r = table, p = partitioned table, f = foreign table
+            if relation is None or relation["relkind"] in ("r", "p", "f"):
+                method = "copy"
+                reader = _copy_reader(rows, copy_chunks, on_progress)
+                cur.copy_expert(
+                    f"COPY {target} ({cols_quoted}) FROM STDIN{_copy_options(copy_format)}", reader
+                )
+                count = reader.rows_read
+            elif copy_chunks is not None:
+                raise ValueError(f"{target} is a view; pre-encoded rows can only be loaded into tables.")
+            else:
+                method = "values"
+                count = 0
+                remaining = iter(rows)
+                while True:
+                    batch = list(itertools.islice(remaining, 5000))
+                    if not batch:
+                        break
+                    execute_values(cur, f"INSERT INTO {target} ({cols_quoted}) VALUES %s", batch, page_size=1000)
+                    count += len(batch)
+                    if on_progress:
+                        on_progress(count)
+        if commit:
             conn.commit()
-    return True
+    if commit:
+        bump_schema_version(schema_name)
+    seconds = time.monotonic() - started
+    return {
+        "rows": count,
+        "seconds": round(seconds, 3),
+        "rows_per_sec": round(count / seconds) if seconds > 0 else count,
+        "method": method,
+    }
 
 
-def get_primary_key_column(table_name, schema_name="public"):
+def merge_rows_bulk(
+    table_name: str,
+    columns: list[str],
+    rows,
+    key_columns,
+    schema_name: str = "public",
+    on_progress=None,
+    commit: bool = True,
+    copy_chunks=None,
+    copy_format: str = "text",
+):
+    """
+    Upsert rows into an existing table keyed on its primary key.
+
+    The rows are COPYed into a temporary staging table with the target's column
+    types, then merged with one INSERT ... ON CONFLICT DO UPDATE. Rows whose
+    values did not change are not rewritten. If a key appears more than once in
+    the input, the last occurrence wins. `copy_chunks`, `copy_format` and
+    `commit` work as in insert_rows_bulk.
+    Returns {"rows", "inserted", "updated", "unchanged", "seconds", "rows_per_sec", "method"}.
+    """
+    key_columns = list(key_columns)
+    missing_keys = [k for k in key_columns if k not in columns]
+    if missing_keys:
+        raise ValueError(f"Missing primary key column(s) {', '.join(missing_keys)} in the data.")
+    target = f"{quote_ident(schema_name)}.{quote_ident(table_name)}"
+    cols_quoted = ", ".join(quote_ident(c) for c in columns)
+    keys_quoted = ", ".join(quote_ident(k) for k in key_columns)
+    value_cols = [c for c in columns if c not in key_columns]
+    if value_cols:
+        targets = ", ".join(f"t.{quote_ident(c)}" for c in value_cols)
+        excluded = ", ".join(f"EXCLUDED.{quote_ident(c)}" for c in value_cols)
+        assignments = ", ".join(f"{quote_ident(c)} = EXCLUDED.{quote_ident(c)}" for c in value_cols)
+        conflict = f"DO UPDATE SET {assignments} WHERE ROW({targets}) IS DISTINCT FROM ROW({excluded})"
+    else:
+        conflict = "DO NOTHING"
+    stage = quote_ident(f"stage_{uuid.uuid4().hex}")
+
+    started = time.monotonic()
     with get_connection() as conn:
         with conn.cursor() as cur:
+            # Same column types as the target, no constraints; dropped at commit/rollback
+            cur.execute(
+                f"CREATE TEMP TABLE {stage} ON COMMIT DROP AS "
+                f"SELECT {cols_quoted} FROM {target} WITH NO DATA"
+            )
+            reader = _copy_reader(rows, copy_chunks, on_progress)
+            cur.copy_expert(f"COPY {stage} ({cols_quoted}) FROM STDIN{_copy_options(copy_format)}", reader)
+            # xmax = 0 only for freshly inserted tuples, which tells inserts from updates
             cur.execute(
+                f"""
+                WITH merged AS (
+                    INSERT INTO {target} AS t ({cols_quoted})
+                    SELECT DISTINCT ON ({keys_quoted}) {cols_quoted} FROM {stage}
+                    ORDER BY {keys_quoted}, ctid DESC
+                    ON CONFLICT ({keys_quoted}) {conflict}
+                    RETURNING (xmax = 0) AS inserted
+                )
+                SELECT
+                    (SELECT count(*) FROM (SELECT DISTINCT {keys_quoted} FROM {stage}) k) AS distinct_rows,
+                    count(*) FILTER (WHERE inserted) AS inserted,
+                    count(*) FILTER (WHERE NOT inserted) AS updated
+                FROM merged
                 """
-                SELECT a.attname
-                FROM pg_index i
-                JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
-                JOIN pg_class c ON c.oid = i.indrelid
-                JOIN pg_namespace n ON n.oid = c.relnamespace
-                WHERE c.relname = %s AND n.nspname = %s AND i.indisprimary
-            """,
-                (table_name, schema_name),
             )
-            result = cur.fetchone()
-            return result["attname"] if result else None
+            counts = cur.fetchone()
+            # Don't wait for the commit when the caller keeps the transaction open
+            cur.execute(f"DROP TABLE {stage}")
+        if commit:
+            conn.commit()
+    if commit:
+        bump_schema_version(schema_name)
+    seconds = time.monotonic() - started
+    count = reader.rows_read
+    return {
+        "rows": count,
+        "inserted": counts["inserted"],
+        "updated": counts["updated"],
+        "unchanged": counts["distinct_rows"] - counts["inserted"] - counts["updated"],
+        "seconds": round(seconds, 3),
+        "rows_per_sec": round(count / seconds) if seconds > 0 else count,
+        "method": "merge",
+    }
+
+
+PRIMARY_KEY_SQL = """
+    SELECT a.attname
+    FROM pg_index i
+    JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+    JOIN pg_class c ON c.oid = i.indrelid
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE c.relname = %s AND n.nspname = %s AND i.indisprimary
+    ORDER BY array_position(i.indkey::int2[], a.attnum)
+"""
+
+
+def get_primary_key_columns(table_name, schema_name="public") -> tuple:
+    """Primary-key columns of a table in key order (cached; empty if there is none)."""
+    cached = cached_primary_key_columns(table_name, schema_name)
+    if cached is not None:
+        return cached
+
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(PRIMARY_KEY_SQL, (table_name, schema_name))
+            key_fields = tuple(row["attname"] for row in cur.fetchall())
+
+    cache_primary_key_columns(table_name, schema_name, key_fields)
+    return key_fields
+
+
+def cached_primary_key_columns(table_name, schema_name="public"):
+    """Cached primary-key columns, or None when not cached."""
+    return _primary_keys.get((schema_name, table_name))
+
+
+def cache_primary_key_columns(table_name, schema_name, key_fields):
+    # Don't cache misses: the table may be created by DDL we don't see
+    if key_fields:
+        _primary_keys.set((schema_name, table_name), key_fields)
+
+
+def get_primary_key_column(table_name, schema_name="public"):
+    """First primary-key column, or None (see get_primary_key_columns for composite keys)."""
+    key_fields = get_primary_key_columns(table_name, schema_name)
+    return key_fields[0] if key_fields else None
+
+
+def invalidate_table_metadata(schema_name, table_name=None):
+    """Forget cached metadata for one table, or for a whole schema."""
+    bump_schema_version(schema_name)
+    if table_name is None:
+        _primary_keys.discard_where(lambda key: key[0] == schema_name)
+    else:
+        _primary_keys.pop((schema_name, table_name))
+
+
+def get_table_metadata_cache_stats() -> dict:
+    return _primary_keys.stats()
+
+
+def bump_schema_version(schema_name=None):
+    """
+    Record that tables or rows of `schema_name` changed (None: some unknown schema).
+    Call it only once the change is committed: a reader that saw the new version
+    before the commit would cache the old contents under it.
+    """
+    _schema_versions[schema_name] = next(_schema_change_counter)
+
+
+def get_schema_version(schema_name) -> int:
+    """
+    Changes whenever the schema's tables or rows may have changed in this process;
+    results derived from a schema can be cached under (schema_name, version).
+    """
+    return max(_schema_versions.get(schema_name, 0), _schema_versions.get(None, 0))
 
 def create_schema(schema_name: str):
     """
@@ -207,5 +944,6 @@ def delete_schema(schema_name: str, cascade: bool = False):
             sql = f'DROP SCHEMA IF EXISTS "{schema_name}" {"CASCADE" if cascade else ""}'
             cur.execute(sql)
             conn.commit()
+    invalidate_table_metadata(schema_name)
     return True
 
@@ -0,0 +1,59 @@
+import os
+from fastapi import HTTPException
+from python_ag_grid_backend.cache import LRUCache
+from python_ag_grid_backend.database import get_async_connection, get_connection
+
+# team_id -> schema_name. The mapping never changes while a team exists, so
+# entries only go away on delete_team (or after the TTL, as a safety net).
+_team_schemas = LRUCache(
+    maxsize=int(os.getenv("TEAM_SCHEMA_CACHE_SIZE", "4096")),
+    ttl=float(os.getenv("TEAM_SCHEMA_CACHE_TTL", "600")),
+)
+
+
+def get_schema_name_for_team(team_id: str) -> str:
+    """Resolve the schema_name for a team_id (cached)."""
+    schema_name = _team_schemas.get(str(team_id))
+    if schema_name is not None:
+        return schema_name
+    try:
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT schema_name FROM teams WHERE team_id = %s", (team_id,))
+                result = cur.fetchone()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get team schema: {str(e)}")
+
+    if not result:
+        raise HTTPException(status_code=404, detail="Team not found")
+
+    _team_schemas.set(str(team_id), result["schema_name"])
+    return result["schema_name"]
+
+
+async def get_schema_name_for_team_async(team_id: str) -> str:
+    """get_schema_name_for_team for async handlers (same cache)."""
+    schema_name = _team_schemas.get(str(team_id))
+    if schema_name is not None:
+        return schema_name
+    try:
+        async with get_async_connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute("SELECT schema_name FROM teams WHERE team_id = %s", (team_id,))
+                result = await cur.fetchone()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get team schema: {str(e)}")
+
+    if not result:
+        raise HTTPException(status_code=404, detail="Team not found")
+
+    _team_schemas.set(str(team_id), result["schema_name"])
+    return result["schema_name"]
+
+
+def invalidate_team_schema(team_id: str):
+    _team_schemas.pop(str(team_id))
+
+
+def get_team_schema_cache_stats() -> dict:
+    return _team_schemas.stats()
@@ -0,0 +1,162 @@
+"""
+Zip archive import: one table per CSV entry.
+
+Entries are decompressed as streams straight into the CSV importer (nothing
+is extracted to disk) and independent tables load concurrently, each on its
+own pooled connection and transaction. The result is one combined report;
+a failing table doesn't stop the others.
+"""
+import json
+import os
+import posixpath
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException
+from python_ag_grid_backend.database import connection_scope, db_pool_max
+from python_ag_grid_backend.importers.csv_import import (
+    DEFAULT_INFER_ROWS,
+    import_csv_stream,
+    sanitize_identifier,
+)
+
+ARCHIVE_IMPORT_PARALLELISM = int(os.getenv("ARCHIVE_IMPORT_PARALLELISM", "4"))
+# Column used as the primary key of tables not listed in primary_keys
+DEFAULT_ARCHIVE_PRIMARY_KEY = "id"
+
+
+def parse_archive_primary_keys(primary_keys: str | None) -> dict:
+    """JSON object {table or file name: [columns] or "col1,col2"} -> {table: [columns]}."""
+    if not primary_keys:
+        return {}
+    try:
+        mapping = json.loads(primary_keys)
+    except ValueError:
+        mapping = None
+    if not isinstance(mapping, dict):
+        raise HTTPException(
+            status_code=400,
+            detail='primary_keys must be a JSON object, e.g. {"players": ["id"]}.',
+        )
+    result = {}
+    for name, keys in mapping.items():
+        if isinstance(keys, str):
+            keys = [k.strip() for k in keys.split(",") if k.strip()]
+        result[sanitize_identifier(posixpath.splitext(posixpath.basename(name))[0])] = keys
+    return result
+
+
+def list_csv_entries(archive: zipfile.ZipFile) -> list[tuple[str, zipfile.ZipInfo]]:
+    """(table name, entry) for every CSV in the archive, largest first."""
+    entries = {}
+    for info in archive.infolist():
+        base = posixpath.basename(info.filename)
+        if (
+            info.is_dir()
+            or info.filename.startswith("__MACOSX/")
+            or base.startswith(".")
+            or not base.lower().endswith(".csv")
+        ):
+            continue
+        table = sanitize_identifier(posixpath.splitext(base)[0])
+        if table in entries:
+            raise HTTPException(
+                status_code=400,
+                detail=(
+                    f"'{entries[table].filename}' and '{info.filename}' would both "
+                    f"be imported as table '{table}'."
+                ),
+            )
+        entries[table] = info
+    # Start the biggest loads first so the total time is close to the largest file's
+    return sorted(entries.items(), key=lambda item: item[1].file_size, reverse=True)
+
+
+def import_zip_archive(
+    fileobj,
+    schema_name: str,
+    primary_keys: str | None = None,
+    infer_rows: int = DEFAULT_INFER_ROWS,
+    mode: str = "create",
+    parallelism: int | None = None,
+    on_progress=None,
+    on_phase=None,
+):
+    """
+    Import every CSV entry of a zip archive (seekable binary file object) as
+    a table named after the file.
+
+    primary_keys: optional JSON object {table: [columns]}; other tables use "id"
+    parallelism: tables loaded at once (default and maximum: ARCHIVE_IMPORT_PARALLELISM,
+        capped at DB_POOL_MAX - 1)
+    on_progress(rows_done): rows loaded so far across all tables
+    """
+    try:
+        archive = zipfile.ZipFile(fileobj)
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail="Upload is not a valid zip archive.")
+
+    with archive:
+        entries = list_csv_entries(archive)
+        if not entries:
+            raise HTTPException(status_code=400, detail="The archive contains no CSV files.")
+        keys_by_table = parse_archive_primary_keys(primary_keys)
+
+        progress = {}
+        progress_lock = threading.Lock()
+
+        def report(table, rows_done):
+            with progress_lock:
+                progress[table] = rows_done
+                total = sum(progress.values())
+            if on_progress:
+                on_progress(total)
+
+        def load(table, info):
+            started = time.monotonic()
+            try:
+                keys = keys_by_table.get(table, [DEFAULT_ARCHIVE_PRIMARY_KEY])
+                # Each table is its own transaction on its own connection
+                with connection_scope(), archive.open(info) as entry:
+                    result = import_csv_stream(
+                        entry,
+                        schema_name,
+                        table,
+                        primary_keys=json.dumps(keys),
+                        infer_rows=infer_rows,
+                        mode=mode,
+                        on_progress=lambda rows_done: report(table, rows_done),
+                        on_phase=on_phase,
+                        parallel_parse=False,
+                    )
+                return {"file": info.filename, **result}
+            except HTTPException as e:
+                error, status_code = e.detail, e.status_code
+            except Exception as e:
+                error, status_code = str(e), 500
+            return {
+                "success": False,
+                "file": info.filename,
+                "table": table,
+                "error": error,
+                "status_code": status_code,
+                "seconds": round(time.monotonic() - started, 3),
+            }
+
+        started = time.monotonic()
+        # Each table holds a pooled connection for its whole load: leave one for other requests
+        limit = min(ARCHIVE_IMPORT_PARALLELISM, db_pool_max - 1)
+        workers = max(1, min(parallelism or limit, limit, len(entries)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="archive") as pool:
+            tables = list(pool.map(lambda item: load(*item), entries))
+
+    seconds = time.monotonic() - started
+    rows = sum(t.get("rows", 0) for t in tables if t["success"])
+    return {
+        "success": all(t["success"] for t in tables),
+        "tables": tables,
+        "rows": rows,
+        "seconds": round(seconds, 3),
+        "rows_per_sec": round(rows / seconds) if seconds > 0 else rows,
+    }
@@ -0,0 +1,243 @@
+"""
+Parquet / Arrow IPC import.
+
+Column types come from the file's Arrow schema instead of being guessed from
+text. Record batches are read one at a time (at most one row group's worth),
+rendered to CSV by Arrow's C++ writer and piped into COPY, so values never
+become Python objects, except in the rare columns Postgres needs in a
+different shape (binary, nested).
+"""
+import io
+import json
+import os
+import psycopg2
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+from fastapi import HTTPException
+from python_ag_grid_backend.db_access.arrow_format import NUMERIC_FIELD_METADATA
+from python_ag_grid_backend.db_access.tables_operations import (
+    create_table,
+    insert_rows_bulk,
+    invalidate_table_metadata,
+    merge_rows_bulk,
+)
+from python_ag_grid_backend.importers.csv_import import (
+    IMPORT_MODES,
+    build_create_columns,
+    parse_primary_keys,
+    resolve_merge_target,
+    sanitize_identifier,
+)
+
+ARROW_IMPORT_BATCH_ROWS = int(os.getenv("ARROW_IMPORT_BATCH_ROWS", "65536"))
+
+_PARQUET_MAGIC = b"PAR1"
+_ARROW_FILE_MAGIC = b"ARROW1"
+
+_CSV_WRITE_OPTIONS = pa_csv.WriteOptions(include_header=False)
+
+# Postgres interval input understands these unit names
+_DURATION_UNITS = {"s": "seconds", "ms": "milliseconds", "us": "microseconds"}
+
+
+def arrow_to_pg_type(arrow_type: pa.DataType) -> str:
+    """Postgres column type for an Arrow type."""
+    t = arrow_type
+    if pa.types.is_dictionary(t):
+        return arrow_to_pg_type(t.value_type)
+    if pa.types.is_boolean(t):
+        return "BOOLEAN"
+    if pa.types.is_int8(t) or pa.types.is_int16(t) or pa.types.is_uint8(t):
+        return "SMALLINT"
+    if pa.types.is_int32(t) or pa.types.is_uint16(t):
+        return "INTEGER"
+    if pa.types.is_int64(t) or pa.types.is_uint32(t):
+        return "BIGINT"
+    if pa.types.is_uint64(t):
+        return "NUMERIC(20)"
+    if pa.types.is_float16(t) or pa.types.is_float32(t):
+        return "REAL"
+    if pa.types.is_float64(t):
+        return "DOUBLE PRECISION"
+    if pa.types.is_decimal(t):
+        return f"NUMERIC({t.precision},{t.scale})"
+    if pa.types.is_date(t):
+        return "DATE"
+    if pa.types.is_timestamp(t):
+        return "TIMESTAMPTZ" if t.tz else "TIMESTAMP"
+    if pa.types.is_time(t):
+        return "TIME"
+    if pa.types.is_duration(t):
+        return "INTERVAL"
+    if pa.types.is_binary(t) or pa.types.is_large_binary(t) or pa.types.is_fixed_size_binary(t):
+        return "BYTEA"
+    if pa.types.is_nested(t):
+        return "JSONB"
+    return "TEXT"
+
+
+def field_to_pg_type(field: pa.Field) -> str:
+    """
+    Postgres column type for an Arrow field. Strings tagged as numeric by our
+    own export (unconstrained NUMERIC) go back to NUMERIC.
+    """
+    if field.metadata == NUMERIC_FIELD_METADATA and pa.types.is_string(field.type):
+        return "NUMERIC"
+    return arrow_to_pg_type(field.type)
+
+
+def _csv_ready_column(array: pa.Array) -> pa.Array:
+    """Rewrite the column types Arrow's CSV writer can't render the way COPY expects."""
+    t = array.type
+    if pa.types.is_dictionary(t):
+        return _csv_ready_column(array.dictionary_decode())
+    if pa.types.is_duration(t):
+        unit = t.unit
+        values = pc.cast(array, pa.int64())
+        if unit == "ns":
+            values, unit = pc.divide(values, 1000), "us"
+        # "1500 milliseconds"
+        return pc.binary_join_element_wise(
+            pc.cast(values, pa.string()), _DURATION_UNITS[unit], " "
+        )
+    if pa.types.is_binary(t) or pa.types.is_large_binary(t) or pa.types.is_fixed_size_binary(t):
+        # bytea hex input; Arrow has no hex kernel
+        return pa.array(
+            [None if v is None else "\\x" + v.hex() for v in array.to_pylist()], pa.string()
+        )
+    if pa.types.is_nested(t):
+        return pa.array(
+            [None if v is None else json.dumps(v, default=str) for v in array.to_pylist()],
+            pa.string(),
+        )
+    if pa.types.is_null(t):
+        return pa.nulls(len(array), pa.string())
+    return array
+
+
+def _csv_chunk(batch: pa.RecordBatch) -> tuple[bytes, int]:
+    columns = [_csv_ready_column(col) for col in batch.columns]
+    ready = pa.RecordBatch.from_arrays(columns, names=batch.schema.names)
+    sink = io.BytesIO()
+    pa_csv.write_csv(ready, sink, _CSV_WRITE_OPTIONS)
+    return sink.getvalue(), batch.num_rows
+
+
+def open_record_batches(fileobj, batch_rows: int = ARROW_IMPORT_BATCH_ROWS):
+    """
+    (schema, batch iterator) for a Parquet file or an Arrow IPC file/stream.
+    fileobj must be seekable for Parquet and the IPC file format.
+    """
+    head = fileobj.read(6)
+    fileobj.seek(0)
+    try:
+        if head[:4] == _PARQUET_MAGIC:
+            parquet = pq.ParquetFile(fileobj)
+            return parquet.schema_arrow, parquet.iter_batches(batch_size=batch_rows)
+        if head == _ARROW_FILE_MAGIC:
+            reader = ipc.open_file(fileobj)
+            return reader.schema, (reader.get_batch(i) for i in range(reader.num_record_batches))
+        reader = ipc.open_stream(fileobj)
+        return reader.schema, iter(reader)
+    except pa.ArrowInvalid as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Upload is not a Parquet or Arrow IPC file ({e}).",
+        )
+
+
+def import_arrow_stream(
+    fileobj,
+    schema_name: str,
+    table_name: str,
+    primary_keys: str | None = None,
+    mode: str = "create",
+    on_progress=None,
+    on_phase=None,
+):
+    """
+    Create `table_name` from a Parquet or Arrow IPC file and load it with COPY.
+    Arguments and result match import_csv_stream.
+    """
+    if mode not in IMPORT_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown import mode '{mode}' (expected one of {', '.join(IMPORT_MODES)}).",
+        )
+    arrow_schema, batches = open_record_batches(fileobj)
+    cols = [sanitize_identifier(name) for name in arrow_schema.names]
+    table = sanitize_identifier(table_name)
+
+    pk_set = parse_primary_keys(primary_keys)
+    key_columns = None
+    if mode == "merge":
+        _, key_columns = resolve_merge_target(table, schema_name, cols, pk_set)
+    if key_columns is None:
+        if not pk_set:
+            raise HTTPException(
+                status_code=400,
+                detail="You must select at least one primary key column.",
+            )
+        missing_keys = sorted(pk_set - set(cols))
+        if missing_keys:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Primary key column(s) {', '.join(missing_keys)} not found in the file.",
+            )
+
+    if on_phase:
+        on_phase("loading")
+
+    if key_columns is None:
+        col_types = [field_to_pg_type(field) for field in arrow_schema]
+        # committed together with the load
+        create_table(table, build_create_columns(cols, col_types, pk_set), schema_name, commit=False)
+
+    copy_chunks = (_csv_chunk(batch) for batch in batches)
+    try:
+        if mode == "merge":
+            load = merge_rows_bulk(
+                table,
+                cols,
+                None,
+                key_columns or [c for c in cols if c in pk_set],
+                schema_name,
+                on_progress=on_progress,
+                copy_chunks=copy_chunks,
+                copy_format="csv",
+            )
+        else:
+            load = insert_rows_bulk(
+                table,
+                cols,
+                None,
+                schema_name,
+                on_progress=on_progress,
+                copy_chunks=copy_chunks,
+                copy_format="csv",
+            )
+    except (psycopg2.DataError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e).strip())
+    if key_columns is None:
+        # The CREATE was committed by the load
+        invalidate_table_metadata(schema_name, table)
+
+    result = {
+        "success": True,
+        "table": table,
+        "mode": mode,
+        "rows": load["rows"],
+        "columns": len(cols),
+        "seconds": load["seconds"],
+        "rows_per_sec": load["rows_per_sec"],
+    }
+    if mode == "merge":
+        result.update(
+            inserted=load["inserted"],
+            updated=load["updated"],
+            unchanged=load["unchanged"],
+        )
+    return result
@@ -0,0 +1,291 @@
+"""
+Streaming CSV import.
+
+The upload is read as a text stream: types are inferred from the first
+`infer_rows` rows, then the sample plus the remaining rows are piped into
+COPY without ever holding the whole file in memory. Large seekable uploads
+are parsed in parallel by worker processes instead (see parallel_parse).
+In "merge" mode the rows are upserted into the existing table on its primary
+key.
+"""
+import csv
+import io
+import itertools
+import json
+import os
+import re
+import psycopg2
+from fastapi import HTTPException
+from python_ag_grid_backend.db_access.tables_operations import (
+    create_table,
+    insert_rows_bulk,
+    invalidate_table_metadata,
+    merge_rows_bulk,
+    get_table_columns,
+    get_primary_key_columns,
+    encode_copy_row,
+)
+from python_ag_grid_backend.importers.parallel_parse import (
+    should_parse_in_parallel,
+    first_record_end,
+    parallel_map_chunks,
+)
+from python_ag_grid_backend.importers.type_inference import (
+    infer_column_types,
+    column_converters,
+)
+
+DEFAULT_INFER_ROWS = 1000
+# The whole sample is held in memory before COPY starts
+MAX_INFER_ROWS = int(os.getenv("MAX_INFER_ROWS", "100000"))
+IMPORT_MODES = ("create", "merge")
+
+
+def sanitize_identifier(name: str) -> str:
+    s = re.sub(r"\W+", "_", name).strip("_").lower()
+    if s == "":
+        s = "col"
+    if re.match(r"^\d", s):
+        s = f"c_{s}"
+    return s
+
+
+def parse_primary_keys(primary_keys: str | None) -> set:
+    """Accept a JSON array or a comma-separated string of column names."""
+    if not primary_keys:
+        return set()
+    try:
+        # Try to parse as JSON array first
+        pk_list = json.loads(primary_keys)
+        if not isinstance(pk_list, list):
+            raise ValueError
+        return set([sanitize_identifier(pk) for pk in pk_list])
+    except Exception:
+        # Fallback: comma-separated string
+        return set(
+            [
+                sanitize_identifier(pk.strip())
+                for pk in primary_keys.split(",")
+                if pk.strip()
+            ]
+        )
+
+
+def align_row(row, ncols, converters=None):
+    """
+    Extend or trim a raw CSV row to `ncols` cells, turning empty cells into NULL
+    and applying any per-column converters ({index: function}).
+    """
+    aligned = [
+        (cell if cell != "" else None)
+        for cell in (row + [""] * ncols)[:ncols]
+    ]
+    if converters:
+        for i, convert in converters.items():
+            aligned[i] = convert(aligned[i])
+    return aligned
+
+
+def encode_csv_chunk(data: bytes, ncols, converters=None):
+    """
+    Parse a chunk of whole CSV records into COPY text (runs in parse workers).
+    Returns (bytes, row_count).
+    """
+    rows = csv.reader(io.StringIO(data.decode("utf-8"), newline=""))
+    lines = [encode_copy_row(align_row(row, ncols, converters)) for row in rows if row]
+    if not lines:
+        return b"", 0
+    return ("\n".join(lines) + "\n").encode("utf-8"), len(lines)
+
+
+def build_create_columns(cols, col_types, pk_set):
+    """Column definitions in the shape create_table() expects."""
+    return [
+        {
+            "name": name,
+            "type": typ,
+            "isPrimary": "true" if name in pk_set else "false",
+        }
+        for name, typ in zip(cols, col_types)
+    ]
+
+
+def open_csv_text(fileobj):
+    """Wrap a binary file object as a UTF-8 (BOM-tolerant) text stream for csv.reader."""
+    return io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+
+
+def resolve_merge_target(table, schema_name, cols, pk_set):
+    """
+    Column types and key of an existing import target, or (None, None) if the
+    table doesn't exist yet. Raises 400 when the CSV can't be merged into it.
+    """
+    existing = get_table_columns(table, schema_name)
+    if not existing:
+        return None, None
+    unknown = [c for c in cols if c not in existing]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Column(s) {', '.join(unknown)} do not exist in table '{table}'.",
+        )
+    key_columns = get_primary_key_columns(table, schema_name)
+    if not key_columns:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Table '{table}' has no primary key to merge on.",
+        )
+    if pk_set and pk_set != set(key_columns):
+        raise HTTPException(
+            status_code=400,
+            detail=(
+                f"Primary key of '{table}' is ({', '.join(key_columns)}); "
+                "merge uploads must use the same key."
+            ),
+        )
+    # format_type() names match the inferred names once upper-cased (INTERVAL, DATE, ...)
+    return [existing[c].upper() for c in cols], key_columns
+
+
+def import_csv_stream(
+    fileobj,
+    schema_name: str,
+    table_name: str,
+    primary_keys: str | None = None,
+    infer_rows: int = DEFAULT_INFER_ROWS,
+    mode: str = "create",
+    on_progress=None,
+    on_phase=None,
+    parallel_parse: bool = True,
+):
+    """
+    Create `table_name` from a CSV stream and load every row with COPY.
+
+    fileobj: binary file object positioned at the start of the CSV
+    mode: "create" inserts every row (duplicate keys fail the import);
+          "merge" upserts on the table's primary key, creating the table first
+          if needed, and reports inserted/updated/unchanged counts
+    on_progress(rows_done): optional callback during the load
+    on_phase(name): optional callback when the load starts ("loading")
+    parallel_parse: allow worker-process parsing of large seekable files (set
+                    False for streams where seeking is expensive, e.g. zip entries)
+    """
+    if mode not in IMPORT_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown import mode '{mode}' (expected one of {', '.join(IMPORT_MODES)}).",
+        )
+    # Large seekable uploads are parsed by worker processes, from just after the header
+    body_start = None
+    if parallel_parse and should_parse_in_parallel(fileobj):
+        start = fileobj.tell()
+        body_start = first_record_end(fileobj, start)
+        fileobj.seek(start)
+    text = open_csv_text(fileobj)
+    try:
+        reader = csv.reader(text)
+        headers = next(reader, None)
+        if not headers:
+            raise HTTPException(status_code=400, detail="CSV has no header row")
+
+        # sanitize column names
+        cols = [sanitize_identifier(h) for h in headers]
+        table = sanitize_identifier(table_name)
+
+        pk_set = parse_primary_keys(primary_keys)
+        col_types, key_columns = None, None
+        if mode == "merge":
+            col_types, key_columns = resolve_merge_target(table, schema_name, cols, pk_set)
+        if key_columns is None and not pk_set:
+            raise HTTPException(
+                status_code=400,
+                detail="You must select at least one primary key column.",
+            )
+        missing_keys = sorted(pk_set - set(cols))
+        if key_columns is None and missing_keys:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Primary key column(s) {', '.join(missing_keys)} not found in the CSV header.",
+            )
+
+        # infer types from a bounded sample only
+        sample = list(itertools.islice(reader, min(max(infer_rows, 1), MAX_INFER_ROWS)))
+        inferred = col_types is None
+        if inferred:
+            col_types = infer_column_types(sample, len(cols), cols)
+
+        if on_phase:
+            on_phase("loading")
+
+        if inferred:
+            # create table (create_table uses IF NOT EXISTS); committed together with the load
+            create_table(table, build_create_columns(cols, col_types, pk_set), schema_name, commit=False)
+
+        converters = column_converters(col_types)
+        if body_start is not None:
+            # the workers re-read the whole body (sample included) straight from the file
+            rows = None
+            copy_chunks = parallel_map_chunks(
+                fileobj, body_start, encode_csv_chunk, len(cols), converters
+            )
+        else:
+            # sample first, then the rest of the stream; blank lines are skipped
+            rows = (
+                align_row(row, len(cols), converters)
+                for row in itertools.chain(sample, reader)
+                if row
+            )
+            copy_chunks = None
+        try:
+            if mode == "merge":
+                load = merge_rows_bulk(
+                    table,
+                    cols,
+                    rows,
+                    key_columns or [c for c in cols if c in pk_set],
+                    schema_name,
+                    on_progress=on_progress,
+                    copy_chunks=copy_chunks,
+                )
+            else:
+                load = insert_rows_bulk(
+                    table,
+                    cols,
+                    rows,
+                    schema_name,
+                    on_progress=on_progress,
+                    copy_chunks=copy_chunks,
+                )
+        except psycopg2.DataError as e:
+            hint = (
+                f"column types were inferred from the first {len(sample)} rows; "
+                "retry with a larger infer_rows"
+                if inferred
+                else f"the values don't fit the column types of '{table}'"
+            )
+            raise HTTPException(status_code=400, detail=f"{str(e).strip()} ({hint})")
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if inferred:
+            # The CREATE was committed by the load
+            invalidate_table_metadata(schema_name, table)
+    finally:
+        # Don't let the wrapper close the caller's file object
+        text.detach()
+
+    result = {
+        "success": True,
+        "table": table,
+        "mode": mode,
+        "rows": load["rows"],
+        "columns": len(cols),
+        "seconds": load["seconds"],
+        "rows_per_sec": load["rows_per_sec"],
+    }
+    if mode == "merge":
+        result.update(
+            inserted=load["inserted"],
+            updated=load["updated"],
+            unchanged=load["unchanged"],
+        )
+    return result
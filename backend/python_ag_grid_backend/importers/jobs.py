@@ -0,0 +1,218 @@
+"""
+Background import jobs.
+
+Uploads are spooled to a temporary file and handed to a small worker pool so
+the HTTP request returns straight away; clients poll the job for its phase,
+progress and result, and can ask for it to be cancelled. Jobs live in memory
+of the process that accepted them and are forgotten `IMPORT_JOB_TTL` seconds
+after they finish.
+"""
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException
+from python_ag_grid_backend.database import connection_scope
+
+IMPORT_WORKERS = int(os.getenv("IMPORT_WORKERS", "2"))
+IMPORT_JOB_TTL = float(os.getenv("IMPORT_JOB_TTL", "3600"))
+
+# queued -> inferring -> loading -> done | failed | cancelled
+FINISHED_PHASES = ("done", "failed", "cancelled")
+
+
+class ImportCancelled(Exception):
+    pass
+
+
+class ImportJob:
+    def __init__(self, team_id: str, table_name: str | None, filename: str | None):
+        self.id = uuid.uuid4().hex
+        self.team_id = team_id
+        self.table_name = table_name
+        self.filename = filename
+        self.phase = "queued"
+        self.rows = 0
+        self.error = None
+        self.status_code = None
+        self.result = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self) -> bool:
+        return self.phase in FINISHED_PHASES
+
+    def set_phase(self, phase: str):
+        self.check_cancelled()
+        with self._lock:
+            if phase != "queued" and self.started_at is None:
+                self.started_at = time.time()
+            self.phase = phase
+
+    def report_rows(self, rows: int):
+        # Called from inside COPY's read loop: raising here aborts the COPY
+        self.check_cancelled()
+        with self._lock:
+            self.rows = rows
+
+    def request_cancel(self):
+        self.cancel_event.set()
+        with self._lock:
+            # Still waiting in the queue: it will never start
+            if self.phase == "queued":
+                self.phase = "cancelled"
+                self.error = "Import cancelled"
+                self.finished_at = time.time()
+
+    def check_cancelled(self):
+        if self.cancel_event.is_set():
+            raise ImportCancelled("Import cancelled")
+
+    def finish(self, phase: str, result=None, error=None, status_code=None):
+        with self._lock:
+            self.phase = phase
+            self.result = result
+            self.error = error
+            self.status_code = status_code
+            self.finished_at = time.time()
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            end = self.finished_at or time.time()
+            elapsed = end - self.started_at if self.started_at else 0.0
+            return {
+                "job_id": self.id,
+                "table": self.table_name,
+                "filename": self.filename,
+                "phase": self.phase,
+                "finished": self.finished,
+                "rows_processed": self.rows,
+                "seconds": round(elapsed, 3),
+                "rows_per_sec": round(self.rows / elapsed) if elapsed > 0 else 0,
+                "error": self.error,
+                "status_code": self.status_code,
+                "result": self.result,
+                "cancel_requested": self.cancel_event.is_set(),
+            }
+
+
+_jobs: dict[str, ImportJob] = {}
+_jobs_lock = threading.Lock()
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=IMPORT_WORKERS, thread_name_prefix="import"
+                )
+    return _executor
+
+
+def shutdown_jobs():
+    """Cancel outstanding jobs and stop the worker pool (app shutdown)."""
+    global _executor
+    with _jobs_lock:
+        for job in _jobs.values():
+            if not job.finished:
+                job.request_cancel()
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True, cancel_futures=True)
+            _executor = None
+
+
+def _prune_finished():
+    cutoff = time.time() - IMPORT_JOB_TTL
+    with _jobs_lock:
+        for job_id in [
+            j.id for j in _jobs.values() if j.finished and j.finished_at < cutoff
+        ]:
+            del _jobs[job_id]
+
+
+def spool_upload(fileobj):
+    """Copy an upload into a temporary file the job owns (the request's copy is closed after the response)."""
+    spooled = tempfile.TemporaryFile()
+    try:
+        shutil.copyfileobj(fileobj, spooled, 1024 * 1024)
+        spooled.seek(0)
+    except Exception:
+        spooled.close()
+        raise
+    return spooled
+
+
+def _run(job: ImportJob, spooled, work):
+    try:
+        job.set_phase("inferring")
+        # One connection for the whole job, so steps that defer their commit share the transaction
+        with connection_scope():
+            result = work(spooled, job)
+        if job.cancel_event.is_set() and not result.get("success", True):
+            # Multi-table work reports per-table failures instead of raising; keep its partial report
+            job.finish("cancelled", result=result, error="Import cancelled")
+        else:
+            job.finish("done", result=result)
+    except Exception as e:
+        if job.cancel_event.is_set():
+            # Cancellation surfaces as whatever the driver wraps it in; the transaction was rolled back
+            job.finish("cancelled", error="Import cancelled")
+        elif isinstance(e, HTTPException):
+            job.finish("failed", error=e.detail, status_code=e.status_code)
+        else:
+            job.finish("failed", error=str(e), status_code=500)
+    finally:
+        spooled.close()
+
+
+def submit_import(team_id: str, table_name: str | None, filename: str | None, spooled, work) -> ImportJob:
+    """
+    Queue `work(spooled_file, job)` on the import pool. `work` should call
+    job.set_phase()/job.report_rows() as it goes and return the import result.
+    """
+    _prune_finished()
+    job = ImportJob(team_id, table_name, filename)
+    with _jobs_lock:
+        _jobs[job.id] = job
+    try:
+        _get_executor().submit(_run, job, spooled, work)
+    except Exception:
+        with _jobs_lock:
+            _jobs.pop(job.id, None)
+        spooled.close()
+        raise
+    return job
+
+
+def get_job(job_id: str, team_id: str) -> ImportJob:
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+    # Other teams' jobs are reported as missing, not forbidden
+    if job is None or job.team_id != team_id:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job
+
+
+def list_jobs(team_id: str) -> list[dict]:
+    with _jobs_lock:
+        jobs = [j for j in _jobs.values() if j.team_id == team_id]
+    return [j.to_dict() for j in sorted(jobs, key=lambda j: j.created_at, reverse=True)]
+
+
+def cancel_job(job_id: str, team_id: str) -> ImportJob:
+    job = get_job(job_id, team_id)
+    if not job.finished:
+        job.request_cancel()
+    return job
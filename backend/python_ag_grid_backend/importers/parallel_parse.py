@@ -0,0 +1,130 @@
+"""
+Parallel parsing of large delimited uploads.
+
+The file (any seekable binary file object, e.g. the spooled upload) is read
+in record-aligned chunks of about `PARSE_CHUNK_BYTES`. Each chunk is parsed by
+a worker process and the results come back in file order through a bounded
+window of in-flight chunks, so memory stays at roughly `2 * PARSE_WORKERS`
+chunks whatever the file size.
+
+A chunk may only end on a newline outside a quoted field: with CSV quoting,
+the number of '"' bytes before a position is even exactly when the position
+is outside quotes, and every chunk starts on a record boundary.
+"""
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", str(min(os.cpu_count() or 1, 8))))
+PARSE_CHUNK_BYTES = int(os.getenv("PARSE_CHUNK_BYTES", str(4 * 1024 * 1024)))
+# Smaller files are parsed inline: starting workers and shipping chunks costs more than it saves
+PARALLEL_PARSE_MIN_BYTES = int(os.getenv("PARALLEL_PARSE_MIN_BYTES", str(16 * 1024 * 1024)))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # spawn, not fork: a forked child would inherit (and on exit close) pooled DB sockets
+                _pool = ProcessPoolExecutor(
+                    max_workers=PARSE_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _pool
+
+
+def shutdown_parse_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def should_parse_in_parallel(fileobj) -> bool:
+    if PARSE_WORKERS < 2 or not fileobj.seekable():
+        return False
+    position = fileobj.tell()
+    size = fileobj.seek(0, os.SEEK_END)
+    fileobj.seek(position)
+    return size - position >= PARALLEL_PARSE_MIN_BYTES
+
+
+def first_record_end(fileobj, start: int = 0) -> int:
+    """Byte offset just past the first record (e.g. the header row) at or after `start`."""
+    fileobj.seek(start)
+    data = b""
+    while True:
+        block = fileobj.read(64 * 1024)
+        if not block:
+            return start + len(data)
+        # Earlier blocks had no record end; only search the new bytes
+        newline = len(data) - 1
+        data += block
+        while True:
+            newline = data.find(b"\n", newline + 1)
+            if newline < 0:
+                break
+            if data.count(b'"', 0, newline) % 2 == 0:
+                return start + newline + 1
+
+
+def _last_record_end(data: bytes) -> int:
+    """Offset just past the last newline in `data` that is outside quotes (0 if none)."""
+    total_quotes = data.count(b'"')
+    newline = len(data)
+    while True:
+        newline = data.rfind(b"\n", 0, newline)
+        if newline < 0:
+            return 0
+        # Count the (short) suffix rather than the whole prefix
+        if (total_quotes - data.count(b'"', newline)) % 2 == 0:
+            return newline + 1
+
+
+def iter_record_chunks(fileobj, start: int, chunk_bytes: int = PARSE_CHUNK_BYTES):
+    """Yield the bytes of the file from `start` in chunks that each hold whole records."""
+    fileobj.seek(start)
+    carry = b""
+    while True:
+        block = fileobj.read(chunk_bytes)
+        if not block:
+            if carry:
+                yield carry
+            return
+        data = carry + block if carry else block
+        cut = _last_record_end(data)
+        if cut == 0:
+            # A single record longer than the chunk size: keep reading
+            carry = data
+            continue
+        yield data[:cut]
+        carry = data[cut:]
+
+
+def parallel_map_chunks(fileobj, start: int, func, *args, window: int | None = None):
+    """
+    Yield func(chunk_bytes, *args) for every record-aligned chunk of the file
+    after byte `start`, in file order. `func` must be a picklable module-level
+    function. At most `window` chunks are in flight at any time.
+    """
+    pool = _get_pool()
+    window = window or PARSE_WORKERS * 2
+    pending = deque()
+    try:
+        for chunk in iter_record_chunks(fileobj, start):
+            pending.append(pool.submit(func, chunk, *args))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        # Consumer stopped early (error or cancellation): drop the queued work
+        for future in pending:
+            future.cancel()
@@ -0,0 +1,137 @@
+"""
+Column-wise type inference for imported text data.
+
+Each sampled column is de-duplicated first, and its distinct values are then
+classified in one batch: every candidate type is a single line-anchored regex
+run over the newline-joined values (with NumPy for the length checks), so the
+per-cell work happens in C rather than in Python try/except loops.
+"""
+import re
+import numpy as np
+
+TEXT_TYPE = "VARCHAR(1024)"
+MAX_VARCHAR = 1024
+
+_BOOLEAN_TOKENS = frozenset(["true", "false", "t", "f", "yes", "no", "y", "n", "0", "1"])
+_NUMERIC_BOOLEAN_TOKENS = frozenset(["0", "1"])
+
+_DATE = r"(?:\d{4}-(?:0[1-9]|1[0-2])-(?:0[1-9]|[12]\d|3[01])|(?:0?[1-9]|1[0-2])/(?:0?[1-9]|[12]\d|3[01])/\d{4})"
+_TIME = r"(?:[01]?\d|2[0-3]):[0-5]\d(?::[0-5]\d(?:\.\d+)?)?"
+_TZ = r"(?:Z|[+-](?:[01]\d|2[0-3])(?::?[0-5]\d)?)"
+
+_PATTERNS = {
+    "integer": r"[+-]?\d+",
+    "decimal": r"[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?",
+    "long_decimal": r"[+-]?(?:\d\.?){16,}",  # more significant digits than a double holds
+    "date": _DATE,
+    "timestamp": _DATE + r"[T ]" + _TIME + _TZ + "?",
+    "timestamptz": _DATE + r"[T ]" + _TIME + _TZ,
+    # Times of day: HH:MM with a zero-padded hour, or H:MM:SS, hours 0-23.
+    # An unpadded "7:05" or "0:30" reads as a game clock (minutes:seconds).
+    "time": r"(?:[01]\d|2[0-3]):[0-5]\d|(?:[01]?\d|2[0-3]):[0-5]\d:[0-5]\d(?:\.\d+)?",
+    # Game clocks (M:SS, MM:SS.s), H:MM:SS durations and ISO 8601 durations.
+    # Chosen when some value can't be a time of day: an unpadded or above-23
+    # first field ("7:05", "48:00"), fractional MM:SS.s, or an ISO duration.
+    "interval": r"\d+:[0-5]\d(?:\.\d+)?|\d+:[0-5]\d:[0-5]\d(?:\.\d+)?|P(?!$)(?:\d+Y)?(?:\d+M)?(?:\d+W)?(?:\d+D)?(?:T(?=\d)(?:\d+H)?(?:\d+M)?(?:\d+(?:\.\d+)?S)?)?",
+}
+_REGEXES = {name: re.compile(rf"^(?:{p})$", re.MULTILINE) for name, p in _PATTERNS.items()}
+
+_INT32_MAX = 2**31 - 1
+_INT64_MAX = 2**63 - 1
+_CLOCK_MMSS = re.compile(r"^\d+:[0-5]\d$")
+# Column names that make "12:00" a duration even when every value is a valid time of day
+_DURATION_NAME = re.compile(r"(?:^|_)(?:clock|time_left|time_remaining|toi|time_on_ice|duration|minutes)(?:_|$)")
+
+
+def _all_match(name, joined, count):
+    return len(_REGEXES[name].findall(joined)) == count
+
+
+def _any_match(name, joined):
+    return _REGEXES[name].search(joined) is not None
+
+
+def _integer_type(distinct):
+    # Only values long enough to overflow int32 need an exact check
+    lengths = np.char.str_len(np.char.lstrip(distinct, "+-"))
+    candidates = distinct[lengths >= 10]
+    if candidates.size == 0:
+        return "INTEGER"
+    largest = max(abs(int(v)) for v in candidates.tolist())
+    if largest <= _INT32_MAX:
+        return "INTEGER"
+    if largest <= _INT64_MAX:
+        return "BIGINT"
+    return "NUMERIC"
+
+
+def infer_type(values, name=None) -> str:
+    """
+    Postgres type for one column given its raw string values ('' = NULL).
+    `name` is the (sanitized) column name, used to tell game clocks from times of day.
+    """
+    # De-duplicate before doing any per-value work: sampled sports data is
+    # dominated by repeated team names, positions, flags and small numbers
+    distinct = {v.strip() for v in set(values)}
+    distinct.discard("")
+    if not distinct:
+        return TEXT_TYPE
+
+    if len(distinct) <= len(_BOOLEAN_TOKENS):
+        lowered = {v.lower() for v in distinct}
+        # A column of only 0/1 is more likely a count or id than a flag
+        if lowered <= _BOOLEAN_TOKENS and not lowered <= _NUMERIC_BOOLEAN_TOKENS:
+            return "BOOLEAN"
+
+    distinct = np.array(list(distinct), dtype=str)
+    longest = int(np.char.str_len(distinct).max())
+    joined = "\n".join(distinct.tolist())
+    count = distinct.size
+    # Multi-line cells would be split by the anchored regexes; they can only be text
+    if count == joined.count("\n") + 1:
+        if _all_match("integer", joined, count):
+            return _integer_type(distinct)
+        if _all_match("decimal", joined, count):
+            return "NUMERIC" if _any_match("long_decimal", joined) else "FLOAT"
+        if _all_match("date", joined, count):
+            return "DATE"
+        if _all_match("timestamp", joined, count):
+            return "TIMESTAMPTZ" if _any_match("timestamptz", joined) else "TIMESTAMP"
+        # "19:30" is a kickoff time, not 19 minutes 30 seconds, unless the column is a clock
+        is_duration = name is not None and _DURATION_NAME.search(name.lower()) is not None
+        if not is_duration and _all_match("time", joined, count):
+            return "TIME"
+        if _all_match("interval", joined, count):
+            return "INTERVAL"
+
+    return TEXT_TYPE if longest <= MAX_VARCHAR else "TEXT"
+
+
+def infer_column_types(sample_rows, ncols, names=None):
+    """
+    Postgres column types for `ncols` columns from a sample of raw CSV rows.
+    `names` (optional) are the column names, passed on to infer_type.
+    """
+    if not sample_rows:
+        return [TEXT_TYPE] * ncols
+    padded = [
+        row if len(row) == ncols else (row + [""] * ncols)[:ncols]
+        for row in sample_rows
+    ]
+    names = names or [None] * ncols
+    return [infer_type(column, name) for column, name in zip(zip(*padded), names)]
+
+
+def clock_to_interval(value):
+    """
+    Postgres reads 'MM:SS' as hours:minutes; in a column inferred as INTERVAL
+    (see infer_type) it is a game clock, i.e. minutes:seconds.
+    """
+    if value is not None and _CLOCK_MMSS.match(value.strip()):
+        return "00:" + value.strip()
+    return value
+
+
+def column_converters(col_types):
+    """{column index: converter} for the columns whose raw text needs rewriting before COPY."""
+    return {i: clock_to_interval for i, typ in enumerate(col_types) if typ == "INTERVAL"}
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 class TableRowUpdateRequest(BaseModel):
     data: dict
@@ -11,6 +11,20 @@ class TableRowAddRequest(BaseModel):
 class TableRowDeleteRequest(BaseModel):
     data: dict
 
+class TableRowsRequest(BaseModel):
+    # AG Grid server-side / infinite row model request
+    startRow: int = 0
+    endRow: int = 100
+    sortModel: List[Dict[str, str]] = []  # [{"colId": "points", "sort": "desc"}, ...]
+    filterModel: Dict[str, Any] = {}
+    cursor: Optional[List[Any]] = None  # nextCursor from the previous block (keyset paging)
+
+class TableTransactionRequest(BaseModel):
+    # AG Grid transaction shape; update/remove rows must carry the primary key
+    add: List[Dict[str, Any]] = []
+    update: List[Dict[str, Any]] = []
+    remove: List[Dict[str, Any]] = []
+
 class CreateTableRequest(BaseModel):
     table_name: str
     columns: List[Dict[str, str]]  # [{"name": "id", "type": "SERIAL PRIMARY KEY"}, ...]
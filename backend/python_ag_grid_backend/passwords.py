@@ -0,0 +1,112 @@
+# passwords.py
+"""
+Argon2 password hashing on a small dedicated thread pool.
+
+Hashing is deliberately slow (tens of milliseconds and ARGON2_MEMORY_COST KiB
+per call), so async handlers must not run it on the event loop, and a burst of
+logins must not take over the shared threadpool either. Calls run on
+PASSWORD_HASH_WORKERS threads (argon2 releases the GIL while hashing). Up to
+PASSWORD_HASH_QUEUE more wait their turn. Anything beyond that is turned away
+with a 503 instead of queueing without bound.
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "3"))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", "65536"))  # KiB
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "4"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(os.cpu_count() or 1, 4))))
+PASSWORD_HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", "32"))
+
+# Existing hashes keep verifying after the parameters change: they are stored in the hash
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    argon2__time_cost=ARGON2_TIME_COST,
+    argon2__memory_cost=ARGON2_MEMORY_COST,
+    argon2__parallelism=ARGON2_PARALLELISM,
+)
+
+_pool = None
+_pool_lock = threading.Lock()
+_state_lock = threading.Lock()
+_in_flight = 0
+_rejected = 0
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(
+                    max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+                )
+    return _pool
+
+
+def shutdown_password_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def get_password_pool_stats() -> dict:
+    with _state_lock:
+        return {
+            "workers": PASSWORD_HASH_WORKERS,
+            "queue": PASSWORD_HASH_QUEUE,
+            "in_flight": _in_flight,
+            "rejected": _rejected,
+        }
+
+
+def hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def verify_password(plain: str, hashed: str) -> bool:
+    return pwd_context.verify(plain, hashed)
+
+
+def _release_slot(future=None):
+    global _in_flight
+    with _state_lock:
+        _in_flight -= 1
+
+
+async def _run_bounded(func, *args):
+    global _in_flight, _rejected
+    with _state_lock:
+        if _in_flight >= PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE:
+            _rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Too many sign-ins in progress, please retry in a moment.",
+                headers={"Retry-After": "1"},
+            )
+        _in_flight += 1
+    try:
+        future = _get_pool().submit(func, *args)
+    except BaseException:
+        _release_slot()
+        raise
+    # Released when the hash itself finishes (or is dropped from the queue): a
+    # cancelled caller doesn't stop a hash that is already running
+    future.add_done_callback(_release_slot)
+    return await asyncio.wrap_future(future)
+
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_bounded(hash_password, password)
+
+
+async def verify_password_async(plain: str, hashed: str) -> bool:
+    return await _run_bounded(verify_password, plain, hashed)
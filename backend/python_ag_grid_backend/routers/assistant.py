@@ -11,11 +11,16 @@ from langchain.messages import (
 )
 from typing import Any, Callable, Dict, Mapping, Sequence, Optional
 from pydantic import BaseModel
-from .login import get_current_user, UserPublic, get_current_team_id
-from .tables import get_schema_name_for_team
-from ..db_access.tables_operations import get_all_tables_metadata
+from .login import AuthContext, get_auth_context, get_current_team_id
+from ..cache import LRUCache
+from ..chatbot_backend.table_ranker import SchemaCatalog
+from ..db_access.teams_operations import get_schema_name_for_team_async
+from ..db_access.tables_operations import get_schema_version
+from ..db_access import async_tables_operations as async_ops
 from langsmith import traceable
 import json
+import os
+import time
 import uuid
 
 
@@ -61,24 +66,46 @@ class ChatPayload(BaseModel):
 router = APIRouter()
 
 
-def build_tables_description_from_schema(schema_name: str) -> str:
-    """Build a text description of all tables in a schema for the AI assistant."""
-    tables_metadata = get_all_tables_metadata(schema_name)
+# (schema_name, schema version) -> SchemaCatalog. A new version is a new key,
+# so entries never go stale; the TTL bounds how long changes made outside
+# this process (another worker, psql) go unseen.
+_schema_catalogs = LRUCache(
+    maxsize=int(os.getenv("SCHEMA_DESCRIPTION_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("SCHEMA_DESCRIPTION_CACHE_TTL", "300")),
+)
+_catalog_build_seconds = 0.0
+
+
+async def build_schema_catalog(schema_name: str) -> SchemaCatalog:
+    """
+    Table descriptions of a schema for the AI assistant (cached per schema
+    version). Tables and columns are sorted so the prompt text is
+    byte-identical between turns.
+    """
+    global _catalog_build_seconds
+    key = (schema_name, get_schema_version(schema_name))
+    catalog = _schema_catalogs.get(key)
+    if catalog is not None:
+        return catalog
+
+    started = time.perf_counter()
+    # Planner row estimates: exact counts would scan every table on each miss
+    tables_metadata = await async_ops.get_all_tables_metadata(schema_name)
+    catalog = SchemaCatalog(schema_name, tables_metadata)
+    _catalog_build_seconds += time.perf_counter() - started
+
+    _schema_catalogs.discard_where(lambda k: k[0] == schema_name)
+    _schema_catalogs.set(key, catalog)
+    return catalog
 
-    description = f"Available tables in schema '{schema_name}':\n\n"
-    for table in tables_metadata:
-        description += (
-            f"- {table['key']} ({table['columns']} columns, {table['rows']} rows)\n"
-        )
-        for col in table["columnsDef"]:
-            description += f"  • {col['field']}: {col['type']}\n"
 
-    return description
+def get_schema_description_cache_stats() -> dict:
+    return {**_schema_catalogs.stats(), "build_seconds": round(_catalog_build_seconds, 3)}
 
 
-async def get_schema_description(team_id: str = Depends(get_current_team_id)):
-    schema_name = get_schema_name_for_team(team_id)
-    return build_tables_description_from_schema(schema_name)
+async def get_schema_catalog(team_id: str = Depends(get_current_team_id)) -> SchemaCatalog:
+    schema_name = await get_schema_name_for_team_async(team_id)
+    return await build_schema_catalog(schema_name)
 
 
 @traceable(name="sports_analytics_agent", run_type="llm")
@@ -115,8 +142,8 @@ async def delete_thread_checkpoint(memory, thread_id: str):
 async def assistant(
     payload: ChatPayload,
     request: Request,
-    currentUser: UserPublic = Depends(get_current_user),
-    tablesDescription: str = Depends(get_schema_description),
+    auth: AuthContext = Depends(get_auth_context),
+    schemaCatalog: SchemaCatalog = Depends(get_schema_catalog),
 ):
 
     app = request.app
@@ -133,7 +160,7 @@ async def assistant(
 
     # Scope thread by User ID - for now
 
-    user_id = currentUser.username
+    user_id = auth.user.username
     thread_id = f"user_{user_id}"
     user_message = payload.messages[-1].parts[-1].text
 
@@ -144,7 +171,7 @@ async def assistant(
     # messages: Annotated[list, "Chat history"]
     input_state = {"messages": [{"role": "user", "content": user_message}]}
 
-    # print(tablesDescription)
+    # print(schemaCatalog.description)
 
     async def chunk_stream():
         stream_id = ""
@@ -161,7 +188,12 @@ async def assistant(
                 agent=agent,
                 input_state=input_state,
                 thread_id=thread_id,
-                context={"tablesDescription": tablesDescription}
+                # The prompt picks the relevant tables from the catalog on every model call
+                context={
+                    "tablesDescription": schemaCatalog.description,
+                    "schemaCatalog": schemaCatalog,
+                    "teamId": auth.team_id,
+                }
             ):
                 # msg = chunk[1][0]
                 # meta_data = chunk[1][1]
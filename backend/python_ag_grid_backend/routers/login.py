@@ -13,8 +13,9 @@ from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from pydantic import BaseModel, Field
 import uuid
 from jose import jwt, JWTError
-from passlib.context import CryptContext
-from python_ag_grid_backend.database import init_db, get_user, create_user, get_connection
+from starlette.concurrency import run_in_threadpool
+from python_ag_grid_backend.database import init_db, get_user, get_user_profile, create_user, get_connection
+from python_ag_grid_backend.passwords import hash_password_async, verify_password_async
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
@@ -25,7 +26,6 @@ SECRET_KEY = "CHANGE_ME_IN_PRODUCTION"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
 
@@ -42,20 +42,17 @@ class UserPublic(BaseModel):
     full_name: Optional[str] = None
 
 
+class AuthContext(BaseModel):
+    user: UserPublic
+    team_id: Optional[str] = None
+
+
 class Token(BaseModel):
     access_token: str
     token_type: str = "bearer"
 
 
 # Helper functions (Security)
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
-
-
-def verify_password(plain: str, hashed: str) -> bool:
-    return pwd_context.verify(plain, hashed)
-
-
 def create_access_token(
     data: dict, expires_minutes: int = ACCESS_TOKEN_EXPIRE_MINUTES
 ) -> str:
@@ -65,56 +62,62 @@ def create_access_token(
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-def authenticate_user(username: str, password: str) -> Optional[dict]:
-    user = get_user(username)
-    if not user or not verify_password(password, user["hashed_password"]):
+async def authenticate_user(username: str, password: str) -> Optional[dict]:
+    user = await run_in_threadpool(get_user, username)
+    if not user or not await verify_password_async(password, user["hashed_password"]):
         return None
     return user
 
 
-# dependency extracting current user from token
-async def get_current_user(token: str = Depends(oauth2_scheme)) -> UserPublic:
-    cred_exc = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+# dependency decoding the JWT. FastAPI caches dependency results per request,
+# so every auth dependency below shares one decode.
+async def get_token_payload(token: str = Depends(oauth2_scheme)) -> dict:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: Optional[str] = payload.get("sub")
-        if username is None:
-            raise cred_exc
     except JWTError:
-        raise cred_exc
+        raise _credentials_exception()
+    if payload.get("sub") is None:
+        raise _credentials_exception()
+    return payload
 
-    user = get_user(username)
+
+# dependency extracting current user from token
+async def get_current_user(payload: dict = Depends(get_token_payload)) -> UserPublic:
+    user = await get_user_profile(payload["sub"])
     if not user:
-        raise cred_exc
+        raise _credentials_exception()
     return UserPublic(username=user["username"], full_name=user.get("full_name"))
 
 
 # dependency extracting current team from token
-def get_current_team_id(token: str = Depends(oauth2_scheme)) -> str:
+async def get_current_team_id(payload: dict = Depends(get_token_payload)) -> str:
     """Extract current_team_id from JWT token."""
-    cred_exc = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        team_id: Optional[str] = payload.get("current_team_id")
-        if team_id is None:
-            raise cred_exc
-        return team_id
-    except JWTError:
-        raise cred_exc
+    team_id: Optional[str] = payload.get("current_team_id")
+    if team_id is None:
+        raise _credentials_exception()
+    return team_id
+
+
+# dependency for endpoints that need both the user and their current team
+async def get_auth_context(
+    user: UserPublic = Depends(get_current_user),
+    payload: dict = Depends(get_token_payload),
+) -> AuthContext:
+    return AuthContext(user=user, team_id=payload.get("current_team_id"))
 
 
 @router.post("/register", status_code=201, response_model=Token, summary="Create a new user")
-def register_user(body: UserCreate):
-    hashed = hash_password(body.password)
-    create_user(body.username, hashed, body.full_name or "")
+async def register_user(body: UserCreate):
+    hashed = await hash_password_async(body.password)
+    await run_in_threadpool(create_user, body.username, hashed, body.full_name or "")
     
     # DISABLED: Admin account creation flow - security vulnerability fix
     # If this registration requests admin mapping, link (or create) a team mapped to the 'public' schema
@@ -159,27 +162,29 @@ def register_user(body: UserCreate):
     return {"access_token": access_token, "token_type": "bearer"}
 
 
+def _first_team(username: str) -> Optional[dict]:
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT team_id FROM users_teams
+                WHERE user_id = %s
+                ORDER BY created_at ASC
+                LIMIT 1
+                """,
+                (username,)
+            )
+            return cur.fetchone()
+
+
 @router.post("/login", response_model=Token)
 async def login(form_data: OAuth2PasswordRequestForm = Depends()):
-    user = authenticate_user(form_data.username, form_data.password)
+    user = await authenticate_user(form_data.username, form_data.password)
     if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     # Get user's first team (auto-select first created team)
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(
-        """
-        SELECT team_id FROM users_teams
-        WHERE user_id = %s
-        ORDER BY created_at ASC
-        LIMIT 1
-        """,
-        (form_data.username,)
-    )
-    team_row = cur.fetchone()
-    cur.close()
-    conn.close()
+    team_row = await run_in_threadpool(_first_team, form_data.username)
     
     # If user has no teams, return JWT without current_team_id
     # ProtectedRoute will redirect to /create-first-team
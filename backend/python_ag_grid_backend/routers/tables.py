@@ -1,61 +1,64 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.responses import StreamingResponse, Response
+from starlette.concurrency import run_in_threadpool
 from python_ag_grid_backend.models.models import (
     TableRowUpdateRequest,
     TableRowAddRequest,
     TableRowDeleteRequest,
     CreateTableRequest,
+    TableRowsRequest,
+    TableTransactionRequest,
 )
 from python_ag_grid_backend.db_access.tables_operations import (
-    get_table_data,
-    get_all_tables_metadata,
-    add_table_row,
-    update_table_row,
-    delete_table_row,
+    get_table_columns,
+    iter_table_data,
+    iter_copy_csv,
+    build_select_query,
+    apply_table_transaction,
     create_table,
     delete_table,
-    get_primary_key_column,
+)
+# Plain reads and single-row writes run on the async pool and hold no worker thread
+from python_ag_grid_backend.db_access import async_tables_operations as async_ops
+from python_ag_grid_backend.db_access.arrow_format import (
+    ARROW_STREAM_MEDIA_TYPE,
+    PARQUET_MEDIA_TYPE,
+    wants_arrow,
+    arrow_stream,
+    parquet_stream,
+    arrow_bytes,
 )
 import os
+import json
+import zlib
+import datetime
+import decimal
 from python_ag_grid_backend.routers.login import get_current_team_id, get_current_user, UserPublic
-from python_ag_grid_backend.database import get_connection
+from python_ag_grid_backend.db_access.teams_operations import (
+    get_schema_name_for_team,
+    get_schema_name_for_team_async,
+)
 
 router = APIRouter()
 # TODO:  handle edge cases for endpoints and add delete row endpoint
 
-
-def get_schema_name_for_team(team_id: str) -> str:
-    """Query the teams table to get schema_name for a given team_id."""
-    try:
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute("SELECT schema_name FROM teams WHERE team_id = %s", (team_id,))
-        result = cur.fetchone()
-        cur.close()
-        conn.close()
-        
-        if not result:
-            raise HTTPException(status_code=404, detail="Team not found")
-        
-        return result["schema_name"]
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to get team schema: {str(e)}")
+STREAM_BATCH_SIZE = int(os.getenv("TABLE_STREAM_BATCH_SIZE", "5000"))
 
 
 @router.get("/get-tables")
-def get_tables_metadata(team_id: str = Depends(get_current_team_id)):
+async def get_tables_metadata(exact_counts: bool = False, team_id: str = Depends(get_current_team_id)):
     try:
-        schema_name = get_schema_name_for_team(team_id)
-        return get_all_tables_metadata(schema_name)
+        schema_name = await get_schema_name_for_team_async(team_id)
+        return await async_ops.get_all_tables_metadata(schema_name, exact_counts)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/admin/list-all")
-def admin_list_all_tables(current_user: UserPublic = Depends(get_current_user)):
+async def admin_list_all_tables(exact_counts: bool = False, current_user: UserPublic = Depends(get_current_user)):
     """Admin-only endpoint: list all tables across all non-system schemas with row counts.
 
+    Row counts are planner estimates unless `exact_counts=true` is passed.
     Admins are determined by the `ADMIN_USERS` environment variable (comma-separated usernames).
     """
     # Simple admin check via environment variable
@@ -64,30 +67,7 @@ def admin_list_all_tables(current_user: UserPublic = Depends(get_current_user)):
         raise HTTPException(status_code=403, detail="Admin privileges required")
 
     try:
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute(
-            """
-            SELECT table_schema, table_name
-            FROM information_schema.tables
-            WHERE table_type = 'BASE TABLE'
-            AND table_schema NOT IN ('pg_catalog', 'information_schema')
-            """
-        )
-        tables = cur.fetchall()
-
-        result = []
-        for t in tables:
-            schema = t["table_schema"]
-            table = t["table_name"]
-            # Note: COUNT(*) can be expensive for very large tables
-            cur.execute(f'SELECT COUNT(*) FROM "{schema}"."{table}"')
-            rows = cur.fetchone()["count"]
-            result.append({"schema": schema, "table": table, "rows": rows})
-
-        cur.close()
-        conn.close()
-        return result
+        return await async_ops.list_all_tables(exact_counts)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -113,50 +93,273 @@ def delete_table_endpoint(table_name: str, team_id: str = Depends(get_current_te
 
 
 @router.get("/primary-key/{table_name}")
-def get_primary_key_endpoint(table_name: str, team_id: str = Depends(get_current_team_id)):
+async def get_primary_key_endpoint(table_name: str, team_id: str = Depends(get_current_team_id)):
     try:
-        schema_name = get_schema_name_for_team(team_id)
-        primary_key = get_primary_key_column(table_name, schema_name)
-        return {"primary_key": primary_key}
+        schema_name = await get_schema_name_for_team_async(team_id)
+        primary_keys = await async_ops.get_primary_key_columns(table_name, schema_name)
+        return {
+            "primary_key": primary_keys[0] if primary_keys else None,
+            "primary_keys": list(primary_keys),
+        }
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.post("/{table_name}")
-def add_table_row_endpoint(table_name: str, row: TableRowAddRequest, team_id: str = Depends(get_current_team_id)):
+async def add_table_row_endpoint(table_name: str, row: TableRowAddRequest, team_id: str = Depends(get_current_team_id)):
     try:
-        schema_name = get_schema_name_for_team(team_id)
-        new_row = add_table_row(table_name, row.data, schema_name)
+        schema_name = await get_schema_name_for_team_async(team_id)
+        new_row = await async_ops.add_table_row(table_name, row.data, schema_name)
         return {"success": True, "row": new_row}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@router.get("/{table_name}")
-def get_table_endpoint(table_name: str, team_id: str = Depends(get_current_team_id)):
+@router.post("/{table_name}/transaction")
+def table_transaction_endpoint(
+    table_name: str,
+    req: TableTransactionRequest,
+    team_id: str = Depends(get_current_team_id),
+):
+    """Apply an AG Grid add/update/remove transaction atomically and return the affected rows."""
     try:
         schema_name = get_schema_name_for_team(team_id)
-        data = get_table_data(table_name, schema_name)
+        result = apply_table_transaction(table_name, req.add, req.update, req.remove, schema_name)
+        return {"success": True, **result}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/{table_name}")
+async def get_table_endpoint(table_name: str, request: Request, team_id: str = Depends(get_current_team_id)):
+    try:
+        schema_name = await get_schema_name_for_team_async(team_id)
+        if wants_arrow(request.headers.get("accept")):
+            if not await async_ops.get_table_columns(table_name, schema_name):
+                raise HTTPException(status_code=404, detail=f"Table '{table_name}' not found")
+            return _arrow_response(table_name, schema_name, STREAM_BATCH_SIZE)
+        data = await async_ops.get_table_data(table_name, schema_name)
         return data
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.put("/{table_name}")
-def update_table_row_endpoint(table_name: str, req: TableRowUpdateRequest, team_id: str = Depends(get_current_team_id)):
+@router.post("/{table_name}/rows")
+async def get_table_rows_endpoint(
+    table_name: str,
+    req: TableRowsRequest,
+    request: Request,
+    team_id: str = Depends(get_current_team_id),
+):
+    """
+    Paged, sorted and filtered rows for AG Grid's server-side / infinite row model.
+    With an Arrow Accept header the block is returned as Arrow IPC and the
+    paging info moves to the X-Last-Row / X-Next-Cursor headers.
+    """
+    try:
+        schema_name = await get_schema_name_for_team_async(team_id)
+        as_arrow = wants_arrow(request.headers.get("accept"))
+        result = await async_ops.get_table_rows(
+            table_name,
+            req.startRow,
+            req.endRow,
+            req.sortModel,
+            req.filterModel,
+            req.cursor,
+            schema_name,
+            tuples=as_arrow,
+        )
+        if not as_arrow:
+            return result
+        # Arrow encoding is CPU-bound; keep it off the event loop
+        content = await run_in_threadpool(arrow_bytes, result["description"], result["rows"])
+        return Response(
+            content=content,
+            media_type=ARROW_STREAM_MEDIA_TYPE,
+            headers={
+                "X-Last-Row": str(result["lastRow"]),
+                "X-Next-Cursor": json.dumps(result["nextCursor"], default=_json_default),
+            },
+        )
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _json_default(value):
+    # Same conversions FastAPI's encoder applies to psycopg2 values
+    if isinstance(value, (datetime.date, datetime.datetime, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, datetime.timedelta):
+        return value.total_seconds()
+    return str(value)
+
+
+def _ndjson_chunks(batches):
+    """First line is {"columns": [...]}, then one JSON object per row."""
+    yield json.dumps({"columns": [desc[0] for desc in next(batches)]}) + "\n"
+    for rows in batches:
+        yield "".join(json.dumps(row, default=_json_default) + "\n" for row in rows)
+
+
+def _json_chunks(batches):
+    """Same document shape as GET /{table_name}, written incrementally."""
+    yield '{"columns": ' + json.dumps([desc[0] for desc in next(batches)]) + ', "rows": ['
+    first = True
+    for rows in batches:
+        chunk = ",".join(json.dumps(row, default=_json_default) for row in rows)
+        if not first:
+            chunk = "," + chunk
+        first = False
+        yield chunk
+    yield "]}"
+
+
+def _arrow_chunks(batches):
+    description = next(batches)
+    yield from arrow_stream(description, batches)
+
+
+def _arrow_response(table_name, schema_name, batch_size):
+    # The generator must not start inside the handler: it has to borrow its own
+    # connection rather than the request-scoped one released at response start
+    batches = iter_table_data(table_name, schema_name, batch_size, tuples=True)
+    return StreamingResponse(_arrow_chunks(batches), media_type=ARROW_STREAM_MEDIA_TYPE)
+
+
+@router.get("/{table_name}/stream")
+def stream_table_endpoint(
+    table_name: str,
+    request: Request,
+    format: str | None = Query(None, pattern="^(ndjson|json|arrow)$"),
+    batch_size: int = Query(STREAM_BATCH_SIZE, ge=1, le=50000),
+    team_id: str = Depends(get_current_team_id),
+):
+    """
+    Stream a whole table without materialising it in memory, as NDJSON
+    (default), chunked JSON, or Arrow IPC (format=arrow or an Arrow Accept header).
+    """
     try:
         schema_name = get_schema_name_for_team(team_id)
-        updated_row = update_table_row(table_name, req.data, schema_name)
+        # Fail with a proper status code before the response has started
+        if not get_table_columns(table_name, schema_name):
+            raise HTTPException(status_code=404, detail=f"Table '{table_name}' not found")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if format == "arrow" or (format is None and wants_arrow(request.headers.get("accept"))):
+        return _arrow_response(table_name, schema_name, batch_size)
+    batches = iter_table_data(table_name, schema_name, batch_size)
+    if format == "json":
+        return StreamingResponse(_json_chunks(batches), media_type="application/json")
+    return StreamingResponse(_ndjson_chunks(batches), media_type="application/x-ndjson")
+
+
+def _gzip_chunks(chunks):
+    # wbits=31: gzip container, so the download opens with any gunzip
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _parquet_chunks(batches):
+    description = next(batches)
+    yield from parquet_stream(description, batches)
+
+
+def _parse_model_param(value, name):
+    if not value:
+        return None
+    try:
+        return json.loads(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{name} must be JSON.")
+
+
+@router.get("/{table_name}/export")
+def export_table_endpoint(
+    table_name: str,
+    format: str = Query("csv", pattern="^(csv|parquet)$"),
+    compression: str | None = Query(None, pattern="^gzip$"),
+    sort_model: str | None = Query(None, alias="sortModel"),
+    filter_model: str | None = Query(None, alias="filterModel"),
+    batch_size: int = Query(STREAM_BATCH_SIZE, ge=1, le=50000),
+    team_id: str = Depends(get_current_team_id),
+):
+    """
+    Download a table (or the grid's filtered/sorted view of it) as a file.
+
+    - format=csv: COPY (SELECT ...) TO STDOUT, streamed as it is produced
+      (compression=gzip for a .csv.gz)
+    - format=parquet: one row group per `batch_size` rows
+    - sortModel / filterModel: JSON, same shape as POST /{table_name}/rows
+
+    Server memory stays constant whatever the table size.
+    """
+    try:
+        schema_name = get_schema_name_for_team(team_id)
+        # Fail with a proper status code before the response has started
+        if not get_table_columns(table_name, schema_name):
+            raise HTTPException(status_code=404, detail=f"Table '{table_name}' not found")
+        query = build_select_query(
+            table_name,
+            _parse_model_param(sort_model, "sortModel"),
+            _parse_model_param(filter_model, "filterModel"),
+            schema_name,
+        )
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    # As with /stream, the generators only borrow their connection once the response starts
+    if format == "parquet":
+        chunks = _parquet_chunks(iter_table_data(table_name, schema_name, batch_size, tuples=True, query=query))
+        media_type, filename = PARQUET_MEDIA_TYPE, f"{table_name}.parquet"
+    else:
+        chunks = iter_copy_csv(query)
+        media_type, filename = "text/csv", f"{table_name}.csv"
+        if compression == "gzip":
+            chunks = _gzip_chunks(chunks)
+            media_type, filename = "application/gzip", filename + ".gz"
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.put("/{table_name}")
+async def update_table_row_endpoint(table_name: str, req: TableRowUpdateRequest, team_id: str = Depends(get_current_team_id)):
+    try:
+        schema_name = await get_schema_name_for_team_async(team_id)
+        updated_row = await async_ops.update_table_row(table_name, req.data, schema_name)
         return {"success": True, "row": updated_row}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
     
 
 @router.delete("/{table_name}")
-def delete_table_row_endpoint(table_name: str, req: TableRowDeleteRequest, team_id: str = Depends(get_current_team_id)):
+async def delete_table_row_endpoint(table_name: str, req: TableRowDeleteRequest, team_id: str = Depends(get_current_team_id)):
     try:
-        schema_name = get_schema_name_for_team(team_id)
-        delete_table_row(table_name, req.data, schema_name)
+        schema_name = await get_schema_name_for_team_async(team_id)
+        await async_ops.delete_table_row(table_name, req.data, schema_name)
         return {"success": True, "message": f"Row with primary key '{req.data}' deleted from table '{table_name}'."}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -1,7 +1,9 @@
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
-from python_ag_grid_backend.database import get_connection
+from python_ag_grid_backend.database import get_async_connection
 from python_ag_grid_backend.db_access.tables_operations import create_schema
+from python_ag_grid_backend.db_access.teams_operations import invalidate_team_schema
 from python_ag_grid_backend.routers.login import get_current_team_id, get_current_user
 import uuid
 import hashlib
@@ -75,19 +77,16 @@ def create_access_token(data: dict, expires_minutes: int = ACCESS_TOKEN_EXPIRE_M
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-def validate_user_team_access(username: str, team_id: str) -> bool:
+async def validate_user_team_access(username: str, team_id: str) -> bool:
     """Check if user is a member of the team."""
     try:
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute(
-            "SELECT 1 FROM users_teams WHERE user_id = %s AND team_id = %s",
-            (username, team_id)
-        )
-        exists = cur.fetchone() is not None
-        cur.close()
-        conn.close()
-        return exists
+        async with get_async_connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    "SELECT 1 FROM users_teams WHERE user_id = %s AND team_id = %s",
+                    (username, team_id)
+                )
+                return await cur.fetchone() is not None
     except:
         return False
 
@@ -97,7 +96,7 @@ def validate_user_team_access(username: str, team_id: str) -> bool:
 # -------------------------
 
 @router.post("/create-team", response_model=Token)
-def create_team(req: CreateTeamRequest, current_user = Depends(get_current_user)):
+async def create_team(req: CreateTeamRequest, current_user = Depends(get_current_user)):
     """
     Create a new team with metadata and schema.
     Generates UUID for team_id, derives schema_name from team_name + UUID hash.
@@ -112,38 +111,34 @@ def create_team(req: CreateTeamRequest, current_user = Depends(get_current_user)
         schema_name = generate_schema_name(req.team_name, str(team_id))
         
         # Validate schema name uniqueness
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute("SELECT 1 FROM teams WHERE schema_name = %s", (schema_name,))
-        if cur.fetchone():
-            cur.close()
-            conn.close()
-            raise HTTPException(status_code=400, detail="Schema name collision (retry)")
-        
-        # Insert team into teams table
-        cur.execute(
-            """
-            INSERT INTO teams (team_id, team_name, sport_type, schema_name, description)
-            VALUES (%s, %s, %s, %s, %s)
-            """,
-            (str(team_id), req.team_name, req.sport_type, schema_name, req.description)
-        )
-        conn.commit()
-        
-        # Link user to team in users_teams
-        cur.execute(
-            """
-            INSERT INTO users_teams (user_id, team_id)
-            VALUES (%s, %s)
-            """,
-            (username, str(team_id))
-        )
-        conn.commit()
-        cur.close()
-        conn.close()
+        async with get_async_connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute("SELECT 1 FROM teams WHERE schema_name = %s", (schema_name,))
+                if await cur.fetchone():
+                    raise HTTPException(status_code=400, detail="Schema name collision (retry)")
+
+                # Insert team into teams table
+                await cur.execute(
+                    """
+                    INSERT INTO teams (team_id, team_name, sport_type, schema_name, description)
+                    VALUES (%s, %s, %s, %s, %s)
+                    """,
+                    (str(team_id), req.team_name, req.sport_type, schema_name, req.description)
+                )
+                await conn.commit()
+
+                # Link user to team in users_teams
+                await cur.execute(
+                    """
+                    INSERT INTO users_teams (user_id, team_id)
+                    VALUES (%s, %s)
+                    """,
+                    (username, str(team_id))
+                )
+                await conn.commit()
         
         # Create PostgreSQL schema
-        create_schema(schema_name)
+        await run_in_threadpool(create_schema, schema_name)
         
         # Generate token with new team as current_team_id
         access_token = create_access_token({"sub": username, "current_team_id": str(team_id)})
@@ -157,7 +152,7 @@ def create_team(req: CreateTeamRequest, current_user = Depends(get_current_user)
 
 
 @router.post("/set-current-team/{team_id}", response_model=Token)
-def set_current_team(team_id: str, current_user = Depends(get_current_user)):
+async def set_current_team(team_id: str, current_user = Depends(get_current_user)):
     """
     Switch user's current team. Validates membership and returns new JWT with updated current_team_id.
     en
@@ -166,7 +161,7 @@ def set_current_team(team_id: str, current_user = Depends(get_current_user)):
     username = current_user.username
     try:
         # Validate user has access to this team
-        if not validate_user_team_access(username, team_id):
+        if not await validate_user_team_access(username, team_id):
             raise HTTPException(status_code=403, detail="Access denied to this team")
         
         # Generate new token with updated current_team_id
@@ -181,7 +176,7 @@ def set_current_team(team_id: str, current_user = Depends(get_current_user)):
 
 
 @router.get("/user-teams")
-def get_user_teams(current_user = Depends(get_current_user)):
+async def get_user_teams(current_user = Depends(get_current_user)):
     """
     Fetch all teams for the current user with metadata.
     
@@ -189,27 +184,25 @@ def get_user_teams(current_user = Depends(get_current_user)):
     """
     username = current_user.username
     try:
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute(
-            """
-            SELECT 
-                t.team_id as id,
-                t.team_name as name,
-                t.sport_type,
-                t.schema_name,
-                t.description,
-                t.creation_date
-            FROM teams t
-            JOIN users_teams ut ON t.team_id = ut.team_id
-            WHERE ut.user_id = %s
-            ORDER BY t.creation_date ASC
-            """,
-            (username,)
-        )
-        teams = cur.fetchall()
-        cur.close()
-        conn.close()
+        async with get_async_connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    """
+                    SELECT 
+                        t.team_id as id,
+                        t.team_name as name,
+                        t.sport_type,
+                        t.schema_name,
+                        t.description,
+                        t.creation_date
+                    FROM teams t
+                    JOIN users_teams ut ON t.team_id = ut.team_id
+                    WHERE ut.user_id = %s
+                    ORDER BY t.creation_date ASC
+                    """,
+                    (username,)
+                )
+                teams = await cur.fetchall()
         
         return {
             "success": True,
@@ -220,7 +213,7 @@ def get_user_teams(current_user = Depends(get_current_user)):
 
 
 @router.delete("/delete-team/{team_id}")
-def delete_team(team_id: str, current_user = Depends(get_current_user)):
+async def delete_team(team_id: str, current_user = Depends(get_current_user)):
     """
     Delete a team (removes from teams table and users_teams).
     Note: Does NOT delete the schema - use CASCADE parameter if needed.
@@ -230,16 +223,15 @@ def delete_team(team_id: str, current_user = Depends(get_current_user)):
     username = current_user.username
     try:
         # Validate user has access to this team
-        if not validate_user_team_access(username, team_id):
+        if not await validate_user_team_access(username, team_id):
             raise HTTPException(status_code=403, detail="Access denied to this team")
         
         # Delete from teams table (cascades to users_teams via FK)
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute("DELETE FROM teams WHERE team_id = %s", (team_id,))
-        conn.commit()
-        cur.close()
-        conn.close()
+        async with get_async_connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute("DELETE FROM teams WHERE team_id = %s", (team_id,))
+                await conn.commit()
+        invalidate_team_schema(team_id)
 
         return {
             "success": True,
@@ -1,35 +1,37 @@
+from functools import partial
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Depends
-import csv, io, itertools
-import json
-from python_ag_grid_backend.db_access.tables_operations import (
-    create_table,
-    insert_rows_bulk,
+from fastapi.responses import JSONResponse
+from python_ag_grid_backend.importers.csv_import import (
+    DEFAULT_INFER_ROWS,
+    MAX_INFER_ROWS,
+    import_csv_stream,
+)
+from python_ag_grid_backend.importers.archive_import import import_zip_archive
+from python_ag_grid_backend.importers.arrow_import import import_arrow_stream
+from python_ag_grid_backend.importers.jobs import (
+    spool_upload,
+    submit_import,
+    get_job,
+    list_jobs,
+    cancel_job,
 )
 from python_ag_grid_backend.routers.login import get_current_team_id
-from python_ag_grid_backend.database import get_connection
-import re
+from python_ag_grid_backend.db_access.teams_operations import get_schema_name_for_team
 
 router = APIRouter()
 
 
-def get_schema_name_for_team(team_id: str) -> str:
-    """Query the teams table to get schema_name for a given team_id."""
-    try:
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute("SELECT schema_name FROM teams WHERE team_id = %s", (team_id,))
-        result = cur.fetchone()
-        cur.close()
-        conn.close()
-        
-        if not result:
-            raise HTTPException(status_code=404, detail="Team not found")
-        
-        return result["schema_name"]
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to get team schema: {str(e)}")
+def _run_csv_import(schema_name, base_name, primary_keys, infer_rows, mode, fileobj, job):
+    return import_csv_stream(
+        fileobj,
+        schema_name,
+        base_name,
+        primary_keys=primary_keys,
+        infer_rows=infer_rows,
+        mode=mode,
+        on_progress=job.report_rows,
+        on_phase=job.set_phase,
+    )
 
 
 @router.post("/import-csv")
@@ -37,156 +39,185 @@ def import_csv(
     file: UploadFile = File(...),
     primary_keys: str = Form(None),
     table_name: str | None = Form(None),
-    infer_rows: int = Form(50),
+    infer_rows: int = Form(DEFAULT_INFER_ROWS, ge=1, le=MAX_INFER_ROWS),
+    mode: str = Form("create"),
+    background: bool = Form(True),
     team_id: str = Depends(get_current_team_id),
 ):
     """
     POST multipart/form-data:
       - file: csv file
       - table_name (optional): desired table name; fallback to filename
-      - infer_rows (optional): how many rows to sample to infer types
+      - infer_rows (optional): how many rows to sample to infer types (1 to MAX_INFER_ROWS)
+      - mode (optional): "create" (default) inserts every row; "merge" upserts
+        on the table's primary key and reports inserted/updated/unchanged rows
+      - background (optional, default true): queue the import and return a
+        job id right away (202); poll GET /jobs/{job_id} for progress.
+        With false the import runs inside the request and returns its result.
+
+    The file is streamed: memory use does not grow with the file size.
     """
     try:
         # Get schema for current team 
         schema_name = get_schema_name_for_team(team_id)
-        
-        content = file.file.read()
-        text = content.decode("utf-8-sig")
-        reader = csv.reader(io.StringIO(text))
-        headers = next(reader, None)
-        if not headers:
-            raise HTTPException(status_code=400, detail="CSV has no header row")
-
-        # sanitize column names
-        cols = [sanitize_identifier(h) for h in headers]
 
         # optionally table name from form or filename
         base_name = table_name or (
             file.filename.rsplit(".", 1)[0] if file.filename else "imported_table"
         )
-        table = sanitize_identifier(base_name)
-
-        # Parse primary_keys from form
-        if primary_keys:
-            try:
-                # Try to parse as JSON array first
-                pk_list = json.loads(primary_keys)
-                if not isinstance(pk_list, list):
-                    raise ValueError
-                pk_set = set([sanitize_identifier(pk) for pk in pk_list])
-            except Exception:
-                # Fallback: comma-separated string
-                pk_set = set(
-                    [
-                        sanitize_identifier(pk.strip())
-                        for pk in primary_keys.split(",")
-                        if pk.strip()
-                    ]
-                )
-        else:
-            pk_set = set()
-
-        if not pk_set:
-            raise HTTPException(
-                status_code=400,
-                detail="You must select at least one primary key column.",
+        if not background:
+            return import_csv_stream(
+                file.file,
+                schema_name,
+                base_name,
+                primary_keys=primary_keys,
+                infer_rows=infer_rows,
+                mode=mode,
+            )
+
+        job = submit_import(
+            team_id,
+            base_name,
+            file.filename,
+            spool_upload(file.file),
+            partial(_run_csv_import, schema_name, base_name, primary_keys, infer_rows, mode),
+        )
+        return JSONResponse(status_code=202, content=job.to_dict())
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _run_arrow_import(schema_name, base_name, primary_keys, mode, fileobj, job):
+    return import_arrow_stream(
+        fileobj,
+        schema_name,
+        base_name,
+        primary_keys=primary_keys,
+        mode=mode,
+        on_progress=job.report_rows,
+        on_phase=job.set_phase,
+    )
+
+
+@router.post("/import-parquet")
+def import_parquet(
+    file: UploadFile = File(...),
+    primary_keys: str = Form(None),
+    table_name: str | None = Form(None),
+    mode: str = Form("create"),
+    background: bool = Form(True),
+    team_id: str = Depends(get_current_team_id),
+):
+    """
+    POST multipart/form-data:
+      - file: Parquet file, or Arrow IPC file/stream
+      - table_name, primary_keys, mode, background: as for /import-csv
+
+    Column types come from the file's schema; no type inference is done.
+    """
+    try:
+        schema_name = get_schema_name_for_team(team_id)
+        base_name = table_name or (
+            file.filename.rsplit(".", 1)[0] if file.filename else "imported_table"
+        )
+        if not background:
+            return import_arrow_stream(
+                file.file,
+                schema_name,
+                base_name,
+                primary_keys=primary_keys,
+                mode=mode,
             )
 
-        all_rows = list(reader)
-
-        # inference helpers
-        def infer_type(values):
-            has_float = False
-            for v in values:
-                if v is None or v == "":
-                    continue
-                v = v.strip()
-                if v.lower() in ("true", "false", "t", "f", "0", "1"):
-                    continue
-                try:
-                    int(v)
-                    continue
-                except:
-                    try:
-                        float(v)
-                        has_float = True
-                        continue
-                    except:
-                        return "VARCHAR(1024)"
-            if has_float:
-                return "FLOAT"
-            return "INTEGER"
-
-        # build column types using all rows for accurate inference
-        transposed = (
-            list(zip(*([row + [""] * (len(cols) - len(row)) for row in all_rows])))
-            if all_rows
-            else [[] for _ in cols]
+        job = submit_import(
+            team_id,
+            base_name,
+            file.filename,
+            spool_upload(file.file),
+            partial(_run_arrow_import, schema_name, base_name, primary_keys, mode),
         )
-        col_types = []
-        for i, col in enumerate(cols):
-            values = transposed[i] if i < len(transposed) else []
-            # if values empty -> default VARCHAR
-            if not any(v.strip() for v in values):
-                col_types.append("VARCHAR(1024)")
-            else:
-                inferred = infer_type(values)
-                # treat booleans separately
-                if all(
-                    (
-                        v.strip().lower() in ("true", "false", "t", "f", "0", "1")
-                        or v.strip() == ""
-                    )
-                    for v in values
-                ):
-                    col_types.append("BOOLEAN")
-                else:
-                    col_types.append(inferred)
-
-        # prepare create_table columns definition for create_table(table_name, columns)
-        create_cols = [
-            {
-                "name": name,
-                "type": typ,
-                "isPrimary": "true" if name in pk_set else "false",
-            }
-            for name, typ in zip(cols, col_types)
-        ]
-
-        # create table (create_table uses IF NOT EXISTS)
-        create_table(table, create_cols, schema_name)
-
-        # prepare rows aligned to columns and convert empty to None
-        rows_to_insert = []
-        for row in all_rows:
-            # extend or trim to match cols length
-            row_aligned = [
-                (cell if cell != "" else None)
-                for cell in (row + [""] * len(cols))[: len(cols)]
-            ]
-            rows_to_insert.append(row_aligned)
-
-        # insert in batches to avoid huge single executemany
-        batch_size = 500
-        for i in range(0, len(rows_to_insert), batch_size):
-            insert_rows_bulk(table, cols, rows_to_insert[i : i + batch_size], schema_name)
-
-        return {
-            "success": True,
-            "table": table,
-            "rows": len(rows_to_insert),
-            "columns": len(cols),
-        }
+        return JSONResponse(status_code=202, content=job.to_dict())
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-def sanitize_identifier(name: str) -> str:
-    s = re.sub(r"\W+", "_", name).strip("_").lower()
-    if s == "":
-        s = "col"
-    if re.match(r"^\d", s):
-        s = f"c_{s}"
-    return s
+def _run_zip_import(schema_name, primary_keys, infer_rows, mode, parallelism, fileobj, job):
+    return import_zip_archive(
+        fileobj,
+        schema_name,
+        primary_keys=primary_keys,
+        infer_rows=infer_rows,
+        mode=mode,
+        parallelism=parallelism,
+        on_progress=job.report_rows,
+        on_phase=job.set_phase,
+    )
+
+
+@router.post("/import-zip")
+def import_zip(
+    file: UploadFile = File(...),
+    primary_keys: str | None = Form(None),
+    infer_rows: int = Form(DEFAULT_INFER_ROWS, ge=1, le=MAX_INFER_ROWS),
+    mode: str = Form("create"),
+    parallelism: int | None = Form(None, ge=1),
+    background: bool = Form(True),
+    team_id: str = Depends(get_current_team_id),
+):
+    """
+    POST multipart/form-data:
+      - file: zip archive of csv files; each becomes a table named after the file
+      - primary_keys (optional): JSON object {"players": ["id"], ...};
+        tables not listed use an "id" column
+      - infer_rows, mode, background: as for /import-csv
+      - parallelism (optional): how many tables load at once, at most
+        ARCHIVE_IMPORT_PARALLELISM and DB_POOL_MAX - 1
+
+    Returns one report with a result (or error) per table.
+    """
+    try:
+        schema_name = get_schema_name_for_team(team_id)
+        if not background:
+            return import_zip_archive(
+                file.file,
+                schema_name,
+                primary_keys=primary_keys,
+                infer_rows=infer_rows,
+                mode=mode,
+                parallelism=parallelism,
+            )
+
+        job = submit_import(
+            team_id,
+            None,
+            file.filename,
+            spool_upload(file.file),
+            partial(_run_zip_import, schema_name, primary_keys, infer_rows, mode, parallelism),
+        )
+        return JSONResponse(status_code=202, content=job.to_dict())
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/jobs")
+def get_import_jobs(team_id: str = Depends(get_current_team_id)):
+    """Import jobs of the current team, newest first."""
+    return list_jobs(team_id)
+
+
+@router.get("/jobs/{job_id}")
+def get_import_job(job_id: str, team_id: str = Depends(get_current_team_id)):
+    """Phase, rows processed, throughput, error and (when done) result of an import job."""
+    return get_job(job_id, team_id).to_dict()
+
+
+@router.post("/jobs/{job_id}/cancel")
+def cancel_import_job(job_id: str, team_id: str = Depends(get_current_team_id)):
+    """Ask a queued or running import to stop; its transaction is rolled back."""
+    return cancel_job(job_id, team_id).to_dict()
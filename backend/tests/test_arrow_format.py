@@ -0,0 +1,95 @@
+from collections import namedtuple
+from decimal import Decimal
+import io
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+from python_ag_grid_backend.db_access.arrow_format import (
+    NUMERIC_FIELD_METADATA,
+    arrow_bytes,
+    build_schema,
+    numeric_arrow_type,
+    parquet_stream,
+)
+
+# Shape of a psycopg2 cursor.description entry, as far as arrow_format cares
+Column = namedtuple("Column", "name type_code precision scale")
+
+
+def _read_stream(data: bytes) -> pa.Table:
+    return ipc.open_stream(io.BytesIO(data)).read_all()
+
+
+def test_numeric_arrow_type():
+    assert numeric_arrow_type(20, 2) == pa.decimal128(20, 2)
+    assert numeric_arrow_type(38, 0) == pa.decimal128(38, 0)
+    assert numeric_arrow_type(50, 10) == pa.decimal256(50, 10)
+    # unconstrained: psycopg2 reports 65535/65535, psycopg None/None
+    assert numeric_arrow_type(65535, 65535) == pa.string()
+    assert numeric_arrow_type(None, None) == pa.string()
+    assert numeric_arrow_type(100, 2) == pa.string()
+
+
+def test_constrained_numeric_keeps_every_digit():
+    description = [Column("amount", 1700, 20, 2)]
+    rows = [(Decimal("12345678901234567.89"),), (None,), (Decimal("-0.01"),)]
+
+    table = _read_stream(arrow_bytes(description, rows))
+
+    assert table.schema.field("amount").type == pa.decimal128(20, 2)
+    assert table.column("amount").to_pylist() == [r[0] for r in rows]
+
+
+def test_wide_numeric_uses_decimal256():
+    value = Decimal("1234567890123456789012345678901234567890.1234567890")
+    table = _read_stream(arrow_bytes([Column("big", 1700, 50, 10)], [(value,)]))
+
+    assert table.schema.field("big").type == pa.decimal256(50, 10)
+    assert table.column("big").to_pylist() == [value]
+
+
+def test_unconstrained_numeric_is_a_tagged_string():
+    description = [Column("ratio", 1700, 65535, 65535)]
+    rows = [(Decimal("0.333333333333333333333333333333"),), (Decimal("1"),), (Decimal("1"),)]
+
+    table = _read_stream(arrow_bytes(description, rows))
+    field = table.schema.field("ratio")
+
+    # not dictionary-encoded even though the values repeat
+    assert field.type == pa.string()
+    assert field.metadata == NUMERIC_FIELD_METADATA
+    assert table.column("ratio").to_pylist() == ["0.333333333333333333333333333333", "1", "1"]
+
+
+def test_non_finite_numeric_becomes_null():
+    table = _read_stream(arrow_bytes([Column("x", 1700, 10, 2)], [(Decimal("NaN"),), (Decimal("1.50"),)]))
+
+    assert table.column("x").to_pylist() == [None, Decimal("1.50")]
+
+
+def test_text_columns_are_dictionary_encoded_when_repetitive():
+    description = [Column("team", 25, None, None), Column("id", 23, None, None)]
+    rows = [("Lakers", 1), ("Lakers", 2), ("Celtics", 3), ("Lakers", 4)]
+
+    schema = build_schema(description, rows)
+
+    assert pa.types.is_dictionary(schema.field("team").type)
+    assert schema.field("id").type == pa.int32()
+
+
+def test_json_columns_are_serialized():
+    table = _read_stream(arrow_bytes([Column("doc", 3802, None, None)], [({"a": 1},), (None,)]))
+
+    assert table.column("doc").to_pylist() == ['{"a": 1}', None]
+
+
+def test_parquet_stream_writes_one_row_group_per_batch():
+    description = [Column("amount", 1700, 12, 3)]
+    batches = [[(Decimal("1.234"),), (Decimal("2.000"),)], [(Decimal("3.500"),)]]
+
+    parquet = pq.ParquetFile(io.BytesIO(b"".join(parquet_stream(description, iter(batches)))))
+
+    assert parquet.metadata.num_row_groups == 2
+    assert parquet.read().column("amount").to_pylist() == [Decimal("1.234"), Decimal("2.000"), Decimal("3.500")]
@@ -0,0 +1,27 @@
+from python_ag_grid_backend.db_access.tables_operations import CopyRowsReader, encode_copy_row
+
+ROWS = [(i, f"player {i}", None) for i in range(25)]
+EXPECTED = "".join(encode_copy_row(row) + "\n" for row in ROWS)
+
+
+def test_sized_reads_return_every_row_once():
+    progress = []
+    reader = CopyRowsReader(ROWS, chunk_rows=10, on_progress=progress.append)
+    parts = []
+    while data := reader.read(7):
+        assert len(data) <= 7
+        parts.append(data)
+    assert "".join(parts) == EXPECTED
+    assert reader.rows_read == 25
+    assert progress == [10, 20, 25]
+
+
+def test_read_all_after_partial_read():
+    reader = CopyRowsReader(ROWS, chunk_rows=10)
+    head = reader.read(5)
+    assert head + reader.read() == EXPECTED
+    assert reader.read(5) == ""
+
+
+def test_empty_rows():
+    assert CopyRowsReader([]).read(8192) == ""
@@ -0,0 +1,49 @@
+"""Parquet export (arrow_format) read back by the Parquet import (arrow_import)."""
+from collections import namedtuple
+from decimal import Decimal
+import io
+
+from python_ag_grid_backend.db_access.arrow_format import parquet_stream
+from python_ag_grid_backend.importers.arrow_import import (
+    _csv_chunk,
+    field_to_pg_type,
+    open_record_batches,
+)
+
+Column = namedtuple("Column", "name type_code precision scale")
+
+
+def _export(description, rows) -> io.BytesIO:
+    return io.BytesIO(b"".join(parquet_stream(description, iter([rows]))))
+
+
+def test_numeric_columns_round_trip_exactly():
+    description = [
+        Column("id", 20, None, None),
+        Column("salary", 1700, 20, 2),
+        Column("wide", 1700, 50, 10),
+        Column("ratio", 1700, 65535, 65535),
+        Column("name", 25, None, None),
+    ]
+    rows = [
+        (1, Decimal("12345678901234567.89"), Decimal("1234567890123456789012345678901234567890.1234567890"),
+         Decimal("0.333333333333333333333333333333"), "Bird"),
+        (2, None, None, None, "Magic"),
+    ]
+
+    schema, batches = open_record_batches(_export(description, rows))
+
+    assert [field_to_pg_type(f) for f in schema] == [
+        "BIGINT",
+        "NUMERIC(20,2)",
+        "NUMERIC(50,10)",
+        "NUMERIC",
+        "TEXT",
+    ]
+    data, count = _csv_chunk(next(iter(batches)))
+    assert count == 2
+    assert data.decode().splitlines() == [
+        '1,12345678901234567.89,1234567890123456789012345678901234567890.1234567890,'
+        '"0.333333333333333333333333333333","Bird"',
+        '2,,,,"Magic"',
+    ]
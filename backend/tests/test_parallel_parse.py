@@ -0,0 +1,73 @@
+import csv
+import io
+
+import pytest
+
+from python_ag_grid_backend.importers.csv_import import encode_csv_chunk
+from python_ag_grid_backend.importers.parallel_parse import first_record_end, iter_record_chunks
+
+HEADER = b'id,name,note\n'
+BODY = (
+    b'1,Bird,"multi\nline\nnote"\n'
+    b'2,"Johnson, Magic","says ""hi""\n"\n'
+    b'3,Jordan,\n'
+    b'4,"\xc3\x89mile",plain\n'
+)
+
+
+def _rows(data: bytes):
+    return [row for row in csv.reader(io.StringIO(data.decode("utf-8"), newline="")) if row]
+
+
+@pytest.mark.parametrize("chunk_bytes", [1, 2, 3, 5, 8, 13, 64, 4096])
+def test_chunks_hold_whole_records(chunk_bytes):
+    chunks = list(iter_record_chunks(io.BytesIO(HEADER + BODY), len(HEADER), chunk_bytes))
+
+    assert b"".join(chunks) == BODY
+    # each chunk parses on its own into complete records, in file order
+    assert [row for chunk in chunks for row in _rows(chunk)] == _rows(BODY)
+    # a multi-byte character is never split (chunks end on a newline)
+    for chunk in chunks:
+        chunk.decode("utf-8")
+
+
+def test_last_record_without_trailing_newline():
+    data = HEADER + b'1,a,"x\ny"\n2,b,z'
+
+    chunks = list(iter_record_chunks(io.BytesIO(data), len(HEADER), 4))
+
+    assert chunks[-1].endswith(b"2,b,z")
+    assert [row for chunk in chunks for row in _rows(chunk)] == [["1", "a", "x\ny"], ["2", "b", "z"]]
+
+
+def test_first_record_end_skips_quoted_newlines():
+    data = b'"id","na\nme"\n1,2\n'
+    assert first_record_end(io.BytesIO(data)) == data.index(b"1,2")
+
+
+def test_first_record_end_with_bom():
+    data = b"\xef\xbb\xbf" + HEADER + BODY
+    assert first_record_end(io.BytesIO(data)) == 3 + len(HEADER)
+
+
+def test_first_record_end_from_an_offset_and_at_eof():
+    data = b"junk" + HEADER + b"1,a,b"
+    assert first_record_end(io.BytesIO(data), 4) == 4 + len(HEADER)
+    # header only, no newline: the whole file is the first record
+    assert first_record_end(io.BytesIO(b"id,name")) == len(b"id,name")
+
+
+def test_first_record_end_across_read_blocks():
+    # header longer than one 64 KiB read, with a quoted newline near the block edge
+    header = b'"' + b"a" * (64 * 1024 - 2) + b'\nb",c\n'
+    assert first_record_end(io.BytesIO(header + b"1,2\n")) == len(header)
+
+
+def test_encode_csv_chunk_escapes_embedded_newlines():
+    data, count = encode_csv_chunk(BODY, 3)
+
+    assert count == 4
+    # one COPY line per record; newlines inside fields are escaped
+    assert data.count(b"\n") == 4
+    assert data.startswith(b"1\tBird\tmulti\\nline\\nnote\n")
+    assert encode_csv_chunk(b"\n\n", 3) == (b"", 0)
@@ -0,0 +1,29 @@
+import asyncio
+import threading
+
+from python_ag_grid_backend import passwords
+
+
+def test_cancelled_caller_keeps_its_slot_until_the_hash_finishes():
+    release = threading.Event()
+
+    def blocking_hash():
+        release.wait(5)
+        return "hash"
+
+    async def main():
+        task = asyncio.create_task(passwords._run_bounded(blocking_hash))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        # The thread is still hashing, so the slot is still taken
+        assert passwords.get_password_pool_stats()["in_flight"] == 1
+        release.set()
+        for _ in range(100):
+            if passwords.get_password_pool_stats()["in_flight"] == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert passwords.get_password_pool_stats()["in_flight"] == 0
+        assert await passwords._run_bounded(str, 1) == "1"
+
+    asyncio.run(main())
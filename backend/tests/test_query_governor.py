@@ -0,0 +1,109 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from python_ag_grid_backend.chatbot_backend.query_governor import (
+    DEFAULT_LIMITS,
+    QueryLimits,
+    explain,
+    is_single_statement,
+    is_statement_timeout,
+    limited_query,
+    multiple_statements,
+    over_limits,
+    strip_literals,
+    too_expensive,
+)
+
+LIMITS = QueryLimits(max_cost=1000, max_rows=500, statement_timeout_ms=2000)
+
+
+def test_strip_literals_blanks_strings_identifiers_and_comments():
+    stripped = strip_literals(
+        "SELECT \"into\", 'it''s into' FROM t -- delete\n"
+        "WHERE a ILIKE '%update%' /* insert */ AND b = E'x\\' into' AND c = $q$ merge $q$ AND d = $1"
+    )
+    for word in ("into", "delete", "update", "insert", "merge", "'", '"'):
+        assert word not in stripped
+    assert stripped.split() == ["SELECT", ",", "FROM", "t", "WHERE", "a", "ILIKE", "AND", "b", "=", "AND", "c", "=", "AND", "d", "=", "$1"]
+
+
+def test_strip_literals_keeps_code_after_literals():
+    # standard strings don't treat backslash as an escape
+    assert strip_literals("SELECT 'a\\'; DELETE FROM t").split() == ["SELECT", ";", "DELETE", "FROM", "t"]
+    assert strip_literals("SELECT $$ x $$; DROP TABLE t").split() == ["SELECT", ";", "DROP", "TABLE", "t"]
+    # an unterminated literal or comment runs to the end
+    assert strip_literals("SELECT 'open; DROP TABLE t").split() == ["SELECT"]
+
+
+def test_is_single_statement():
+    assert is_single_statement("SELECT 1")
+    assert is_single_statement("SELECT 1;  \n")
+    assert is_single_statement("SELECT ';' AS semi, \"a;b\" FROM t -- ; DROP TABLE t")
+    assert is_single_statement("SELECT $$;$$ /* ; */")
+    assert not is_single_statement("SELECT 1; DROP TABLE t")
+    assert not is_single_statement("SELECT 1;; SELECT 2;")
+    assert not is_single_statement("SELECT 'a'';'; DELETE FROM t")
+
+
+def test_multiple_statements_is_structured():
+    out = multiple_statements()
+    assert out.startswith("[Query rejected] ")
+    assert json.loads(out.split("] ", 1)[1])["reason"] == "multiple_statements"
+
+
+def test_explain_refuses_multiple_statements_before_touching_the_connection():
+    # Nothing is sent: with a dummy connection a real EXPLAIN attempt would just return None
+    with pytest.raises(ValueError, match="one statement"):
+        asyncio.run(explain(object(), "SELECT 1; DROP TABLE t"))
+
+
+def test_over_limits():
+    assert over_limits((10.5, 20), LIMITS) is None
+    assert over_limits((1000, 500), LIMITS) is None
+    assert over_limits((1000.1, 1), LIMITS) == "estimated_cost"
+    assert over_limits((50, 501), LIMITS) == "estimated_rows"
+    # cost is reported first when both are over
+    assert over_limits((5000, 5000), LIMITS) == "estimated_cost"
+
+
+def test_limited_query_wraps_and_strips_trailing_semicolon():
+    assert limited_query("SELECT * FROM nba.players;  \n", 101) == (
+        "SELECT * FROM (SELECT * FROM nba.players) AS q LIMIT 101"
+    )
+    assert limited_query("WITH t AS (SELECT 1) SELECT * FROM t", 5).endswith(") AS q LIMIT 5")
+
+
+def test_too_expensive_is_structured():
+    message = too_expensive("estimated_rows", LIMITS, (123.4, 10**9))
+
+    assert message.startswith("[Query too expensive] ")
+    details = json.loads(message.removeprefix("[Query too expensive] "))
+    assert details["reason"] == "estimated_rows"
+    assert details["estimated_cost"] == 123
+    assert details["estimated_rows"] == 10**9
+    assert details["max_rows"] == 500
+    assert "hint" in details
+
+
+def test_too_expensive_timeout_reports_the_timeout():
+    details = json.loads(too_expensive("timeout", LIMITS).removeprefix("[Query too expensive] "))
+
+    assert details["statement_timeout_ms"] == 2000
+    assert "max_cost" not in details and "estimated_cost" not in details
+
+
+def test_is_statement_timeout():
+    canceled = SimpleNamespace(sqlstate="57014")
+    # SQLAlchemy wraps the driver error in .orig
+    assert is_statement_timeout(SimpleNamespace(orig=canceled))
+    assert is_statement_timeout(SimpleNamespace(orig=SimpleNamespace(pgcode="57014")))
+    assert not is_statement_timeout(SimpleNamespace(orig=SimpleNamespace(sqlstate="42P01")))
+    assert not is_statement_timeout(ValueError("boom"))
+
+
+def test_default_limits_come_from_the_environment_defaults():
+    assert DEFAULT_LIMITS == QueryLimits()
+    assert DEFAULT_LIMITS.statement_timeout_ms > 0
@@ -0,0 +1,153 @@
+import pytest
+
+from python_ag_grid_backend.db_access.row_model import (
+    build_filter_clause,
+    build_keyset_condition,
+    build_order_clause,
+    keyset_direction,
+    normalize_sort_model,
+    quote_ident,
+)
+
+COLUMNS = {"id": "integer", "name": "text", "pts": "double precision", "born": "date", "team": "text"}
+
+
+def _filter(**f):
+    return build_filter_clause({"name": {"filterType": "text", **f}}, COLUMNS)
+
+
+def test_quote_ident_escapes_quotes():
+    assert quote_ident('we"ird') == '"we""ird"'
+
+
+@pytest.mark.parametrize(
+    "kind, sql, params",
+    [
+        ("equals", 'lower("name"::text) = lower(%s)', ["Bird"]),
+        ("notEqual", '("name" IS NULL OR lower("name"::text) <> lower(%s))', ["Bird"]),
+        ("contains", '"name"::text ILIKE %s', ["%Bird%"]),
+        ("notContains", '("name" IS NULL OR "name"::text NOT ILIKE %s)', ["%Bird%"]),
+        ("startsWith", '"name"::text ILIKE %s', ["Bird%"]),
+        ("endsWith", '"name"::text ILIKE %s', ["%Bird"]),
+    ],
+)
+def test_text_filters(kind, sql, params):
+    assert _filter(type=kind, filter="Bird") == (sql, params)
+
+
+def test_text_filter_escapes_like_wildcards():
+    assert _filter(type="contains", filter="50%_a\\b") == ('"name"::text ILIKE %s', ["%50\\%\\_a\\\\b%"])
+
+
+def test_blank_filters_take_no_value():
+    assert _filter(type="blank") == ('("name" IS NULL OR "name"::text = \'\')', [])
+    assert _filter(type="notBlank") == ('("name" IS NOT NULL AND "name"::text <> \'\')', [])
+
+
+def test_number_filters():
+    def number(**f):
+        return build_filter_clause({"pts": {"filterType": "number", **f}}, COLUMNS)
+
+    assert number(type="greaterThanOrEqual", filter=20) == ('"pts" >= %s', [20])
+    assert number(type="lessThan", filter=5) == ('"pts" < %s', [5])
+    assert number(type="notEqual", filter=0) == ('("pts" IS NULL OR "pts" <> %s)', [0])
+    assert number(type="inRange", filter=10, filterTo=20) == ('("pts" > %s AND "pts" < %s)', [10, 20])
+    assert number(type="blank") == ('"pts" IS NULL', [])
+
+
+def test_date_filters_cast_both_sides():
+    sql, params = build_filter_clause(
+        {"born": {"filterType": "date", "type": "inRange", "dateFrom": "1990-01-01", "dateTo": "2000-01-01"}},
+        COLUMNS,
+    )
+    assert sql == '("born"::date > %s::date AND "born"::date < %s::date)'
+    assert params == ["1990-01-01", "2000-01-01"]
+
+
+def test_set_filter_with_null():
+    sql, params = build_filter_clause({"team": {"filterType": "set", "values": ["LAL", None, 7]}}, COLUMNS)
+    assert sql == '("team"::text = ANY(%s) OR "team" IS NULL)'
+    assert params == [["LAL", "7"]]
+    assert build_filter_clause({"team": {"filterType": "set", "values": []}}, COLUMNS) == ("FALSE", [])
+
+
+def test_combined_conditions_and_several_columns():
+    sql, params = build_filter_clause(
+        {
+            "name": {
+                "filterType": "text",
+                "operator": "OR",
+                "conditions": [{"type": "startsWith", "filter": "A"}, {"type": "endsWith", "filter": "z"}],
+            },
+            # older condition1/condition2 shape
+            "pts": {
+                "filterType": "number",
+                "operator": "AND",
+                "condition1": {"type": "greaterThan", "filter": 1},
+                "condition2": {"type": "lessThan", "filter": 9},
+            },
+        },
+        COLUMNS,
+    )
+    assert sql == '("name"::text ILIKE %s OR "name"::text ILIKE %s) AND ("pts" > %s AND "pts" < %s)'
+    assert params == ["A%", "%z", 1, 9]
+
+
+def test_empty_filter_model():
+    assert build_filter_clause(None, COLUMNS) == ("", [])
+
+
+@pytest.mark.parametrize(
+    "filter_model, message",
+    [
+        ({"nope": {"filterType": "text", "type": "equals", "filter": "x"}}, "Unknown column"),
+        ({'name" OR 1=1 --': {"filterType": "text", "filter": "x"}}, "Unknown column"),
+        ({"name": {"filterType": "text", "type": "regex", "filter": "x"}}, "Unsupported text filter"),
+        ({"pts": {"filterType": "number", "type": "between", "filter": 1}}, "Unsupported filter"),
+        ({"pts": {"filterType": "number", "type": "inRange", "filter": 1}}, "upper bound"),
+        ({"pts": {"filterType": "geo", "type": "equals"}}, "Unsupported filter type"),
+        ({"name": {"filterType": "text", "type": "equals"}}, "needs a value"),
+        ({"name": {"filterType": "text", "operator": "XOR", "conditions": []}}, "Unsupported filter operator"),
+    ],
+)
+def test_rejects_unknown_columns_and_operators(filter_model, message):
+    with pytest.raises(ValueError, match=message):
+        build_filter_clause(filter_model, COLUMNS)
+
+
+def test_sort_appends_primary_key_tie_breaker():
+    order = normalize_sort_model([{"colId": "pts", "sort": "desc"}], COLUMNS, key_fields=("id",))
+    assert order == [("pts", "DESC"), ("id", "ASC")]
+    assert build_order_clause(order) == '"pts" DESC, "id" ASC'
+
+
+def test_sort_on_the_key_keeps_its_direction_for_the_rest_of_the_key():
+    order = normalize_sort_model([{"colId": "id", "sort": "desc"}], COLUMNS, key_fields=("id", "team"))
+    assert order == [("id", "DESC"), ("team", "DESC")]
+
+
+def test_sort_rejects_unknown_columns_and_directions():
+    with pytest.raises(ValueError, match="Unknown column"):
+        normalize_sort_model([{"colId": "nope"}], COLUMNS)
+    with pytest.raises(ValueError, match="Unsupported sort direction"):
+        normalize_sort_model([{"colId": "pts", "sort": "sideways"}], COLUMNS)
+
+
+def test_no_order():
+    assert build_order_clause([]) == ""
+
+
+def test_keyset_direction():
+    assert keyset_direction([("id", "ASC")], ("id",)) == "ASC"
+    assert keyset_direction([("id", "DESC"), ("team", "DESC")], ("id", "team")) == "DESC"
+    # mixed directions or a non-key column first: OFFSET paging
+    assert keyset_direction([("id", "ASC"), ("team", "DESC")], ("id", "team")) is None
+    assert keyset_direction([("pts", "ASC"), ("id", "ASC")], ("id",)) is None
+    assert keyset_direction([("id", "ASC")], ()) is None
+
+
+def test_keyset_condition():
+    assert build_keyset_condition(("id",), "ASC", [42]) == ('("id") > (%s)', [42])
+    assert build_keyset_condition(("id", "team"), "DESC", [42, "LAL"]) == ('("id", "team") < (%s, %s)', [42, "LAL"])
+    with pytest.raises(ValueError, match="Cursor does not match"):
+        build_keyset_condition(("id", "team"), "ASC", [42])
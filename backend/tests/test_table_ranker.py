@@ -0,0 +1,89 @@
+from types import SimpleNamespace
+
+from python_ag_grid_backend.chatbot_backend.table_ranker import (
+    SchemaCatalog,
+    relevance_query,
+    tokenize,
+)
+
+
+def _table(name, columns, rows=100):
+    return {
+        "key": name,
+        "columns": len(columns),
+        "rows": rows,
+        "columnsDef": [{"field": c, "type": "integer"} for c in columns],
+    }
+
+
+TABLES = [
+    _table("players", ["player_id", "first_name", "last_name", "team_id"], rows=500),
+    _table("player_stats", ["player_id", "game_id", "points", "rebounds", "assists"], rows=50000),
+    _table("games", ["game_id", "home_team", "away_team", "game_date"], rows=1200),
+    _table("teams", ["team_id", "team_name", "arena"], rows=30),
+    _table("player_salaries", ["player_id", "season", "salary"], rows=4000),
+    _table("injuries", ["player_id", "injury_date", "injuryType"], rows=300),
+]
+
+
+def test_tokenize_splits_identifiers_and_stems():
+    assert tokenize("playerStats.injury_dates") == ["player", "stat", "injury", "date"]
+    assert tokenize("Stories of 23 players") == ["story", "of", "23", "player"]
+
+
+def test_description_is_stable_and_sorted():
+    a = SchemaCatalog("nba", TABLES)
+    b = SchemaCatalog("nba", list(reversed(TABLES)))
+
+    assert a.description == b.description
+    assert a.description.startswith("Available tables in schema 'nba':\n\n- games (4 columns")
+
+
+def test_top_tables_by_relevance():
+    catalog = SchemaCatalog("nba", TABLES)
+
+    assert catalog.top_tables("who had the most rebounds and assists?", k=1) == ["player_stats"]
+    assert catalog.top_tables("salary by season", k=1) == ["player_salaries"]
+
+
+def test_verbatim_table_names_come_first():
+    catalog = SchemaCatalog("nba", TABLES)
+
+    # "player" is in almost every table; the one named in SQL must still win
+    ranked = catalog.top_tables("SELECT * FROM nba.players WHERE points > 20", k=2)
+
+    assert ranked[0] == "players"
+
+
+def test_unmatched_slots_are_filled_with_the_largest_tables():
+    catalog = SchemaCatalog("nba", TABLES)
+
+    assert catalog.top_tables("hello", k=2) == ["player_stats", "player_salaries"]
+
+
+def test_describe_small_schema_is_the_full_description():
+    catalog = SchemaCatalog("nba", TABLES)
+
+    assert catalog.describe("anything", k=len(TABLES)) == catalog.description
+
+
+def test_describe_lists_the_other_tables_by_name():
+    catalog = SchemaCatalog("nba", TABLES)
+
+    text = catalog.describe("arena of each team", k=2)
+
+    assert "- teams (3 columns, 30 rows)" in text
+    assert "  • arena: integer" in text
+    assert "Other tables in this schema (4, names only" in text
+    assert "  • salary: integer" not in text
+
+
+def test_relevance_query_uses_recent_user_text_and_tool_sql():
+    messages = [
+        SimpleNamespace(type="human", content="old question about arenas"),
+        SimpleNamespace(type="human", content=[{"type": "text", "text": "injuries this season"}]),
+        SimpleNamespace(type="ai", content="", tool_calls=[{"args": {"query": "SELECT * FROM nba.injuries"}}]),
+        SimpleNamespace(type="tool", content="id,name\n1,x"),
+    ]
+
+    assert relevance_query(messages, recent=3) == "injuries this season\nSELECT * FROM nba.injuries"
@@ -0,0 +1,166 @@
+from contextlib import contextmanager
+import re
+
+import pytest
+
+from python_ag_grid_backend.db_access import tables_operations
+from python_ag_grid_backend.db_access.tables_operations import apply_table_transaction
+
+COLUMNS = {"season": "integer", "player_id": "integer", "pts": "double precision", "team": "text"}
+
+
+class FakeConnection:
+    def __init__(self):
+        self.committed = False
+        self.rolled_back = False
+
+    @contextmanager
+    def cursor(self):
+        yield "cursor"
+
+    def commit(self):
+        self.committed = True
+
+    def rollback(self):
+        self.rolled_back = True
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """Record the execute_values calls apply_table_transaction makes, without a database."""
+    state = {"conn": FakeConnection(), "calls": [], "key": ("season", "player_id"), "fail_on": None}
+
+    @contextmanager
+    def get_connection():
+        # Same contract as database.get_connection: roll back if the block raises
+        try:
+            yield state["conn"]
+        except Exception:
+            state["conn"].rollback()
+            raise
+
+    def execute_values(cur, sql, argslist, template=None, page_size=100, fetch=False):
+        if state["fail_on"] and sql.startswith(state["fail_on"]):
+            raise RuntimeError("boom")
+        state["calls"].append({"sql": sql, "args": argslist, "template": template, "page_size": page_size})
+        return [{"n": i} for i, _ in enumerate(argslist)]
+
+    monkeypatch.setattr(tables_operations, "get_connection", get_connection)
+    monkeypatch.setattr(tables_operations, "execute_values", execute_values)
+    monkeypatch.setattr(tables_operations, "get_table_columns", lambda table, schema="public": dict(COLUMNS))
+    monkeypatch.setattr(tables_operations, "get_primary_key_columns", lambda table, schema="public": state["key"])
+    monkeypatch.setattr(tables_operations, "bump_schema_version", lambda schema=None: None)
+    return state
+
+
+def test_remove_batch_deletes_by_composite_key(db):
+    result = apply_table_transaction(
+        "stats",
+        remove=[{"season": 2024, "player_id": 7}, {"season": 2025, "player_id": 7, "pts": 9.0}],
+        schema_name="nba",
+    )
+    (call,) = db["calls"]
+    assert call["sql"] == (
+        'DELETE FROM "nba"."stats" AS t USING (VALUES %s) AS v("season", "player_id") '
+        'WHERE t."season" = v."season" AND t."player_id" = v."player_id" RETURNING t.*'
+    )
+    assert call["template"] == "(%s::integer, %s::integer)"
+    assert call["args"] == [[2024, 7], [2025, 7]]
+    assert len(result["remove"]) == 2
+    assert db["conn"].committed
+
+
+def test_update_batch_casts_values_and_matches_composite_key(db):
+    apply_table_transaction("stats", update=[{"season": 2024, "player_id": 7, "pts": 31.5, "team": "LAL"}])
+    (call,) = db["calls"]
+    assert call["sql"] == (
+        'UPDATE "public"."stats" AS t SET "pts" = v."pts", "team" = v."team" '
+        'FROM (VALUES %s) AS v("season", "player_id", "pts", "team") '
+        'WHERE t."season" = v."season" AND t."player_id" = v."player_id" RETURNING t.*'
+    )
+    assert call["template"] == "(%s::integer, %s::integer, %s::double precision, %s::text)"
+    assert call["args"] == [[2024, 7, 31.5, "LAL"]]
+
+
+def test_update_rows_are_batched_by_column_set(db):
+    apply_table_transaction(
+        "stats",
+        update=[
+            {"season": 2024, "player_id": 1, "pts": 10.0},
+            {"player_id": 2, "season": 2024, "team": "BOS"},
+            {"season": 2024, "player_id": 3, "pts": 12.0},
+        ],
+    )
+    pts, team = db["calls"]
+    assert pts["args"] == [[2024, 1, 10.0], [2024, 3, 12.0]]
+    assert 'SET "pts" = v."pts" ' in pts["sql"]
+    # Values are ordered key-first whatever the row dict's order was
+    assert team["args"] == [[2024, 2, "BOS"]]
+    assert team["template"] == "(%s::integer, %s::integer, %s::text)"
+
+
+def test_add_batch_inserts_without_casts(db):
+    result = apply_table_transaction(
+        "stats",
+        add=[{"season": 2024, "player_id": 1, "pts": 3.0}, {"season": 2024, "player_id": 2, "pts": 4.0}],
+        page_size=50,
+    )
+    (call,) = db["calls"]
+    assert call["sql"] == 'INSERT INTO "public"."stats" ("season", "player_id", "pts") VALUES %s RETURNING *'
+    assert call["template"] is None
+    assert call["args"] == [[2024, 1, 3.0], [2024, 2, 4.0]]
+    assert call["page_size"] == 50
+    assert len(result["add"]) == 2
+
+
+def test_batches_run_remove_update_add_in_one_commit(db):
+    apply_table_transaction(
+        "stats",
+        add=[{"season": 2025, "player_id": 1}],
+        update=[{"season": 2024, "player_id": 1, "pts": 1.0}],
+        remove=[{"season": 2023, "player_id": 1}],
+    )
+    assert [c["sql"].split()[0] for c in db["calls"]] == ["DELETE", "UPDATE", "INSERT"]
+    assert db["conn"].committed
+
+
+def test_failed_batch_rolls_back_everything(db):
+    db["fail_on"] = "INSERT"
+    with pytest.raises(RuntimeError):
+        apply_table_transaction(
+            "stats",
+            add=[{"season": 2025, "player_id": 1}],
+            remove=[{"season": 2023, "player_id": 1}],
+        )
+    assert db["conn"].rolled_back
+    assert not db["conn"].committed
+
+
+def test_identifiers_are_quoted(db):
+    COLUMNS['we"ird'] = "text"
+    try:
+        apply_table_transaction("stats", add=[{'we"ird': "x"}])
+    finally:
+        del COLUMNS['we"ird']
+    assert db["calls"][0]["sql"].startswith('INSERT INTO "public"."stats" ("we""ird")')
+
+
+@pytest.mark.parametrize(
+    "kwargs, message",
+    [
+        ({"add": [{"nope": 1}]}, "Unknown column(s): nope."),
+        ({"remove": [{"season": 2024}]}, "Missing primary key value(s): player_id."),
+        ({"update": [{"season": 2024, "player_id": 1}]}, "No fields to update."),
+    ],
+)
+def test_invalid_rows_are_rejected(db, kwargs, message):
+    with pytest.raises(ValueError, match=re.escape(message)):
+        apply_table_transaction("stats", **kwargs)
+    assert not db["conn"].committed
+
+
+def test_update_without_primary_key_is_rejected(db):
+    db["key"] = ()
+    with pytest.raises(ValueError, match="No primary key"):
+        apply_table_transaction("stats", update=[{"season": 2024, "pts": 1.0}])
+    assert db["calls"] == []
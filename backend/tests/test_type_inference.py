@@ -0,0 +1,90 @@
+from python_ag_grid_backend.importers.type_inference import (
+    TEXT_TYPE,
+    clock_to_interval,
+    column_converters,
+    infer_column_types,
+    infer_type,
+)
+
+
+def test_times_of_day_are_time_not_interval():
+    assert infer_type(["19:30", "07:05", "23:59"]) == "TIME"
+    assert infer_type(["10:00:00", "23:59:59", "00:00:01.5", "7:05:00"]) == "TIME"
+
+
+def test_unpadded_clocks_are_interval():
+    # typical game-clock samples: no zero-padded hour, so minutes:seconds
+    assert infer_type(["7:05", "0:30", "11:45"]) == "INTERVAL"
+    assert infer_type(["0:30"]) == "INTERVAL"
+    assert infer_type(["19:30", "7:05", "23:59"]) == "INTERVAL"
+
+
+def test_clock_column_names_mean_interval():
+    clocks = ["11:45", "10:00", "12:00"]
+    assert infer_type(clocks) == "TIME"
+    for name in ("clock", "game_clock", "time_left", "toi", "duration", "Duration"):
+        assert infer_type(clocks, name) == "INTERVAL"
+    assert infer_type(clocks, "tip_off") == "TIME"
+    # "toi" must be a whole word
+    assert infer_type(clocks, "toilet") == "TIME"
+    assert infer_type(["Lakers"], "clock") == TEXT_TYPE
+
+
+def test_game_clocks_are_interval():
+    # minutes above 23 can only be a duration
+    assert infer_type(["48:00", "35:12", "10:00"]) == "INTERVAL"
+    # fractional seconds in M:SS.s form
+    assert infer_type(["0:45.3", "11:59.9"]) == "INTERVAL"
+    assert infer_type(["PT12M", "P1DT2H"]) == "INTERVAL"
+    assert infer_type(["25:00:00", "1:30:00"]) == "INTERVAL"
+
+
+def test_only_interval_columns_get_the_clock_rewrite():
+    types = infer_column_types([["19:30", "48:00"], ["07:05", "12:30"]], 2)
+
+    assert types == ["TIME", "INTERVAL"]
+    assert infer_column_types([["19:30", "11:45"]], 2, ["start", "time_left"]) == ["TIME", "INTERVAL"]
+    assert list(column_converters(types)) == [1]
+    assert clock_to_interval("12:30") == "00:12:30"
+    assert clock_to_interval("1:30:00") == "1:30:00"
+    assert clock_to_interval(None) is None
+
+
+def test_integer_widths():
+    assert infer_type(["1", "-2147483647", "2147483647"]) == "INTEGER"
+    assert infer_type(["1", "2147483648"]) == "BIGINT"
+    assert infer_type(["-9223372036854775807"]) == "BIGINT"
+    assert infer_type(["9223372036854775808"]) == "NUMERIC"
+
+
+def test_decimals():
+    assert infer_type(["1.5", "-2", ".25", "1e3"]) == "FLOAT"
+    # more significant digits than a double holds
+    assert infer_type(["1.5", "12345678901234567.89"]) == "NUMERIC"
+
+
+def test_zero_one_columns_are_integers_not_booleans():
+    assert infer_type(["0", "1", "1", "0"]) == "INTEGER"
+    assert infer_type(["yes", "no", "Y"]) == "BOOLEAN"
+    assert infer_type(["true", "0", "1"]) == "BOOLEAN"
+
+
+def test_timestamps_with_and_without_zone():
+    assert infer_type(["2024-01-02 19:30:00", "2024-01-03T20:00"]) == "TIMESTAMP"
+    # one value with an offset makes the column TIMESTAMPTZ
+    assert infer_type(["2024-01-02 19:30:00", "2024-01-03T20:00:00Z"]) == "TIMESTAMPTZ"
+    assert infer_type(["2024-01-02 19:30:00+01:00", "2024-01-03 20:00:00-0500"]) == "TIMESTAMPTZ"
+    assert infer_type(["2024-01-02", "1/3/2024"]) == "DATE"
+
+
+def test_text_and_empty_columns():
+    assert infer_type(["", " "]) == TEXT_TYPE
+    assert infer_type(["Lakers", "19:30"]) == TEXT_TYPE
+    assert infer_type(["x" * 2000]) == "TEXT"
+    # a multi-line cell can't be anything but text
+    assert infer_type(["1\n2"]) == TEXT_TYPE
+
+
+def test_short_rows_are_padded():
+    assert infer_column_types([["1", "a"], ["2"]], 2) == ["INTEGER", TEXT_TYPE]
+    assert infer_column_types([], 3) == [TEXT_TYPE] * 3
@@ -1,7 +1,21 @@
-import React, { useState } from "react";
+import React, { useEffect, useRef, useState } from "react";
 import { useAuth } from '../../../contexts/AuthContext';
 import "./ImportCSVModal.css";
 
+const JOB_POLL_MS = 1000;
+// Stop polling after this long; the import itself keeps running on the server
+const JOB_MAX_WAIT_MS = 30 * 60 * 1000;
+
+// setTimeout that ends early (rejecting) when the signal aborts
+const sleep = (ms: number, signal: AbortSignal) =>
+  new Promise<void>((resolve, reject) => {
+    const timer = setTimeout(resolve, ms);
+    signal.addEventListener("abort", () => {
+      clearTimeout(timer);
+      reject(signal.reason);
+    }, { once: true });
+  });
+
 interface ImportCSVModalProps {
   onClose: () => void;
   onSuccess: (result?: any) => void;
@@ -15,8 +29,30 @@ export default function ImportCSVModal({ onClose, onSuccess, uploadUrl = `${impo
   const [error, setError] = useState<string | null>(null);
   const [headers, setHeaders] = useState<string[]>([]);
   const [primaryKeys, setPrimaryKeys] = useState<string[]>([]);
+  const [progress, setProgress] = useState<string | null>(null);
 
   const { token } = useAuth();
+  // Aborted when the modal closes, so no request or poll outlives it
+  const abortRef = useRef<AbortController | null>(null);
+  // Id of the background import being polled, if any
+  const jobIdRef = useRef<string | null>(null);
+
+  useEffect(() => () => abortRef.current?.abort(), []);
+
+  const handleClose = () => {
+    abortRef.current?.abort();
+    // Cancelling while the import runs stops it on the server too (its transaction is rolled back)
+    const jobId = jobIdRef.current;
+    if (jobId) {
+      jobIdRef.current = null;
+      fetch(uploadUrl.replace(/import-csv$/, `jobs/${jobId}/cancel`), {
+        method: "POST",
+        headers: { ...(token ? { Authorization: `Bearer ${token}` } : {}) },
+        keepalive: true,
+      }).catch(() => {});
+    }
+    onClose();
+  };
 
   // Parse headers when file is selected
   const handleFileChange = (e: React.ChangeEvent<HTMLInputElement>) => {
@@ -53,25 +89,68 @@ export default function ImportCSVModal({ onClose, onSuccess, uploadUrl = `${impo
     }
     setError(null);
     setLoading(true);
+    const controller = new AbortController();
+    abortRef.current = controller;
+    const { signal } = controller;
     const fd = new FormData();
     fd.append("file", file);
     if (tableName.trim()) fd.append("table_name", tableName.trim());
     if (primaryKeys.length) fd.append("primary_keys", JSON.stringify(primaryKeys));
     try {
       const res = await fetch(uploadUrl, 
-        { method: "POST", headers: { ...(token ? { Authorization: `Bearer ${token}` } : {}) }, body: fd });
+        { method: "POST", headers: { ...(token ? { Authorization: `Bearer ${token}` } : {}) }, body: fd, signal });
       const data = await res.json();
       if (!res.ok) {
         setError(data.detail || "Failed to import CSV");
+      } else if (data.job_id) {
+        // The import runs in the background: poll the job until it finishes
+        jobIdRef.current = data.job_id;
+        const job = await waitForJob(data.job_id, signal);
+        jobIdRef.current = null;
+        if (job.phase === "done") {
+          onSuccess(job.result);
+          onClose();
+        } else {
+          setError(job.error || "Failed to import CSV");
+        }
       } else {
         onSuccess(data);
         onClose();
       }
     } catch (e) {
+      // Closed while running: nothing left to update
+      if (signal.aborted) return;
       setError("Network error");
     } finally {
-      setLoading(false);
+      if (!signal.aborted) {
+        setLoading(false);
+        setProgress(null);
+      }
+    }
+  };
+
+  const waitForJob = async (jobId: string, signal: AbortSignal) => {
+    const jobUrl = uploadUrl.replace(/import-csv$/, `jobs/${jobId}`);
+    const deadline = Date.now() + JOB_MAX_WAIT_MS;
+    while (Date.now() < deadline) {
+      let res: Response;
+      try {
+        res = await fetch(jobUrl, { headers: { ...(token ? { Authorization: `Bearer ${token}` } : {}) }, signal });
+      } catch (e) {
+        if (signal.aborted) throw e;
+        return { phase: "failed", error: "Lost contact with the import; refresh the tables to see if it finished." };
+      }
+      // 404: the job is unknown here (e.g. it runs on another server instance); polling again won't help
+      if (res.status === 404) {
+        return { phase: "failed", error: "This server no longer tracks the import; refresh the tables to see if it finished." };
+      }
+      const job = await res.json().catch(() => ({}));
+      if (!res.ok) return { phase: "failed", error: job.detail };
+      if (job.finished) return job;
+      setProgress(job.rows_processed ? `${job.phase}: ${job.rows_processed.toLocaleString()} rows` : job.phase);
+      await sleep(JOB_POLL_MS, signal);
     }
+    return { phase: "failed", error: "The import is taking a long time; it keeps running, refresh the tables later." };
   };
 
   return (
@@ -110,9 +189,10 @@ export default function ImportCSVModal({ onClose, onSuccess, uploadUrl = `${impo
         )}
 
         {error && <div className="icm-error">{error}</div>}
+        {progress && <div className="icm-sub">{progress}</div>}
 
         <div className="icm-actions">
-          <button className="icm-btn cancel" onClick={onClose} disabled={loading}>Cancel</button>
+          <button className="icm-btn cancel" onClick={handleClose}>Cancel</button>
           <button className="icm-btn primary" onClick={handleSubmit} disabled={loading}>
             {loading ? "Submitting..." : "Submit"}
           </button>